@@ -0,0 +1,57 @@
+"""
+Microbenchmark: sklearn RandomForestRegressor.predict vs CompiledForest.predict
+
+Run from the backend directory:
+    python -m benchmarks.bench_compiled_forest
+"""
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from src.app.ai_team.model_store import flatten_forest
+from src.app.ai_team.compiled_forest import CompiledForest
+
+
+def time_per_call(fn, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    # Same shape as the pricing model: 6 features, 100 trees, max_depth=15
+    X = np.column_stack([
+        rng.integers(0, 6, 5000),
+        rng.integers(0, 4, 5000),
+        rng.integers(0, 4, 5000),
+        rng.integers(0, 4, 5000),
+        rng.integers(50, 2000, 5000),
+        rng.integers(1, 15, 5000)
+    ]).astype(float)
+    y = 25000 * (1 + X[:, 0]) * (0.5 + X[:, 1] / 3) * rng.uniform(0.9, 1.1, 5000)
+
+    model = RandomForestRegressor(
+        n_estimators=100,
+        max_depth=15,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42
+    ).fit(X, y)
+    compiled = CompiledForest(flatten_forest(model))
+
+    assert np.array_equal(model.predict(X), compiled.predict(X)), "predictions differ"
+
+    row = X[:1]
+    print(f"{'rows':>6} {'sklearn (ms)':>14} {'compiled (ms)':>14} {'speedup':>8}")
+    for rows, repeats in [(1, 200), (10, 100), (100, 50), (1000, 10)]:
+        batch = X[:rows] if rows > 1 else row
+        sklearn_time = time_per_call(lambda: model.predict(batch), repeats)
+        compiled_time = time_per_call(lambda: compiled.predict(batch), repeats)
+        print(f"{rows:>6} {sklearn_time * 1000:>14.3f} {compiled_time * 1000:>14.3f} "
+              f"{sklearn_time / compiled_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: messages/sec of the chatbot intent classifiers
+
+Run from the backend directory:
+    python -m benchmarks.bench_intent_classifier
+"""
+import re
+import time
+import random
+from src.app.ai_team.intent_classifier import (
+    INTENT_KEYWORDS, KeywordIntentClassifier, ModelIntentClassifier, train_intent_model
+)
+
+CORPUS = [
+    "Hi there!",
+    "Good morning, who am I speaking to?",
+    "How much would a simple website cost?",
+    "Can you give me a quote for an e-commerce store with payments?",
+    "I want to build a mobile app for my restaurant",
+    "We need to develop a booking system for our salon",
+    "My site shows an error when I log in, please help",
+    "There is a problem with the checkout page on my store",
+    "Can you promote my brand on social media?",
+    "Do you do marketing for small businesses in Durban?",
+    "What are your office hours?",
+    "Thanks, that is all for today",
+    "Ok",
+    "I have a limited budget but would love a landing page for my bakery, something with a menu, photos "
+    "and a contact form. My cousin said you guys are affordable. What would you recommend for a start?",
+]
+
+
+def legacy_classify(message):
+    """List-scanning classifier the compiled one replaced, kept for comparison"""
+    message_lower = message.lower()
+
+    pricing_keywords = ['price', 'cost', 'how much', 'pricing', 'quote', 'budget']
+    project_keywords = ['project', 'develop', 'build', 'create', 'website', 'app']
+    technical_keywords = ['help', 'support', 'problem', 'issue', 'error', 'technical']
+    marketing_keywords = ['marketing', 'social media', 'promote', 'advertise']
+    greeting_keywords = ['hello', 'hi', 'hey', 'good morning', 'good afternoon']
+
+    if any(keyword in message_lower for keyword in pricing_keywords):
+        return 'pricing_inquiry'
+    elif any(keyword in message_lower for keyword in project_keywords):
+        return 'project_help'
+    elif any(keyword in message_lower for keyword in technical_keywords):
+        return 'technical_support'
+    elif any(keyword in message_lower for keyword in marketing_keywords):
+        return 'marketing_info'
+    elif any(keyword in message_lower for keyword in greeting_keywords):
+        return 'greeting'
+    else:
+        return 'general_inquiry'
+
+
+class RegexIntentClassifier:
+    """Single-pass alternation with one named group per intent, evaluated and not adopted"""
+
+    def __init__(self):
+        self.intents = [intent for intent, _ in INTENT_KEYWORDS]
+        branches = [f"(?P<{intent}>{'|'.join(map(re.escape, keywords))})" for intent, keywords in INTENT_KEYWORDS]
+        # Lookahead so keywords overlapping an earlier match are still seen
+        self.pattern = re.compile(f"(?={'|'.join(branches)})")
+        self.rank = {self.pattern.groupindex[intent]: rank for rank, intent in enumerate(self.intents)}
+
+    def classify(self, message):
+        ranks = [self.rank[match.lastindex] for match in self.pattern.finditer(message.lower())]
+        return self.intents[min(ranks)] if ranks else 'general_inquiry'
+
+
+def messages_per_second(fn, messages):
+    started = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return len(messages) / (time.perf_counter() - started)
+
+
+def main():
+    rng = random.Random(42)
+    corpora = {
+        'mixed': [rng.choice(CORPUS) for _ in range(100_000)],
+        'no keywords': ['What are your office hours?', 'Ok', 'Thanks, that is all for today'] * 20_000,
+        'long (1KB)': [CORPUS[-1] * 4] * 20_000,
+    }
+    keywords = KeywordIntentClassifier()
+    regex = RegexIntentClassifier()
+
+    mismatches = sum(legacy_classify(m) != keywords.classify(m) for m in CORPUS)
+    print(f"keyword parity on corpus: {len(CORPUS) - mismatches}/{len(CORPUS)}")
+
+    for name, messages in corpora.items():
+        legacy_rate = messages_per_second(legacy_classify, messages)
+        print(f"{name}:")
+        print(f"{'legacy any() scans':>24} {legacy_rate:>12,.0f} msg/sec")
+        for label, fn in [('compiled keyword table', keywords.classify), ('single regex pass', regex.classify)]:
+            rate = messages_per_second(fn, messages)
+            print(f"{label:>24} {rate:>12,.0f} msg/sec ({rate / legacy_rate:.1f}x)")
+
+    # Bootstrap labels from the keyword classifier; real training data would be labelled conversations
+    model = ModelIntentClassifier(train_intent_model(CORPUS, [keywords.classify(m) for m in CORPUS]), keywords)
+    rate = messages_per_second(model.classify, corpora['mixed'][:5_000])
+    print(f"{'tf-idf + linear':>24} {rate:>12,.0f} msg/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: login (bcrypt verify) throughput versus password hashing pool size
+
+Simulates a login burst against gunicorn as configured in gunicorn.conf.py:
+GUNICORN_WORKERS worker processes, each serving GUNICORN_THREADS request
+threads (gthread) through its own PasswordHasher. workers=0 is the old
+inline path. The last two runs show the 429 backpressure, which only engages
+when a worker has more request threads than PASSWORD_HASH_MAX_PENDING; with
+sync workers (one thread) nothing is ever rejected.
+
+Run from the backend directory:
+    python -m benchmarks.bench_password_hashing
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.app.services.passwords import PasswordHasher, PasswordHasherBusy
+
+ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+WEB_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 4))
+THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+LOGINS_PER_WORKER = 16
+
+
+def web_worker(hashed, threads, hash_workers, max_pending, queue_timeout):
+    """One gunicorn worker: its own hasher, `threads` concurrent logins"""
+    hasher = PasswordHasher(workers=hash_workers, max_pending=max_pending, rounds=ROUNDS, queue_timeout=queue_timeout)
+    hasher.verify('TestPass123', hashed)  # start the pool outside the timing
+    rejected = 0
+
+    def login(_):
+        nonlocal rejected
+        try:
+            return hasher.verify('TestPass123', hashed)
+        except PasswordHasherBusy:
+            rejected += 1
+            return None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as requests:
+        list(requests.map(login, range(LOGINS_PER_WORKER)))
+    finished = time.perf_counter()
+    hasher.shutdown()  # as gunicorn's worker_exit hook does
+    return started, finished, rejected
+
+
+def run_burst(hashed, threads, hash_workers, max_pending, queue_timeout=60):
+    with ProcessPoolExecutor(WEB_WORKERS) as web:
+        results = list(web.map(
+            web_worker, *zip(*[(hashed, threads, hash_workers, max_pending, queue_timeout)] * WEB_WORKERS)
+        ))
+    elapsed = max(end for _, end, _ in results) - min(start for start, _, _ in results)
+    rejected = sum(rejected for _, _, rejected in results)
+    return (WEB_WORKERS * LOGINS_PER_WORKER - rejected) / elapsed, rejected
+
+
+def main():
+    hashed = PasswordHasher(workers=0, rounds=ROUNDS).hash('TestPass123')
+    print(f"bcrypt cost {ROUNDS}, {WEB_WORKERS} gunicorn workers x {THREADS} threads, "
+          f"{LOGINS_PER_WORKER} logins each, {os.cpu_count()} CPUs")
+
+    for hash_workers in [0, 1, 2, 4]:
+        # Large queue so every login is served; the 429 path is measured separately below
+        rate, _ = run_burst(hashed, THREADS, hash_workers, max_pending=LOGINS_PER_WORKER)
+        label = 'inline' if hash_workers == 0 else f'{hash_workers} hashers/worker'
+        print(f"{label:>20} {rate:>8.1f} logins/sec")
+
+    for label, threads in [('gthread', THREADS), ('sync', 1)]:
+        rate, rejected = run_burst(hashed, threads, 2, max_pending=4, queue_timeout=0.05)
+        print(f"{label + ', max_pending=4':>20}: {rate:.1f} logins/sec served, {rejected} rejected with 429")
+
+
+if __name__ == '__main__':
+    main()
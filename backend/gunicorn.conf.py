@@ -0,0 +1,30 @@
+import os
+
+# Build the app (and the AI team with its pricing model) once in the master;
+# workers inherit it copy-on-write instead of each loading or training it.
+os.environ.setdefault('PRELOAD_AI_TEAM', 'true')
+preload_app = True
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+# Threaded workers: requests waiting on OpenAI, Twilio or bcrypt no longer
+# block the whole process, and a login burst can actually fill the password
+# hasher's queue (keep PASSWORD_HASH_MAX_PENDING below threads so it answers
+# 429 instead of stalling every thread).
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+
+def post_fork(server, worker):
+    """Re-create HTTP clients and DB connections that must not cross fork"""
+    from src.app.preload import reinit_after_fork
+    reinit_after_fork()
+
+
+def worker_exit(server, worker):
+    """Write audit events still queued in the worker and stop its password hashing pool"""
+    from src.app.services.audit import audit_log_writer
+    from src.app.services.passwords import password_hasher
+    audit_log_writer.shutdown()
+    password_hasher.shutdown()
@@ -0,0 +1,51 @@
+"""Composite indexes for project listing and audit log lookups
+
+Tables are created by db.create_all() at start-up, so this first revision
+only manages indexes. Each step is guarded, making it safe on databases
+created before these indexes existed and on fresh ones where create_all
+already built them from the models' __table_args__.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# name -> (table, columns)
+INDEXES = {
+    'ix_projects_user_id_created_at': ('projects', ['user_id', 'created_at']),
+    'ix_projects_status_created_at': ('projects', ['status', 'created_at']),
+    'ix_audit_logs_user_id_created_at': ('audit_logs', ['user_id', 'created_at']),
+    'ix_audit_logs_resource_created_at': ('audit_logs', ['resource_type', 'resource_id', 'created_at']),
+    'ix_audit_logs_action_created_at': ('audit_logs', ['action', 'created_at']),
+    'ix_audit_logs_created_at': ('audit_logs', ['created_at']),
+}
+
+# Single-column indexes now covered by the leading column of a composite one
+REPLACED = {
+    'ix_projects_user_id': ('projects', ['user_id']),
+    'ix_audit_logs_user_id': ('audit_logs', ['user_id']),
+}
+
+
+def upgrade():
+    # Built CONCURRENTLY on Postgres so audit_logs keeps taking writes meanwhile,
+    # which cannot happen inside a transaction
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in INDEXES.items():
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+        for name, (table, _) in REPLACED.items():
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in REPLACED.items():
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+        for name, (table, _) in INDEXES.items():
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
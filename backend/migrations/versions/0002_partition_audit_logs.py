@@ -0,0 +1,132 @@
+"""Partition audit_logs by month on Postgres
+
+audit_logs becomes a table natively partitioned by RANGE (created_at), with
+one partition per month and a default partition as a safety net. Existing
+rows are copied into the partitions. The primary key becomes
+(id, created_at), because Postgres requires the partition key in every
+unique constraint. Upcoming partitions are created by the
+audit.maintain_partitions task.
+
+SQLite has no native partitioning. The same task rolls cold months out of
+audit_logs into audit_logs_pYYYYMM tables, so nothing changes here.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'id, user_id, action, resource_type, resource_id, ip_address, user_agent, details, created_at'
+
+# Same set as 0001; created on the parent, so every partition gets them
+INDEXES = {
+    'ix_audit_logs_user_id_created_at': ['user_id', 'created_at'],
+    'ix_audit_logs_resource_created_at': ['resource_type', 'resource_id', 'created_at'],
+    'ix_audit_logs_action_created_at': ['action', 'created_at'],
+    'ix_audit_logs_created_at': ['created_at'],
+}
+
+MONTHS_AHEAD = 2
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def is_partitioned(bind):
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+        "WHERE pg_class.relname = 'audit_logs'"
+    )).scalar() is not None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    if op.get_context().as_sql:
+        raise RuntimeError('0002 sizes partitions from the existing audit rows; run it against the database, not with --sql')
+    if is_partitioned(bind):
+        return
+
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned')
+    op.execute('ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey')
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id VARCHAR(36) NOT NULL,
+            user_id VARCHAR(36) REFERENCES users (id),
+            action VARCHAR(100) NOT NULL,
+            resource_type VARCHAR(50),
+            resource_id VARCHAR(36),
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            details JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    now = datetime.utcnow()
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM audit_logs_unpartitioned')).scalar() or now
+    month = datetime(oldest.year, oldest.month, 1)
+    last = add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE audit_logs_p{month:%Y%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = add_months(month, 1)
+
+    # created_at becomes the partition key, so it can no longer be NULL
+    op.execute(
+        f"INSERT INTO audit_logs ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('created_at', 'COALESCE(created_at, now())')} FROM audit_logs_unpartitioned"
+    )
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'audit_logs', columns)
+    op.execute('DROP TABLE audit_logs_unpartitioned')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    if op.get_context().as_sql:
+        raise RuntimeError('Run the 0002 downgrade against the database, not with --sql')
+    if not is_partitioned(bind):
+        return
+
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_partitioned')
+    op.execute('ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey')
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id VARCHAR(36) NOT NULL PRIMARY KEY,
+            user_id VARCHAR(36) REFERENCES users (id),
+            action VARCHAR(100) NOT NULL,
+            resource_type VARCHAR(50),
+            resource_id VARCHAR(36),
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            details JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute(f'INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned')
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'audit_logs', columns)
+    op.execute('DROP TABLE audit_logs_partitioned CASCADE')
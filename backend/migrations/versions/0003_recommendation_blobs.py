@@ -0,0 +1,128 @@
+"""Store project recommendation payloads once, by content hash
+
+Adds recommendation_blobs (sha256 of the canonical JSON -> payload) and
+replaces the three JSON columns on projects with *_hash foreign keys.
+Existing payloads are hashed and deduplicated in batches, each batch's
+blobs inserted before its projects point at them; the foreign keys are
+added once the backfill is done. Hashes come from the same function the
+application uses, so rows written before and after the migration share
+blobs.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from src.app.services.recommendations import content_hash
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+FIELDS = ['technical_recommendations', 'marketing_recommendations', 'security_assessment']
+BATCH_SIZE = 1000
+
+blobs = sa.table(
+    'recommendation_blobs',
+    sa.column('hash', sa.String),
+    sa.column('payload', sa.JSON),
+    sa.column('created_at', sa.DateTime)
+)
+
+
+def projects_table(suffix=''):
+    return sa.table('projects', sa.column('id', sa.String), *[
+        sa.column(field + suffix, sa.JSON(none_as_null=True) if not suffix else sa.String) for field in FIELDS
+    ])
+
+
+def batches(bind, table, columns):
+    """Rows of projects in id order, BATCH_SIZE at a time"""
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, *[table.c[column] for column in columns])
+            .where(table.c.id > last_id).order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade():
+    bind = op.get_bind()
+    if op.get_context().as_sql:
+        raise RuntimeError('0003 rewrites existing project rows; run it against the database, not with --sql')
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table('recommendation_blobs'):
+        op.create_table(
+            'recommendation_blobs',
+            sa.Column('hash', sa.String(64), primary_key=True),
+            sa.Column('payload', sa.JSON, nullable=False),
+            sa.Column('created_at', sa.DateTime)
+        )
+
+    existing = {column['name'] for column in inspector.get_columns('projects')}
+    added = [field for field in FIELDS if field + '_hash' not in existing]
+    # Plain columns first: foreign keys are only added once every hash has its blob
+    with op.batch_alter_table('projects') as batch_op:
+        for field in added:
+            batch_op.add_column(sa.Column(field + '_hash', sa.String(64)))
+
+    stored = set()
+    old, new = projects_table(), projects_table('_hash')
+    legacy = [field for field in FIELDS if field in existing]
+    for rows in batches(bind, old, FIELDS) if legacy else []:
+        fresh, updates = {}, []
+        for row in rows:
+            values = {}
+            for field in FIELDS:
+                payload = getattr(row, field)
+                key = content_hash(payload) if payload is not None else None
+                if key is not None and key not in stored:
+                    fresh[key] = payload
+                values[field + '_hash'] = key
+            updates.append((row.id, values))
+        if fresh:
+            present = set(bind.execute(sa.select(blobs.c.hash).where(blobs.c.hash.in_(list(fresh)))).scalars())
+            rows_to_add = [{'hash': key, 'payload': payload} for key, payload in fresh.items() if key not in present]
+            if rows_to_add:
+                bind.execute(sa.insert(blobs), rows_to_add)
+            stored.update(fresh)
+        for row_id, values in updates:
+            bind.execute(sa.update(new).where(new.c.id == row_id).values(**values))
+
+    with op.batch_alter_table('projects') as batch_op:
+        for field in legacy:
+            batch_op.drop_column(field)
+        for field in added:
+            batch_op.create_foreign_key(f'fk_projects_{field}_hash', 'recommendation_blobs', [field + '_hash'], ['hash'])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if op.get_context().as_sql:
+        raise RuntimeError('Run the 0003 downgrade against the database, not with --sql')
+
+    with op.batch_alter_table('projects') as batch_op:
+        for field in FIELDS:
+            batch_op.add_column(sa.Column(field, sa.JSON))
+
+    old, new = projects_table(), projects_table('_hash')
+    for rows in batches(bind, new, [field + '_hash' for field in FIELDS]):
+        keys = {getattr(row, field + '_hash') for row in rows for field in FIELDS} - {None}
+        payloads = dict(bind.execute(sa.select(blobs.c.hash, blobs.c.payload).where(blobs.c.hash.in_(list(keys)))).all())
+        for row in rows:
+            bind.execute(sa.update(old).where(old.c.id == row.id).values(**{
+                field: payloads.get(getattr(row, field + '_hash')) for field in FIELDS
+            }))
+
+    # Their foreign keys go with the columns
+    with op.batch_alter_table('projects') as batch_op:
+        for field in FIELDS:
+            batch_op.drop_column(field + '_hash')
+    op.drop_table('recommendation_blobs')
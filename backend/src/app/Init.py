@@ -1,12 +1,19 @@
-from flask import Flask
+from flask import Flask, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 from flask_cors import CORS
 from flask_mail import Mail
 from celery import Celery
 import os
 import logging
 from cryptography.fernet import Fernet
+from .preload import preload_app, register_post_fork
+from .services.audit import audit_log_writer
+from .services.http_clients import upstream_stats
+from .services.identity_cache import identity_cache
+from .services.recommendations import recommendation_store
+from .services.db_engine import engine_profile, engine_options, instrument_engine, pool_stats, pool_metrics
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -21,6 +28,12 @@ logger = logging.getLogger(__name__)
 def create_app():
     app = Flask(__name__)
     
+    database_uri = os.environ.get('DATABASE_URL', 'sqlite:///synthai.db')
+    # Pool sizing per process type: 'web' (gunicorn), 'worker' (Celery) or 'test'
+    db_profile = engine_profile(os.environ.get(
+        'DB_ENGINE_PROFILE', 'test' if os.environ.get('TESTING', 'False').lower() == 'true' else 'web'
+    ))
+    
     # Configuration
     app.config.from_mapping(
         # Security
@@ -28,8 +41,10 @@ def create_app():
         JWT_SECRET_KEY=os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production'),
         
         # Database
-        SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URL', 'sqlite:///synthai.db'),
+        SQLALCHEMY_DATABASE_URI=database_uri,
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQLALCHEMY_ENGINE_OPTIONS=engine_options(database_uri, db_profile),
+        DB_ENGINE_PROFILE=db_profile['name'],
         
         # JWT
         JWT_ACCESS_TOKEN_EXPIRES=int(os.environ.get('JWT_EXPIRY_HOURS', 24)) * 3600,
@@ -44,6 +59,20 @@ def create_app():
         # Celery
         CELERY_BROKER_URL=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
         CELERY_RESULT_BACKEND=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+        PRICING_RETRAIN_INTERVAL_SECONDS=int(os.environ.get('PRICING_RETRAIN_INTERVAL_SECONDS', 24 * 3600)),
+        # Run tasks in-process instead of through the broker (tests, local dev without Redis)
+        CELERY_TASK_ALWAYS_EAGER=os.environ.get('CELERY_TASK_ALWAYS_EAGER', os.environ.get('TESTING', 'False')).lower() == 'true',
+        
+        # Audit log: 'thread' (batched in-process), 'celery' (batched, written by a worker) or 'sync'
+        AUDIT_LOG_MODE=os.environ.get('AUDIT_LOG_MODE', 'sync' if os.environ.get('TESTING', 'False').lower() == 'true' else 'thread'),
+        AUDIT_LOG_BATCH_SIZE=int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 200)),
+        AUDIT_LOG_FLUSH_SECONDS=float(os.environ.get('AUDIT_LOG_FLUSH_SECONDS', 1.0)),
+        AUDIT_LOG_QUEUE_SIZE=int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000)),
+        AUDIT_LOG_WRITE_RETRIES=int(os.environ.get('AUDIT_LOG_WRITE_RETRIES', 3)),
+        AUDIT_LOG_RETRY_BACKOFF_SECONDS=float(os.environ.get('AUDIT_LOG_RETRY_BACKOFF_SECONDS', 0.5)),
+        AUDIT_LOG_SPILL_DIR=os.environ.get('AUDIT_LOG_SPILL_DIR', 'spill/audit_logs'),
+        # Partition creation, roll-out of cold months and archiving (audit.maintain_partitions)
+        AUDIT_LOG_MAINTENANCE_INTERVAL_SECONDS=int(os.environ.get('AUDIT_LOG_MAINTENANCE_INTERVAL_SECONDS', 24 * 3600)),
         
         # Encryption
         ENCRYPTION_KEY=os.environ.get('ENCRYPTION_KEY', Fernet.generate_key()),
@@ -52,16 +81,41 @@ def create_app():
         TWILIO_ACCOUNT_SID=os.environ.get('TWILIO_ACCOUNT_SID'),
         TWILIO_AUTH_TOKEN=os.environ.get('TWILIO_AUTH_TOKEN'),
         TWILIO_WHATSAPP_NUMBER=os.environ.get('TWILIO_WHATSAPP_NUMBER'),
+        
+        # Set by gunicorn.conf.py when the app is preloaded in the master
+        PRELOAD_AI_TEAM=os.environ.get('PRELOAD_AI_TEAM', 'False').lower() == 'true',
+        
+        # Reverse proxies in front of gunicorn: the nginx ingress in Kubernetes
+        # (infrastructure/terraform/kubernetes/ingress.yaml) or nginx in docker-compose.
+        # 0 when clients reach gunicorn directly, or they could spoof X-Forwarded-For.
+        PROXY_FIX_X_FOR=int(os.environ.get('PROXY_FIX_X_FOR', 1)),
     )
     
+    # Client IP and scheme from X-Forwarded-*, so rate limits and audit logs see
+    # the caller rather than the proxy
+    proxy_hops = app.config['PROXY_FIX_X_FOR']
+    if proxy_hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops, x_host=proxy_hops)
+    
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        instrument_engine(db.engine)
     jwt.init_app(app)
     mail.init_app(app)
+    audit_log_writer.init_app(app)
     CORS(app, origins=os.environ.get('CORS_ORIGIN', 'http://localhost:3000'))
     
     # Configure Celery
-    celery.conf.update(app.config)
+    celery.conf.update(celery_settings(app))
+    
+    class ContextTask(celery.Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+    
+    celery.Task = ContextTask
+    from . import tasks  # registers Celery task definitions
     
     # Register blueprints
     from .routes.auth import auth_bp
@@ -71,6 +125,7 @@ def create_app():
     from .routes.payments import payments_bp
     from .routes.marketing import marketing_bp
     from .routes.whatsapp import whatsapp_bp
+    from .routes.audit import audit_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(projects_bp, url_prefix='/api/projects')
@@ -79,21 +134,62 @@ def create_app():
     app.register_blueprint(payments_bp, url_prefix='/api/payments')
     app.register_blueprint(marketing_bp, url_prefix='/api/marketing')
     app.register_blueprint(whatsapp_bp, url_prefix='/api/whatsapp')
+    app.register_blueprint(audit_bp, url_prefix='/api/audit')
+    
+    @app.route('/api/metrics')
+    @jwt_required()
+    def metrics():
+        """Queue depth, flush latency, cache hit rate, DB pool usage and circuit state of background components"""
+        return jsonify({
+            'audit_log': audit_log_writer.stats(),
+            'identity_cache': identity_cache.stats(),
+            'recommendation_blobs': recommendation_store.stats(),
+            'db_pool': dict(pool_stats(db.engine), profile=app.config['DB_ENGINE_PROFILE']),
+            'upstreams': upstream_stats()
+        })
     
     # Create tables
     with app.app_context():
         db.create_all()
     
+    # Connections opened in the master (create_all above) must not be reused by workers
+    @register_post_fork
+    def dispose_db_connections():
+        with app.app_context():
+            db.engine.dispose(close=False)
+        pool_metrics.reset()
+    
+    preload_app(app)
+    
     logger.info("SynthAI application initialized successfully")
     return app
 
+def celery_settings(app):
+    """
+    Celery settings from the Flask config, under Celery's lowercase names only.
+    
+    Passing app.config itself would mix old-style CELERY_* keys with new-style
+    ones such as beat_schedule, which Celery rejects with ImproperlyConfigured.
+    """
+    return {
+        'broker_url': app.config['CELERY_BROKER_URL'],
+        'result_backend': app.config['CELERY_RESULT_BACKEND'],
+        'task_always_eager': app.config['CELERY_TASK_ALWAYS_EAGER'],
+        'beat_schedule': {
+            'retrain-pricing-model': {
+                'task': 'pricing.retrain_model',
+                'schedule': app.config['PRICING_RETRAIN_INTERVAL_SECONDS'],
+            },
+            'maintain-audit-partitions': {
+                'task': 'audit.maintain_partitions',
+                'schedule': app.config['AUDIT_LOG_MAINTENANCE_INTERVAL_SECONDS'],
+            },
+        },
+    }
+
 def make_celery(app):
-    celery = Celery(
-        app.import_name,
-        backend=app.config['CELERY_RESULT_BACKEND'],
-        broker=app.config['CELERY_BROKER_URL']
-    )
-    celery.conf.update(app.config)
+    celery = Celery(app.import_name)
+    celery.conf.update(celery_settings(app))
     
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
@@ -1,30 +1,47 @@
 import os
 import logging
-import openai
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
 import re
+from .response_cache import ResponseCache
+from .context_store import ConversationContext, context_store_from_env
+from .intent_classifier import intent_classifier_from_env
+from ..services.http_clients import get_openai_client, openai_upstream
 
 logger = logging.getLogger(__name__)
 
+# End of a sentence in a streamed reply: terminal punctuation followed by whitespace
+SENTENCE_END = re.compile(r'[.!?]\s')
+
 class ChatbotAI:
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
-        self.conversation_context = {}
+        self.context_store = context_store_from_env()
+        self.response_cache = ResponseCache.from_env()
+        self.intent_classifier = intent_classifier_from_env()
+        self.streaming = os.environ.get('CHATBOT_STREAMING', 'false').lower() == 'true'
+        self.stream_min_chars = int(os.environ.get('CHATBOT_STREAM_MIN_CHARS', 60))
+        self.stream_max_chars = int(os.environ.get('CHATBOT_STREAM_MAX_CHARS', 200))
+        # Per-thread early-send callback of the message being processed
+        self._local = threading.local()
+    
+    @property
+    def openai_client(self):
+        """Shared pooled OpenAI client of this process"""
+        return get_openai_client()
     
-    def process_whatsapp_message(self, message: str, phone_number: str) -> str:
+    def process_whatsapp_message(self, message: str, phone_number: str,
+                                 send_early: Optional[Callable[[str], Any]] = None) -> str:
         """
         Process WhatsApp messages and generate AI responses
+        
+        With streaming enabled and a send_early callback, the first sentence of
+        an OpenAI reply is passed to send_early as soon as it has streamed in.
+        The full response is still returned; it starts with the text already sent.
         """
+        self._local.send_early = send_early
         try:
             # Get or create conversation context
-            if phone_number not in self.conversation_context:
-                self.conversation_context[phone_number] = {
-                    'history': [],
-                    'user_info': {},
-                    'conversation_stage': 'greeting'
-                }
-            
-            context = self.conversation_context[phone_number]
+            context = self.context_store.get(phone_number)
             
             # Classify message intent
             intent = self._classify_intent(message)
@@ -43,50 +60,25 @@ class ChatbotAI:
             else:
                 response = self._handle_general_inquiry(message, context)
             
-            # Update conversation history
-            context['history'].append({
-                'user_message': message,
-                'bot_response': response,
-                'intent': intent
-            })
-            
-            # Keep only last 10 messages in history
-            if len(context['history']) > 10:
-                context['history'] = context['history'][-10:]
+            # Update conversation history (a ring buffer of the last turns)
+            context.add_turn(message, response, intent)
+            self.context_store.save(phone_number, context)
             
             return response
             
         except Exception as e:
             logger.error(f"Chatbot processing error: {e}")
             return self._get_fallback_response()
+        finally:
+            self._local.send_early = None
     
     def _classify_intent(self, message: str) -> str:
         """
         Classify the intent of the user message
         """
-        message_lower = message.lower()
-        
-        # Intent classification logic
-        pricing_keywords = ['price', 'cost', 'how much', 'pricing', 'quote', 'budget']
-        project_keywords = ['project', 'develop', 'build', 'create', 'website', 'app']
-        technical_keywords = ['help', 'support', 'problem', 'issue', 'error', 'technical']
-        marketing_keywords = ['marketing', 'social media', 'promote', 'advertise']
-        greeting_keywords = ['hello', 'hi', 'hey', 'good morning', 'good afternoon']
-        
-        if any(keyword in message_lower for keyword in pricing_keywords):
-            return 'pricing_inquiry'
-        elif any(keyword in message_lower for keyword in project_keywords):
-            return 'project_help'
-        elif any(keyword in message_lower for keyword in technical_keywords):
-            return 'technical_support'
-        elif any(keyword in message_lower for keyword in marketing_keywords):
-            return 'marketing_info'
-        elif any(keyword in message_lower for keyword in greeting_keywords):
-            return 'greeting'
-        else:
-            return 'general_inquiry'
+        return self.intent_classifier.classify(message)
     
-    def _handle_greeting(self, message: str, context: Dict[str, Any]) -> str:
+    def _handle_greeting(self, message: str, context: ConversationContext) -> str:
         """Handle greeting messages"""
         responses = [
             "Hello! 👋 I'm Robyn from SynthAI. How can I help you today?",
@@ -95,11 +87,11 @@ class ChatbotAI:
         ]
         
         # Update conversation stage
-        context['conversation_stage'] = 'active'
+        context.set_stage('active')
         
         return responses[hash(message) % len(responses)]
     
-    def _handle_pricing_inquiry(self, message: str, context: Dict[str, Any]) -> str:
+    def _handle_pricing_inquiry(self, message: str, context: ConversationContext) -> str:
         """Handle pricing-related inquiries"""
         prompt = f"""
         User is asking about pricing: "{message}"
@@ -114,12 +106,12 @@ class ChatbotAI:
         """
         
         try:
-            response = self._get_openai_response(prompt)
+            response = self._get_openai_response(prompt, 'pricing_inquiry', message)
             return response + "\n\n💡 Want a detailed quote? Visit: https://synthai.co.za/pricing"
         except Exception as e:
             return "We provide AI-powered project pricing in ZAR! Our system analyzes your requirements for accurate estimates. Visit https://synthai.co.za/pricing for a free quote! 💰"
     
-    def _handle_project_help(self, message: str, context: Dict[str, Any]) -> str:
+    def _handle_project_help(self, message: str, context: ConversationContext) -> str:
         """Handle project-related inquiries"""
         prompt = f"""
         User needs help with a project: "{message}"
@@ -134,12 +126,12 @@ class ChatbotAI:
         """
         
         try:
-            response = self._get_openai_response(prompt)
+            response = self._get_openai_response(prompt, 'project_help', message)
             return response + "\n\n🚀 Let's discuss your project! Visit: https://synthai.co.za"
         except Exception as e:
             return "We specialize in AI-powered project development! From web apps to enterprise solutions, we've got you covered. Let's discuss your project at https://synthai.co.za! 🛠️"
     
-    def _handle_technical_support(self, message: str, context: Dict[str, Any]) -> str:
+    def _handle_technical_support(self, message: str, context: ConversationContext) -> str:
         """Handle technical support inquiries"""
         prompt = f"""
         User needs technical support: "{message}"
@@ -154,12 +146,12 @@ class ChatbotAI:
         """
         
         try:
-            response = self._get_openai_response(prompt)
+            response = self._get_openai_response(prompt, 'technical_support', message)
             return response + "\n\n🔧 Need immediate help? Email: support@synthai.co.za"
         except Exception as e:
             return "I'm here to help with technical questions! For detailed support, our team is available via email at support@synthai.co.za. We'll get you sorted! ⚡"
     
-    def _handle_marketing_info(self, message: str, context: Dict[str, Any]) -> str:
+    def _handle_marketing_info(self, message: str, context: ConversationContext) -> str:
         """Handle marketing-related inquiries"""
         prompt = f"""
         User is asking about marketing services: "{message}"
@@ -174,12 +166,12 @@ class ChatbotAI:
         """
         
         try:
-            response = self._get_openai_response(prompt)
+            response = self._get_openai_response(prompt, 'marketing_info', message)
             return response + "\n\n📱 Boost your presence! See packages: https://synthai.co.za/marketing"
         except Exception as e:
             return "We offer AI-powered social media marketing across all platforms! TikTok, Facebook, Instagram, and more. Get your brand noticed! Check our packages at https://synthai.co.za/marketing 🎯"
     
-    def _handle_general_inquiry(self, message: str, context: Dict[str, Any]) -> str:
+    def _handle_general_inquiry(self, message: str, context: ConversationContext) -> str:
         """Handle general inquiries using OpenAI"""
         prompt = f"""
         User message: "{message}"
@@ -199,29 +191,91 @@ class ChatbotAI:
         """
         
         try:
-            response = self._get_openai_response(prompt)
+            response = self._get_openai_response(prompt, 'general_inquiry', message)
             return response
         except Exception as e:
             return self._get_fallback_response()
     
-    def _get_openai_response(self, prompt: str) -> str:
-        """Get response from OpenAI GPT"""
+    def _get_openai_response(self, prompt: str, intent: str = None, message: str = None) -> str:
+        """Get response from OpenAI GPT, cached by intent and normalized message when given"""
+        if intent and message:
+            cached = self.response_cache.get(intent, message)
+            if cached is not None:
+                return cached
+        
+        send_early = getattr(self._local, 'send_early', None)
+        try:
+            complete = True
+            if self.streaming and send_early:
+                content, complete = self._stream_openai_response(prompt, send_early)
+            else:
+                response = openai_upstream.call(
+                    self.openai_client.chat.completions.create,
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are Robyn, a helpful AI assistant for SynthAI."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=150,
+                    temperature=0.7
+                )
+                content = response.choices[0].message.content.strip()
+            
+            if intent and message and complete:
+                self.response_cache.set(intent, message, content)
+            return content
+            
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise e
+    
+    def _stream_openai_response(self, prompt: str, send_early: Callable[[str], Any]) -> Tuple[str, bool]:
+        """
+        Stream the completion, handing the first sentence to send_early as soon
+        as it is complete (or the first stream_max_chars if no sentence ends by then).
+        Returns the reply and whether the stream finished.
+        """
+        text = ''
+        sent = False
         try:
-            response = self.openai_client.chat.completions.create(
+            stream = openai_upstream.call(
+                self.openai_client.chat.completions.create,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are Robyn, a helpful AI assistant for SynthAI."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=150,
-                temperature=0.7
+                temperature=0.7,
+                stream=True
             )
-            
-            return response.choices[0].message.content.strip()
-            
+            for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                text += chunk.choices[0].delta.content
+                if not sent:
+                    first = self._first_message(text.lstrip())
+                    if first:
+                        send_early(first)
+                        sent = True
         except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            raise e
+            if not sent:
+                raise
+            # The user already has the start of the reply; finish with what arrived
+            logger.error(f"OpenAI stream interrupted after early send: {e}")
+            return text.strip(), False
+        
+        return text.strip(), True
+    
+    def _first_message(self, text: str) -> Optional[str]:
+        """Leading part of a partial reply worth sending on its own, if any yet"""
+        match = SENTENCE_END.search(text, self.stream_min_chars - 1)
+        if match:
+            return text[:match.start() + 1]
+        if len(text) >= self.stream_max_chars:
+            cut = text.rfind(' ', 0, self.stream_max_chars)
+            return text[:cut if cut > 0 else self.stream_max_chars].rstrip()
+        return None
     
     def _get_fallback_response(self) -> str:
         """Fallback response when AI fails"""
@@ -233,7 +287,7 @@ class ChatbotAI:
         
         return fallback_responses[hash(str(len(fallback_responses))) % len(fallback_responses)]
 # Update the pricing inquiry handler
-def _handle_pricing_inquiry(self, message: str, context: Dict[str, Any]) -> str:
+def _handle_pricing_inquiry(self, message: str, context: ConversationContext) -> str:
     """Handle pricing-related inquiries with affordable messaging"""
     prompt = f"""
     User is asking about pricing: "{message}"
@@ -251,7 +305,7 @@ def _handle_pricing_inquiry(self, message: str, context: Dict[str, Any]) -> str:
     """
     
     try:
-        response = self._get_openai_response(prompt)
+        response = self._get_openai_response(prompt, 'pricing_inquiry', message)
         return response + "\n\n💡 Get your affordable quote now: https://synthai.co.za/pricing"
     except Exception as e:
         return "Great news! 🎉 We've reduced our prices by 60%! Simple websites from R5,000, e-commerce from R15,000. Get your instant affordable quote at https://synthai.co.za/pricing 💰"
@@ -0,0 +1,61 @@
+import logging
+from typing import Dict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledForest:
+    """
+    Array-based evaluator for a fitted RandomForestRegressor.
+
+    Works directly on the flattened node arrays written by the model store
+    (see model_store.flatten_forest), so it can run on memory-mapped artifacts.
+    Predictions are bitwise identical to sklearn's predict: inputs are compared
+    as float32 like sklearn's tree code, and per-tree outputs are summed in
+    estimator order before dividing by the number of trees.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        offsets = np.asarray(arrays['tree_offsets'])
+        self.n_trees = len(offsets) - 1
+        self.roots = offsets[:-1]
+
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.value = arrays['value']
+
+        # Child indexes are stored per tree; make them global once so the
+        # traversal is a single gather per level. Leaves keep -1.
+        tree_of_node = np.repeat(np.arange(self.n_trees), np.diff(offsets))
+        left = np.asarray(arrays['children_left'])
+        right = np.asarray(arrays['children_right'])
+        is_leaf = left == -1
+        self.children_left = np.where(is_leaf, -1, left + offsets[tree_of_node])
+        self.children_right = np.where(is_leaf, -1, right + offsets[tree_of_node])
+
+    def apply(self, X) -> np.ndarray:
+        """Global leaf index reached by each row in each tree, shape (n_rows, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+
+        while True:
+            left = self.children_left[node]
+            at_leaf = left == -1
+            if at_leaf.all():
+                return node
+
+            # Leaves carry feature -2, which still indexes X safely; they are masked out below
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            next_node = np.where(go_left, left, self.children_right[node])
+            node = np.where(at_leaf, node, next_node)
+
+    def predict(self, X) -> np.ndarray:
+        """Average of the tree outputs, matching RandomForestRegressor.predict"""
+        leaf_values = self.value[self.apply(X)]
+        # cumsum adds left to right, the same order sklearn accumulates estimators in
+        return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_trees
@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationContext:
+    """
+    Compact per-conversation state.
+
+    History is a fixed-size ring buffer of (user_message, bot_response, intent)
+    tuples, and messages are truncated on the way in, so the memory a single
+    conversation can hold is bounded regardless of how chatty the user is.
+    """
+
+    __slots__ = ('history', 'user_info', 'conversation_stage', 'dirty')
+
+    def __init__(self, history=(), user_info=None, conversation_stage='greeting', max_history=10):
+        self.history = deque((tuple(turn) for turn in history), maxlen=max_history)
+        self.user_info = user_info or {}
+        self.conversation_stage = conversation_stage
+        self.dirty = False
+
+    def add_turn(self, user_message: str, bot_response: str, intent: str, max_chars: int = 500):
+        self.history.append((user_message[:max_chars], (bot_response or '')[:max_chars], intent))
+        self.dirty = True
+
+    def set_stage(self, stage: str):
+        if stage != self.conversation_stage:
+            self.conversation_stage = stage
+            self.dirty = True
+
+    def approx_bytes(self) -> int:
+        """Approximate memory held by this context"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.history) + sys.getsizeof(self.user_info)
+        for turn in self.history:
+            size += sys.getsizeof(turn) + sum(sys.getsizeof(part) for part in turn)
+        for key, value in self.user_info.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+        return size
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'history': list(self.history),
+            'user_info': self.user_info,
+            'conversation_stage': self.conversation_stage
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_history: int = 10) -> 'ConversationContext':
+        return cls(data.get('history', ()), data.get('user_info'), data.get('conversation_stage', 'greeting'), max_history)
+
+
+class MemoryContextStore:
+    """Per-process LRU of conversations with idle TTL"""
+
+    def __init__(self, maxsize: int = 10000, ttl: int = 24 * 3600, max_history: int = 10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_history = max_history
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, phone_number: str) -> ConversationContext:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._contexts.get(phone_number)
+            if entry is not None and entry[0] > now:
+                self._contexts[phone_number] = (now + self.ttl, entry[1])
+                self._contexts.move_to_end(phone_number)
+                return entry[1]
+
+            context = ConversationContext(max_history=self.max_history)
+            self._contexts[phone_number] = (now + self.ttl, context)
+            self._contexts.move_to_end(phone_number)
+            while len(self._contexts) > self.maxsize:
+                self._contexts.popitem(last=False)
+            return context
+
+    def save(self, phone_number: str, context: ConversationContext):
+        # The stored object is the one being mutated; nothing to write back
+        context.dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            contexts = [context for _, context in self._contexts.values()]
+        total = sum(context.approx_bytes() for context in contexts)
+        return {
+            'conversations': len(contexts),
+            'approx_bytes': total,
+            'approx_bytes_per_conversation': total // len(contexts) if contexts else 0
+        }
+
+
+class RedisContextStore:
+    """
+    Conversations shared by every worker.
+
+    Each message reads its context once and writes it back once at the end of
+    processing, and only if something changed.
+    """
+
+    def __init__(self, url: str, ttl: int = 24 * 3600, max_history: int = 10, prefix: str = 'chatbot:context'):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+        self.max_history = max_history
+        self.prefix = prefix
+
+    def get(self, phone_number: str) -> ConversationContext:
+        raw = self.client.get(f'{self.prefix}:{phone_number}')
+        if raw is None:
+            return ConversationContext(max_history=self.max_history)
+        return ConversationContext.from_dict(json.loads(raw), self.max_history)
+
+    def save(self, phone_number: str, context: ConversationContext):
+        if not context.dirty:
+            return
+        self.client.setex(f'{self.prefix}:{phone_number}', self.ttl, json.dumps(context.to_dict()))
+        context.dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {'conversations': sum(1 for _ in self.client.scan_iter(f'{self.prefix}:*'))}
+
+
+def context_store_from_env():
+    """Build the store configured by CHATBOT_CONTEXT_* environment variables"""
+    ttl = int(os.environ.get('CHATBOT_CONTEXT_TTL_SECONDS', 24 * 3600))
+    max_history = int(os.environ.get('CHATBOT_CONTEXT_HISTORY', 10))
+
+    if os.environ.get('CHATBOT_CONTEXT_BACKEND', 'memory') == 'redis':
+        try:
+            return RedisContextStore(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'), ttl, max_history)
+        except Exception as e:
+            logger.warning(f"Redis context store unavailable, using in-memory store: {e}")
+
+    return MemoryContextStore(int(os.environ.get('CHATBOT_CONTEXT_MAX_CONVERSATIONS', 10000)), ttl, max_history)
@@ -0,0 +1,103 @@
+import os
+import logging
+from typing import List, Optional, Sequence, Tuple
+from .model_store import ModelStore
+
+logger = logging.getLogger(__name__)
+
+# Intents in priority order: when a message hits several, the earliest wins
+INTENT_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ('pricing_inquiry', ['price', 'cost', 'how much', 'pricing', 'quote', 'budget']),
+    ('project_help', ['project', 'develop', 'build', 'create', 'website', 'app']),
+    ('technical_support', ['help', 'support', 'problem', 'issue', 'error', 'technical']),
+    ('marketing_info', ['marketing', 'social media', 'promote', 'advertise']),
+    ('greeting', ['hello', 'hi', 'hey', 'good morning', 'good afternoon'])
+]
+
+DEFAULT_INTENT = 'general_inquiry'
+
+
+class KeywordIntentClassifier:
+    """
+    Keyword intent matching compiled once into a priority-ordered table.
+
+    Keywords of all intents are flattened into one tuple in priority order, so
+    the first keyword found decides the intent and the scan stops there. Each
+    check is CPython's substring search, which skips through the message far
+    faster than a regex alternation steps through it (see
+    benchmarks/bench_intent_classifier.py).
+    """
+
+    def __init__(self, intent_keywords: Sequence[Tuple[str, Sequence[str]]] = INTENT_KEYWORDS,
+                 default: str = DEFAULT_INTENT):
+        self.default = default
+        self._table = tuple(
+            (keyword.lower(), intent)
+            for intent, keywords in intent_keywords
+            for keyword in keywords
+        )
+
+    def classify(self, message: str) -> str:
+        text = message.lower()
+        for keyword, intent in self._table:
+            if keyword in text:
+                return intent
+        return self.default
+
+
+class ModelIntentClassifier:
+    """
+    TF-IDF + linear model intent classifier trained offline.
+
+    Predictions below min_confidence fall back to the keyword classifier, so
+    the model only overrides keywords where it is reasonably sure.
+    """
+
+    def __init__(self, pipeline, fallback: Optional[KeywordIntentClassifier] = None, min_confidence: float = 0.5):
+        self.pipeline = pipeline
+        self.fallback = fallback or KeywordIntentClassifier()
+        self.min_confidence = min_confidence
+
+    def classify(self, message: str) -> str:
+        probabilities = self.pipeline.predict_proba([message])[0]
+        best = probabilities.argmax()
+        if probabilities[best] < self.min_confidence:
+            return self.fallback.classify(message)
+        return str(self.pipeline.classes_[best])
+
+
+def train_intent_model(messages: Sequence[str], intents: Sequence[str]):
+    """Fit the TF-IDF + logistic regression pipeline used by ModelIntentClassifier"""
+    from sklearn.pipeline import make_pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    pipeline = make_pipeline(
+        TfidfVectorizer(lowercase=True, ngram_range=(1, 2), sublinear_tf=True),
+        LogisticRegression(max_iter=1000)
+    )
+    pipeline.fit(list(messages), list(intents))
+    return pipeline
+
+
+def intent_classifier_from_env():
+    """Build the classifier selected by CHATBOT_INTENT_MODE ('keywords' or 'model')"""
+    keywords = KeywordIntentClassifier()
+    if os.environ.get('CHATBOT_INTENT_MODE', 'keywords') != 'model':
+        return keywords
+
+    try:
+        pipeline = ModelStore().load('intent', mmap_mode=None)
+    except Exception as e:
+        logger.warning(f"Failed to load intent model: {e}")
+        pipeline = None
+
+    if pipeline is None:
+        logger.warning("No intent model in the model store, using keyword classifier")
+        return keywords
+
+    return ModelIntentClassifier(
+        pipeline,
+        keywords,
+        float(os.environ.get('CHATBOT_INTENT_MIN_CONFIDENCE', 0.5))
+    )
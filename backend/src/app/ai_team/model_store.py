@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from typing import Dict, Any, Optional
+import numpy as np
+import joblib
+
+logger = logging.getLogger(__name__)
+
+# Node arrays written next to each forest artifact, one .npy file per array
+FOREST_ARRAYS = ('tree_offsets', 'feature', 'threshold', 'children_left', 'children_right', 'value')
+
+
+class ModelStore:
+    """
+    Content-hashed, versioned model artifacts.
+
+    Layout under the store root:
+        <name>/manifest.json            current version and history
+        <name>/<version>/model.joblib   uncompressed joblib dump of the estimator
+        <name>/<version>/<array>.npy    flattened forest node arrays (tree ensembles only)
+
+    Artifacts are uncompressed so joblib and numpy can memory-map them read-only;
+    every worker loading the same version shares those pages through the OS page cache.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or os.environ.get('MODEL_STORE_DIR', 'models'))
+        self.metrics: Dict[str, Any] = {}
+
+    def save(self, name: str, model) -> str:
+        """Write a new artifact version and make it current"""
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=os.path.join(self.root, name))
+        # mkdtemp is owner-only; artifacts are read by every worker
+        os.chmod(staging, 0o755)
+
+        try:
+            joblib.dump(model, os.path.join(staging, 'model.joblib'))
+            arrays = flatten_forest(model)
+            if arrays is not None:
+                for array_name in FOREST_ARRAYS:
+                    np.save(os.path.join(staging, f'{array_name}.npy'), arrays[array_name])
+
+            version = self._hash_directory(staging)
+            version_dir = os.path.join(self.root, name, version)
+            if os.path.exists(version_dir):
+                # Identical content was already stored, e.g. by another worker
+                shutil.rmtree(staging)
+            else:
+                os.replace(staging, version_dir)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        manifest = self._read_manifest(name)
+        manifest['current'] = version
+        manifest.setdefault('versions', {})[version] = {
+            'created_at': datetime.utcnow().isoformat(),
+            'model_class': type(model).__name__,
+            'has_forest_arrays': arrays is not None
+        }
+        self._write_manifest(name, manifest)
+
+        logger.info(f"Stored model '{name}' version {version}")
+        return version
+
+    def load(self, name: str, version: Optional[str] = None, mmap_mode: Optional[str] = 'r'):
+        """Load an estimator version (current by default), or None if nothing is stored"""
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+
+        path = os.path.join(self.root, name, version, 'model.joblib')
+        rss_before = _resident_bytes()
+        started = time.perf_counter()
+
+        model = joblib.load(path, mmap_mode=mmap_mode)
+
+        rss_after = _resident_bytes()
+        self.metrics[name] = {
+            'version': version,
+            'load_seconds': round(time.perf_counter() - started, 4),
+            'artifact_bytes': self._directory_size(os.path.dirname(path)),
+            'resident_bytes_delta': rss_after - rss_before if rss_before is not None else None,
+            'mmap_mode': mmap_mode
+        }
+        logger.info(f"Loaded model '{name}' version {version} in {self.metrics[name]['load_seconds']}s")
+        return model
+
+    def load_forest_arrays(self, name: str, version: Optional[str] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-map the flattened node arrays of a stored forest"""
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+
+        version_dir = os.path.join(self.root, name, version)
+        if not os.path.exists(os.path.join(version_dir, 'tree_offsets.npy')):
+            return None
+
+        arrays = {
+            array_name: np.load(os.path.join(version_dir, f'{array_name}.npy'), mmap_mode='r')
+            for array_name in FOREST_ARRAYS
+        }
+        self.metrics.setdefault(name, {})['mapped_bytes'] = sum(a.nbytes for a in arrays.values())
+        return arrays
+
+    def current_version(self, name: str) -> Optional[str]:
+        """Version currently pointed to by the manifest"""
+        return self._read_manifest(name).get('current')
+
+    def versions(self, name: str) -> Dict[str, Any]:
+        """All stored versions with their metadata"""
+        return self._read_manifest(name).get('versions', {})
+
+    def _read_manifest(self, name: str) -> Dict[str, Any]:
+        path = os.path.join(self.root, name, 'manifest.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, name: str, manifest: Dict[str, Any]):
+        path = os.path.join(self.root, name, 'manifest.json')
+        fd, tmp_path = tempfile.mkstemp(prefix='.manifest-', dir=os.path.dirname(path))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    def _hash_directory(self, path: str) -> str:
+        digest = hashlib.sha256()
+        for filename in sorted(os.listdir(path)):
+            digest.update(filename.encode())
+            with open(os.path.join(path, filename), 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()[:16]
+
+    def _directory_size(self, path: str) -> int:
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def flatten_forest(model) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Concatenate the node arrays of a fitted tree ensemble.
+
+    Child indexes stay local to their tree; tree_offsets[i] is the position of
+    tree i's root in the concatenated arrays. Returns None for other estimators.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if not estimators or not hasattr(estimators[0], 'tree_'):
+        return None
+
+    trees = [estimator.tree_ for estimator in estimators]
+    offsets = np.zeros(len(trees) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([tree.node_count for tree in trees])
+
+    return {
+        'tree_offsets': offsets,
+        'feature': np.concatenate([tree.feature for tree in trees]).astype(np.int64),
+        'threshold': np.concatenate([tree.threshold for tree in trees]),
+        'children_left': np.concatenate([tree.children_left for tree in trees]).astype(np.int64),
+        'children_right': np.concatenate([tree.children_right for tree in trees]).astype(np.int64),
+        'value': np.concatenate([tree.value[:, 0, 0] for tree in trees])
+    }
+
+
+def _resident_bytes() -> Optional[int]:
+    """Current resident set size of this process, where /proc is available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,140 @@
+import os
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Callable, Optional, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping with a fixed number of entries"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Analyzer:
+    __slots__ = ('name', 'fn', 'timeout', 'cache_key', 'cache', 'fallback')
+
+    def __init__(self, name, fn, timeout, cache_key, cache, fallback):
+        self.name = name
+        self.fn = fn
+        self.timeout = timeout
+        self.cache_key = cache_key
+        self.cache = cache
+        self.fallback = fallback
+
+
+class AnalyzerOrchestrator:
+    """
+    Run the AI team's analyzers for one project concurrently.
+
+    Analyzers share one thread pool, so a request takes as long as its slowest
+    analyzer instead of the sum of all of them. Each analyzer has its own
+    timeout; on timeout or error its fallback (if any) is used instead. Analyzers
+    registered with a cache_key are treated as pure functions of that key and
+    memoized in a bounded LRU; callers always get their own copy of a cached result.
+    """
+
+    def __init__(self, max_workers: int = 8, default_timeout: float = 5.0):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._analyzers: Dict[str, _Analyzer] = {}
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def register(self, name: str, fn: Callable[[Dict[str, Any]], Any], timeout: Optional[float] = None,
+                 cache_key: Optional[Callable[[Dict[str, Any]], Hashable]] = None, cache_size: int = 256,
+                 fallback: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """Add an analyzer called as fn(project_data)"""
+        self._analyzers[name] = _Analyzer(
+            name,
+            fn,
+            timeout if timeout is not None else self.default_timeout,
+            cache_key,
+            LRUCache(cache_size) if cache_key else None,
+            fallback
+        )
+
+    def run(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Results of every registered analyzer, keyed by name"""
+        results = {}
+        pending = {}
+
+        for analyzer in self._analyzers.values():
+            if analyzer.cache is not None:
+                key = analyzer.cache_key(project_data)
+                cached = analyzer.cache.get(key, _MISSING)
+                if cached is not _MISSING:
+                    results[analyzer.name] = copy.deepcopy(cached)
+                    continue
+            pending[analyzer.name] = self._get_executor().submit(analyzer.fn, project_data)
+
+        started = time.monotonic()
+        for name, future in pending.items():
+            analyzer = self._analyzers[name]
+            # Analyzers run concurrently, so each deadline counts from the common start
+            remaining = max(0.0, analyzer.timeout - (time.monotonic() - started))
+            try:
+                result = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                logger.warning(f"Analyzer '{name}' timed out after {analyzer.timeout}s")
+                results[name] = analyzer.fallback(project_data) if analyzer.fallback else None
+                continue
+            except Exception as e:
+                logger.error(f"Analyzer '{name}' failed: {e}")
+                results[name] = analyzer.fallback(project_data) if analyzer.fallback else None
+                continue
+
+            if analyzer.cache is not None:
+                analyzer.cache.put(analyzer.cache_key(project_data), copy.deepcopy(result))
+            results[name] = result
+
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counts per memoized analyzer"""
+        return {
+            analyzer.name: {'hits': analyzer.cache.hits, 'misses': analyzer.cache.misses, 'size': len(analyzer.cache)}
+            for analyzer in self._analyzers.values()
+            if analyzer.cache is not None
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use in each process: pool threads do not survive fork
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='ai-team')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+
+_MISSING = object()
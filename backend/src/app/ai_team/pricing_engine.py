@@ -1,18 +1,31 @@
 import os
+import time
 import logging
-from typing import Dict, Any
-import pandas as pd
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 import joblib
-import openai
+from .model_store import ModelStore
+from .compiled_forest import CompiledForest
+from ..services.http_clients import get_openai_client
 
 logger = logging.getLogger(__name__)
 
 class PricingEngine:
     def __init__(self):
         self.model = None
-        self.openai_client = openai.OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+        self.model_version = None
+        self.model_store = ModelStore()
+        # Seconds between checks for a retrained model version (see refresh_model)
+        self.refresh_interval = float(os.environ.get('PRICING_MODEL_REFRESH_SECONDS', 30))
+        self._last_refresh_check = time.monotonic()
+        self._refresh_lock = threading.Lock()
+        # 'sklearn' or 'compiled' (flat array forest evaluator for single-row quotes)
+        self.inference_mode = os.environ.get('PRICING_INFERENCE_MODE', 'sklearn')
+        # Synthetic training set size and seed; a fixed seed makes retrains reproducible
+        self.training_samples = int(os.environ.get('PRICING_TRAINING_SAMPLES', 1000))
+        self.training_seed = int(os.environ.get('PRICING_TRAINING_SEED', 42))
         
         # Affordable base prices for South African market (reduced by 60-70%)
         self.affordable_base_prices = {
@@ -24,88 +37,212 @@ class PricingEngine:
             'other': 35000       # Reduced from 119,000
         }
         
+        # More conservative multipliers for affordability
+        self.complexity_multipliers = {'simple': 0.5, 'medium': 1.0, 'complex': 1.3, 'very-complex': 1.8}
+        self.timeline_multipliers = {'flexible': 0.8, 'standard': 1.0, 'urgent': 1.2, 'asap': 1.5}
+        self.team_multipliers = {'solo': 0.6, 'small': 1.0, 'medium': 1.2, 'large': 1.5}
+        
+        # Share of the total allocated to each phase, per complexity bucket
+        self.breakdown_shares = {
+            'simple': (
+                ('development', 0.70),
+                ('project_management', 0.15),
+                ('quality_assurance', 0.10),
+                ('deployment', 0.05)
+            ),
+            'medium': (
+                ('development', 0.60),
+                ('project_management', 0.15),
+                ('quality_assurance', 0.12),
+                ('deployment', 0.08),
+                ('support', 0.05)
+            ),
+            'complex': (
+                ('requirements_analysis', 0.10),
+                ('development', 0.50),
+                ('project_management', 0.12),
+                ('quality_assurance', 0.10),
+                ('deployment', 0.08),
+                ('documentation', 0.05),
+                ('support', 0.05)
+            )
+        }
+        self._breakdown_cache = {}
+        
+        self._build_price_tables()
         self.load_model()
     
+    def _build_price_tables(self):
+        """Precompute prices for every (type, complexity, timeline, team) combination"""
+        self._type_index = {t: i for i, t in enumerate(self.affordable_base_prices)}
+        self._complexity_index = {c: i for i, c in enumerate(self.complexity_multipliers)}
+        self._timeline_index = {t: i for i, t in enumerate(self.timeline_multipliers)}
+        self._team_index = {t: i for i, t in enumerate(self.team_multipliers)}
+        
+        # Unknown values price like the dict.get defaults used by the calculations
+        self._default_indexes = (
+            self._type_index['other'],
+            self._complexity_index['medium'],
+            self._timeline_index['standard'],
+            self._team_index['small']
+        )
+        
+        # Multiplied in the same order as the scalar calculation so results are identical
+        cube = np.array(list(self.affordable_base_prices.values()), dtype=float)[:, None, None, None]
+        cube = cube * np.array(list(self.complexity_multipliers.values()))[None, :, None, None]
+        cube = cube * np.array(list(self.timeline_multipliers.values()))[None, None, :, None]
+        cube = cube * np.array(list(self.team_multipliers.values()))[None, None, None, :]
+        self._price_cube = cube
+        
+        # Final rounded prices: fallback (no description factor) and the simple path,
+        # which has three description length buckets per combination
+        flat = cube.ravel().tolist()
+        self._fallback_price_table = tuple(round(max(price, 5000) / 500) * 500 for price in flat)
+        self._simple_price_table = tuple(
+            round(max(adjusted, 5000) / 500) * 500
+            for price in flat
+            for adjusted in (price, price * 1.05, price * 1.1)
+        )
+    
+    def _price_index(self, project_data: Dict[str, Any]) -> int:
+        """Flat index of a project's combination in the precomputed price tables"""
+        default_type, default_complexity, default_timeline, default_team = self._default_indexes
+        index = self._type_index.get(project_data.get('project_type', 'other'), default_type)
+        index = index * 4 + self._complexity_index.get(project_data.get('complexity', 'medium'), default_complexity)
+        index = index * 4 + self._timeline_index.get(project_data.get('timeline', 'standard'), default_timeline)
+        return index * 4 + self._team_index.get(project_data.get('team_size', 'small'), default_team)
+    
     def load_model(self):
         """Load or train pricing model with affordable pricing"""
+        self.compiled_forest = None
         try:
-            model_path = 'models/pricing_model.pkl'
-            if os.path.exists(model_path):
-                self.model = joblib.load(model_path)
-                logger.info("Pricing model loaded from file")
+            version = self.model_store.current_version('pricing')
+            if version is not None:
+                logger.info("Pricing model loaded from model store")
             else:
-                self.model = self._train_affordable_model()
-                os.makedirs('models', exist_ok=True)
-                joblib.dump(self.model, model_path)
-                logger.info("Affordable pricing model trained and saved")
+                # Migrate the pre-store pickle once, otherwise train from scratch
+                legacy_path = os.path.join(self.model_store.root, 'pricing_model.pkl')
+                if os.path.exists(legacy_path):
+                    model = joblib.load(legacy_path)
+                    logger.info("Pricing model migrated from legacy pickle")
+                else:
+                    model = self._train_affordable_model()
+                    logger.info("Affordable pricing model trained")
+                
+                version = self.model_store.save('pricing', model)
+            
+            self.model, self.compiled_forest = self._load_version(version)
+            self.model_version = version
         except Exception as e:
             logger.error(f"Error loading pricing model: {e}")
             self.model = self._train_fallback_model()
     
+    def _load_version(self, version: str):
+        """Load a stored model version and, in compiled mode, its flat evaluator"""
+        model = self.model_store.load('pricing', version)
+        compiled_forest = None
+        if self.inference_mode == 'compiled':
+            arrays = self.model_store.load_forest_arrays('pricing', version)
+            if arrays is not None:
+                compiled_forest = CompiledForest(arrays)
+                logger.info("Pricing model compiled to flat forest evaluator")
+        return model, compiled_forest
+    
+    def refresh_model(self) -> bool:
+        """Hot-swap to the model store's current version if it changed since load"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            version = self.model_store.current_version('pricing')
+            if version is None or version == self.model_version:
+                return False
+            
+            # Load fully before swapping; requests keep using the old model meanwhile
+            model, compiled_forest = self._load_version(version)
+            self.compiled_forest = compiled_forest
+            self.model = model
+            self.model_version = version
+            logger.info(f"Pricing model hot-swapped to version {version}")
+            return True
+        except Exception as e:
+            logger.error(f"Pricing model refresh failed: {e}")
+            return False
+        finally:
+            self._refresh_lock.release()
+    
+    def _maybe_refresh_model(self):
+        """Check for a retrained model at most once per refresh interval, off the request thread"""
+        now = time.monotonic()
+        if now - self._last_refresh_check < self.refresh_interval:
+            return
+        self._last_refresh_check = now
+        threading.Thread(target=self.refresh_model, daemon=True).start()
+    
+    @property
+    def openai_client(self):
+        """Shared pooled OpenAI client of this process"""
+        return get_openai_client()
+    
+    @property
+    def model_metrics(self) -> Dict[str, Any]:
+        """Load time and size metrics for the active pricing model"""
+        return self.model_store.metrics.get('pricing', {})
+    
     def _train_affordable_model(self):
         """Train model with affordable South African market data"""
-        sample_data = self._generate_affordable_training_data()
-        df = pd.DataFrame(sample_data)
-        
-        # Feature engineering
-        X = self._engineer_features(df)
-        y = df['price']
+        X, y = self._generate_affordable_training_matrix(self.training_samples, self.training_seed)
         
-        model = RandomForestRegressor(
+        model = self._build_forest()
+        model.fit(X, y)
+        return model
+    
+    def _build_forest(self) -> RandomForestRegressor:
+        """Unfitted forest with the pricing model's hyperparameters"""
+        return RandomForestRegressor(
             n_estimators=100,
             max_depth=15,
             min_samples_split=5,
             min_samples_leaf=2,
             random_state=42
         )
-        model.fit(X, y)
-        return model
     
-    def _generate_affordable_training_data(self):
-        """Generate realistic training data for affordable South African market"""
-        project_types = ['web', 'mobile', 'ai', 'ecommerce', 'enterprise', 'other']
-        complexities = ['simple', 'medium', 'complex', 'very-complex']
-        timelines = ['flexible', 'standard', 'urgent', 'asap']
-        team_sizes = ['solo', 'small', 'medium', 'large']
+    def _generate_affordable_training_matrix(self, n_samples: int = 1000, seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate realistic training data for affordable South African market.
         
-        data = []
+        Columns are drawn whole from a seeded Generator and stacked straight into
+        the model's feature layout (see _extract_features), so the same seed always
+        yields the same matrix and millions of rows take seconds.
+        """
+        rng = np.random.default_rng(seed)
+        n_types, n_complexities, n_timelines, n_teams = self._price_cube.shape
         
-        for _ in range(1000):
-            project_type = np.random.choice(project_types)
-            complexity = np.random.choice(complexities)
-            timeline = np.random.choice(timelines)
-            team_size = np.random.choice(team_sizes)
-            
-            base_price = self.affordable_base_prices[project_type]
-            
-            # More conservative multipliers for affordability
-            complexity_mult = {'simple': 0.5, 'medium': 1.0, 'complex': 1.3, 'very-complex': 1.8}
-            timeline_mult = {'flexible': 0.8, 'standard': 1.0, 'urgent': 1.2, 'asap': 1.5}
-            team_mult = {'solo': 0.6, 'small': 1.0, 'medium': 1.2, 'large': 1.5}
-            
-            price = base_price * complexity_mult[complexity]
-            price *= timeline_mult[timeline] * team_mult[team_size]
-            
-            # Add moderate noise
-            price *= np.random.uniform(0.9, 1.1)
-            
-            # Ensure minimum affordable price
-            price = max(price, 5000)  # Minimum R5,000 for any project
-            
-            data.append({
-                'project_type': project_type,
-                'complexity': complexity,
-                'timeline': timeline,
-                'team_size': team_size,
-                'description_length': np.random.randint(50, 2000),
-                'tech_terms_count': np.random.randint(1, 15),
-                'price': price
-            })
+        type_idx = rng.integers(0, n_types, n_samples)
+        complexity_idx = rng.integers(0, n_complexities, n_samples)
+        timeline_idx = rng.integers(0, n_timelines, n_samples)
+        team_idx = rng.integers(0, n_teams, n_samples)
+        
+        price = self._price_cube[type_idx, complexity_idx, timeline_idx, team_idx]
+        
+        # Add moderate noise
+        price = price * rng.uniform(0.9, 1.1, n_samples)
         
-        return data
+        # Ensure minimum affordable price
+        price = np.maximum(price, 5000)  # Minimum R5,000 for any project
+        
+        X = np.empty((n_samples, 6))
+        X[:, 0] = type_idx
+        X[:, 1] = complexity_idx
+        X[:, 2] = timeline_idx
+        X[:, 3] = team_idx
+        X[:, 4] = rng.integers(50, 2000, n_samples)  # description length
+        X[:, 5] = rng.integers(1, 15, n_samples)     # tech terms count
+        
+        return X, price
     
     def calculate_price(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate affordable project price for South African market"""
+        self._maybe_refresh_model()
         try:
             # For simple projects, use straightforward calculation
             if project_data.get('complexity') in ['simple', 'medium']:
@@ -113,7 +250,10 @@ class PricingEngine:
             
             # For complex projects, use AI model
             features = self._extract_features(project_data)
-            base_prediction = self.model.predict([features])[0]
+            if self.compiled_forest is not None:
+                base_prediction = self.compiled_forest.predict(features)[0]
+            else:
+                base_prediction = self.model.predict([features])[0]
             
             # Apply South Africa market adjustment (more conservative)
             zar_price = base_prediction * 1.1  # Reduced market adjustment
@@ -135,30 +275,79 @@ class PricingEngine:
             logger.error(f"Price calculation error: {e}")
             return self._affordable_fallback_calculation(project_data)
     
-    def _simple_affordable_calculation(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Simple calculation for affordable pricing"""
-        base_price = self.affordable_base_prices.get(
-            project_data.get('project_type', 'other'), 
-            35000
-        )
+    def calculate_price_many(self, projects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Calculate affordable prices for a batch of projects in one model call"""
+        if not projects:
+            return []
+        
+        self._maybe_refresh_model()
+        complexities = [p.get('complexity') for p in projects]
+        is_simple = np.array([c in ['simple', 'medium'] for c in complexities])
+        prices = np.zeros(len(projects))
+        confidence = np.where(is_simple, 0.9, 0.85)
+        
+        # Simple and medium projects use the closed-form calculation
+        simple_idx = np.flatnonzero(is_simple)
+        if simple_idx.size:
+            prices[simple_idx] = self._simple_affordable_prices([projects[i] for i in simple_idx])
+        
+        # Complex projects share a single model call
+        complex_idx = np.flatnonzero(~is_simple)
+        if complex_idx.size:
+            try:
+                X = np.array([self._extract_features(projects[i]) for i in complex_idx], dtype=float)
+                zar_prices = self.model.predict(X) * 1.1
+                prices[complex_idx] = np.round(zar_prices / 500) * 500
+            except Exception as e:
+                logger.error(f"Batch price calculation error: {e}")
+                prices[complex_idx] = self._fallback_prices([projects[i] for i in complex_idx])
+                confidence[complex_idx] = 0.8
+        
+        results = []
+        for project_data, price, score in zip(projects, prices.tolist(), confidence.tolist()):
+            final_price_zar = int(price)
+            results.append({
+                'base_price_usd': round(final_price_zar / 18.5, 2),
+                'final_price_zar': final_price_zar,
+                'confidence_score': score,
+                'price_breakdown': self._generate_affordable_breakdown(project_data, final_price_zar),
+                'currency': 'ZAR',
+                'market': 'South Africa',
+                'affordable_tier': True
+            })
         
-        complexity_mult = {'simple': 0.5, 'medium': 1.0, 'complex': 1.3, 'very-complex': 1.8}
-        timeline_mult = {'flexible': 0.8, 'standard': 1.0, 'urgent': 1.2, 'asap': 1.5}
-        team_mult = {'solo': 0.6, 'small': 1.0, 'medium': 1.2, 'large': 1.5}
+        return results
+    
+    def _multiplier_columns(self, projects: List[Dict[str, Any]]) -> np.ndarray:
+        """Base price times complexity, timeline and team multipliers for each project"""
+        indexes = np.array([self._price_index(p) for p in projects], dtype=np.intp)
+        return self._price_cube.ravel()[indexes]
+    
+    def _simple_affordable_prices(self, projects: List[Dict[str, Any]]) -> np.ndarray:
+        """Vectorized equivalent of _simple_affordable_calculation pricing"""
+        price = self._multiplier_columns(projects)
         
-        price = base_price
-        price *= complexity_mult.get(project_data.get('complexity', 'medium'), 1.0)
-        price *= timeline_mult.get(project_data.get('timeline', 'standard'), 1.0)
-        price *= team_mult.get(project_data.get('team_size', 'small'), 1.0)
+        desc_length = np.array([len(p.get('description', '')) for p in projects])
+        price = np.where(desc_length > 1000, price * 1.1, np.where(desc_length > 500, price * 1.05, price))
         
+        price = np.maximum(price, 5000)
+        return np.round(price / 500) * 500
+    
+    def _fallback_prices(self, projects: List[Dict[str, Any]]) -> np.ndarray:
+        """Vectorized equivalent of _affordable_fallback_calculation pricing"""
+        price = np.maximum(self._multiplier_columns(projects), 5000)
+        return np.round(price / 500) * 500
+    
+    def _simple_affordable_calculation(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Simple calculation for affordable pricing"""
         # Apply description length factor (moderate)
         desc_length = len(project_data.get('description', ''))
-        if desc_length > 1000: price *= 1.1
-        elif desc_length > 500: price *= 1.05
+        if desc_length > 1000: desc_bucket = 2
+        elif desc_length > 500: desc_bucket = 1
+        else: desc_bucket = 0
         
-        # Ensure minimum and round
-        price = max(price, 5000)
-        final_price_zar = round(price / 500) * 500
+        # Minimum and rounding are already applied in the lookup table
+        final_price_zar = self._simple_price_table[self._price_index(project_data) * 3 + desc_bucket]
         
         return {
             'base_price_usd': round(final_price_zar / 18.5, 2),
@@ -173,53 +362,23 @@ class PricingEngine:
     def _generate_affordable_breakdown(self, project_data: Dict[str, Any], total_price: float) -> Dict[str, float]:
         """Generate affordable price breakdown"""
         complexity = project_data.get('complexity', 'medium')
+        bucket = complexity if complexity in ('simple', 'medium') else 'complex'
         
-        if complexity == 'simple':
-            breakdown = {
-                'development': total_price * 0.70,
-                'project_management': total_price * 0.15,
-                'quality_assurance': total_price * 0.10,
-                'deployment': total_price * 0.05
-            }
-        elif complexity == 'medium':
-            breakdown = {
-                'development': total_price * 0.60,
-                'project_management': total_price * 0.15,
-                'quality_assurance': total_price * 0.12,
-                'deployment': total_price * 0.08,
-                'support': total_price * 0.05
-            }
-        else:
-            breakdown = {
-                'requirements_analysis': total_price * 0.10,
-                'development': total_price * 0.50,
-                'project_management': total_price * 0.12,
-                'quality_assurance': total_price * 0.10,
-                'deployment': total_price * 0.08,
-                'documentation': total_price * 0.05,
-                'support': total_price * 0.05
-            }
+        key = (bucket, total_price)
+        items = self._breakdown_cache.get(key)
+        if items is None:
+            items = tuple((phase, total_price * share) for phase, share in self.breakdown_shares[bucket])
+            # Prices are rounded to R500 so the key space is small, but keep it bounded
+            if len(self._breakdown_cache) >= 4096:
+                self._breakdown_cache.clear()
+            self._breakdown_cache[key] = items
         
-        return breakdown
+        # Callers get their own dict; the cached items are shared
+        return dict(items)
     
     def _affordable_fallback_calculation(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
         """Affordable fallback pricing calculation"""
-        base_price = self.affordable_base_prices.get(
-            project_data.get('project_type', 'other'), 
-            35000
-        )
-        
-        complexity_mult = {'simple': 0.5, 'medium': 1.0, 'complex': 1.3, 'very-complex': 1.8}
-        timeline_mult = {'flexible': 0.8, 'standard': 1.0, 'urgent': 1.2, 'asap': 1.5}
-        team_mult = {'solo': 0.6, 'small': 1.0, 'medium': 1.2, 'large': 1.5}
-        
-        price = base_price
-        price *= complexity_mult.get(project_data.get('complexity', 'medium'), 1.0)
-        price *= timeline_mult.get(project_data.get('timeline', 'standard'), 1.0)
-        price *= team_mult.get(project_data.get('team_size', 'small'), 1.0)
-        
-        price = max(price, 5000)
-        final_price_zar = round(price / 500) * 500
+        final_price_zar = self._fallback_price_table[self._price_index(project_data)]
         
         return {
             'base_price_usd': round(final_price_zar / 18.5, 2),
@@ -234,16 +393,41 @@ class PricingEngine:
     # Keep existing methods but ensure they use affordable pricing
     def _extract_features(self, project_data: Dict[str, Any]) -> list:
         """Extract features for the model (unchanged but uses affordable base)"""
-        # Implementation remains the same
-        pass
+        description = project_data.get('description', '')
+        project_type = project_data.get('project_type', 'other')
+        complexity = project_data.get('complexity', 'medium')
+        timeline = project_data.get('timeline', 'standard')
+        team_size = project_data.get('team_size', 'small')
+        
+        # Map to numerical values
+        type_mapping = {'web': 0, 'mobile': 1, 'ai': 2, 'ecommerce': 3, 'enterprise': 4, 'other': 5}
+        complexity_mapping = {'simple': 0, 'medium': 1, 'complex': 2, 'very-complex': 3}
+        timeline_mapping = {'flexible': 0, 'standard': 1, 'urgent': 2, 'asap': 3}
+        team_mapping = {'solo': 0, 'small': 1, 'medium': 2, 'large': 3}
+        
+        return [
+            type_mapping.get(project_type, 5),
+            complexity_mapping.get(complexity, 1),
+            timeline_mapping.get(timeline, 1),
+            team_mapping.get(team_size, 1),
+            len(description),
+            self._count_tech_terms(description)
+        ]
+    
+    def _count_tech_terms(self, description: str) -> int:
+        """Count technology-related terms in description"""
+        tech_terms = [
+            'api', 'database', 'cloud', 'mobile', 'web', 'ai', 'ml', 'blockchain',
+            'react', 'angular', 'vue', 'node', 'python', 'java', 'docker', 'kubernetes',
+            'aws', 'azure', 'gcp', 'server', 'client', 'frontend', 'backend', 'fullstack'
+        ]
+        description_lower = description.lower()
+        return sum(1 for term in tech_terms if term in description_lower)
     
     def _train_fallback_model(self):
         """Simple fallback model with affordable pricing"""
         from sklearn.linear_model import LinearRegression
-        sample_data = self._generate_affordable_training_data()
-        df = pd.DataFrame(sample_data)
-        X = self._engineer_features(df)
-        y = df['price']
+        X, y = self._generate_affordable_training_matrix(self.training_samples, self.training_seed)
         
         model = LinearRegression()
         model.fit(X, y)
@@ -0,0 +1,185 @@
+import os
+import re
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', message.lower()).split())
+
+
+def _token_vector(normalized: str) -> Counter:
+    return Counter(normalized.split())
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[token] for token, count in a.items() if token in b)
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm
+
+
+class MemoryCacheBackend:
+    """Per-process LRU with TTL"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._recent: Dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def recent(self, intent: str) -> List[str]:
+        with self._lock:
+            return list(self._recent.get(intent, ()))
+
+    def remember(self, intent: str, normalized: str):
+        with self._lock:
+            recent = self._recent.setdefault(intent, OrderedDict())
+            recent[normalized] = None
+            recent.move_to_end(normalized)
+            while len(recent) > self.maxsize:
+                recent.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """Shared across workers; Redis enforces the TTL"""
+
+    def __init__(self, url: str, maxsize: int = 1024, prefix: str = 'chatbot:response'):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.maxsize = maxsize
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(f'{self.prefix}:{key}')
+
+    def set(self, key: str, value: str, ttl: int):
+        self.client.setex(f'{self.prefix}:{key}', ttl, value)
+
+    def recent(self, intent: str) -> List[str]:
+        return self.client.lrange(f'{self.prefix}:recent:{intent}', 0, -1)
+
+    def remember(self, intent: str, normalized: str):
+        key = f'{self.prefix}:recent:{intent}'
+        pipe = self.client.pipeline()
+        pipe.lrem(key, 0, normalized)
+        pipe.lpush(key, normalized)
+        pipe.ltrim(key, 0, self.maxsize - 1)
+        pipe.execute()
+
+
+class ResponseCache:
+    """
+    Cache of LLM replies keyed by intent and normalized message.
+
+    With a similarity_threshold, a miss falls back to the most similar cached
+    message of the same intent (bag-of-words cosine) if it scores at least the
+    threshold. Near-duplicate lookup is off by default because short messages
+    that differ in one word ("how much for an app" / "... a website") can
+    score high while needing different answers.
+    """
+
+    def __init__(self, backend=None, ttl: int = 3600, similarity_threshold: Optional[float] = None):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> 'ResponseCache':
+        """Build the cache configured by CHATBOT_CACHE_* environment variables"""
+        maxsize = int(os.environ.get('CHATBOT_CACHE_SIZE', 1024))
+        backend = None
+        if os.environ.get('CHATBOT_CACHE_BACKEND', 'memory') == 'redis':
+            try:
+                backend = RedisCacheBackend(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'), maxsize)
+            except Exception as e:
+                logger.warning(f"Redis response cache unavailable, using in-memory cache: {e}")
+        threshold = os.environ.get('CHATBOT_CACHE_SIMILARITY')
+        return cls(
+            backend or MemoryCacheBackend(maxsize),
+            ttl=int(os.environ.get('CHATBOT_CACHE_TTL_SECONDS', 3600)),
+            similarity_threshold=float(threshold) if threshold else None
+        )
+
+    def get(self, intent: str, message: str) -> Optional[str]:
+        normalized = normalize_message(message)
+        try:
+            response = self.backend.get(self._key(intent, normalized))
+            if response is not None:
+                self.hits += 1
+                return response
+
+            if self.similarity_threshold is not None:
+                response = self._nearest(intent, normalized)
+                if response is not None:
+                    self.near_hits += 1
+                    return response
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+
+        self.misses += 1
+        return None
+
+    def set(self, intent: str, message: str, response: str):
+        normalized = normalize_message(message)
+        try:
+            self.backend.set(self._key(intent, normalized), response, self.ttl)
+            if self.similarity_threshold is not None:
+                self.backend.remember(intent, normalized)
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _nearest(self, intent: str, normalized: str) -> Optional[str]:
+        vector = _token_vector(normalized)
+        best_score, best_message = 0.0, None
+        for candidate in self.backend.recent(intent):
+            score = _cosine(vector, _token_vector(candidate))
+            if score > best_score:
+                best_score, best_message = score, candidate
+        if best_message is None or best_score < self.similarity_threshold:
+            return None
+        # May be None if the entry expired since it was remembered
+        return self.backend.get(self._key(intent, best_message))
+
+    def _key(self, intent: str, normalized: str) -> str:
+        return f"{intent}:{hashlib.sha1(normalized.encode()).hexdigest()}"
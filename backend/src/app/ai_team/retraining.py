@@ -0,0 +1,122 @@
+import logging
+from typing import Dict, Any, Iterator, Optional, Tuple
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from ..models import Project
+
+logger = logging.getLogger(__name__)
+
+# Priced by PricingEngine's rule-based path, never by the model
+RULE_PRICED_COMPLEXITIES = ('simple', 'medium')
+
+
+class PricingModelRetrainer:
+    """
+    Retrain the pricing model from real Project rows, off the request path.
+
+    Only projects the model prices (complex and very-complex) are used. Rows are
+    streamed from the database in chunks over a server-side cursor, turned into
+    feature blocks as they arrive and reduced to a uniform reservoir sample of
+    at most max_rows, so memory stays bounded however large the table grows.
+    Random forests are warm-started: new trees are fitted on the
+    real data and appended to the current forest until max_trees is reached,
+    after which the forest is refitted from scratch on real plus synthetic data.
+    The result is written to the model store, where running workers pick it up
+    through PricingEngine.refresh_model.
+    """
+
+    def __init__(self, engine, chunk_size: int = 5000, min_rows: int = 200,
+                 warm_start_trees: int = 20, max_trees: int = 300, max_rows: int = 50000,
+                 seed: Optional[int] = None):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.min_rows = min_rows
+        self.warm_start_trees = warm_start_trees
+        self.max_trees = max_trees
+        self.max_rows = max_rows
+        self.seed = seed
+
+    def iter_feature_chunks(self, session) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield (X, y) blocks for every model-priced project, chunk_size rows at a time"""
+        query = session.query(
+            Project.description,
+            Project.project_type,
+            Project.complexity,
+            Project.timeline,
+            Project.team_size,
+            Project.estimated_price_zar
+        ).filter(
+            Project.complexity.notin_(RULE_PRICED_COMPLEXITIES)
+        ).execution_options(stream_results=True, yield_per=self.chunk_size)
+
+        rows = []
+        for row in query:
+            rows.append(row)
+            if len(rows) == self.chunk_size:
+                yield self._features(rows)
+                rows = []
+        if rows:
+            yield self._features(rows)
+
+    def _features(self, rows) -> Tuple[np.ndarray, np.ndarray]:
+        X = np.array([
+            self.engine._extract_features({
+                'description': row.description or '',
+                'project_type': row.project_type,
+                'complexity': row.complexity,
+                'timeline': row.timeline,
+                'team_size': row.team_size
+            })
+            for row in rows
+        ], dtype=float)
+        # Model quotes include the 1.1 market adjustment applied after predict
+        y = np.array([row.estimated_price_zar for row in rows], dtype=float) / 1.1
+        return X, y
+
+    def retrain(self, session) -> Optional[Dict[str, Any]]:
+        """Fit and store a new model version; returns a summary, or None if skipped"""
+        X_real, y_real, n_rows = self.sample(self.iter_feature_chunks(session))
+        if n_rows < self.min_rows:
+            logger.info(f"Pricing retrain skipped: {n_rows} real projects, need {self.min_rows}")
+            return None
+
+        current = self.engine.model_store.load('pricing', mmap_mode=None)
+        if isinstance(current, RandomForestRegressor) and current.n_estimators + self.warm_start_trees <= self.max_trees:
+            model = current
+            model.set_params(warm_start=True, n_estimators=current.n_estimators + self.warm_start_trees)
+            model.fit(X_real, y_real)
+            mode = 'warm_start'
+        else:
+            # Keep the synthetic prior so categories missing from real data still price sensibly
+            X_synthetic, y_synthetic = self.engine._generate_affordable_training_matrix(
+                self.engine.training_samples, self.engine.training_seed
+            )
+            model = self.engine._build_forest()
+            model.fit(np.vstack([X_synthetic, X_real]), np.concatenate([y_synthetic, y_real]))
+            mode = 'full'
+
+        version = self.engine.model_store.save('pricing', model)
+        logger.info(f"Pricing model retrained ({mode}) on {len(y_real)} of {n_rows} projects as version {version}")
+        return {'version': version, 'mode': mode, 'rows': n_rows, 'sampled': len(y_real), 'n_estimators': model.n_estimators}
+
+    def sample(self, chunks: Iterator[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Uniform sample of at most max_rows from the chunks (reservoir sampling), plus the rows seen"""
+        rng = np.random.default_rng(self.seed)
+        X_sample, y_sample = None, None
+        seen = 0
+        for X, y in chunks:
+            if X_sample is None:
+                X_sample = np.empty((self.max_rows, X.shape[1]))
+                y_sample = np.empty(self.max_rows)
+            positions = seen + np.arange(len(y))
+            # Row number i replaces a random slot with probability max_rows / (i + 1)
+            slots = np.where(positions < self.max_rows, positions, rng.integers(0, positions + 1))
+            keep = slots < self.max_rows
+            X_sample[slots[keep]] = X[keep]
+            y_sample[slots[keep]] = y[keep]
+            seen += len(y)
+
+        if X_sample is None:
+            return np.empty((0, 0)), np.empty(0), 0
+        filled = min(seen, self.max_rows)
+        return X_sample[:filled], y_sample[:filled], seen
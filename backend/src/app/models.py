@@ -1,11 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
+from .services.passwords import password_hasher
+from .services.identity_cache import register_invalidation
+from .services.recommendations import InternedPayload
 from datetime import datetime, timedelta
 import uuid
 import json
 
 db = SQLAlchemy()
-bcrypt = Bcrypt()
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -29,16 +30,21 @@ class User(db.Model):
     account_locked_until = db.Column(db.DateTime)
     
     # Relationships
-    projects = db.relationship('Project', backref='user', lazy=True, cascade='all, delete-orphan')
+    # A query, not a list: page through it (routes/projects.py) instead of loading every project
+    projects = db.relationship('Project', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     payments = db.relationship('Payment', backref='user', lazy=True)
     marketing_campaigns = db.relationship('MarketingCampaign', backref='user', lazy=True)
     chat_sessions = db.relationship('ChatSession', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.verify(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """Whether the stored hash predates the current bcrypt cost setting"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def increment_failed_login(self):
         self.failed_login_attempts += 1
@@ -67,11 +73,21 @@ class User(db.Model):
             'mfa_enabled': self.mfa_enabled
         }
 
+register_invalidation(User)
+
+class RecommendationBlob(db.Model):
+    __tablename__ = 'recommendation_blobs'
+    
+    # sha256 of the payload's canonical JSON, see services/recommendations.py
+    hash = db.Column(db.String(64), primary_key=True)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Project(db.Model):
     __tablename__ = 'projects'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     project_type = db.Column(db.String(50), nullable=False)
@@ -81,15 +97,27 @@ class Project(db.Model):
     
     # AI Analysis Results
     estimated_price_zar = db.Column(db.Float, nullable=False)
-    technical_recommendations = db.Column(db.JSON)
-    marketing_recommendations = db.Column(db.JSON)
-    security_assessment = db.Column(db.JSON)
+    # The same few hundred payloads recur across projects, so each is stored
+    # once in recommendation_blobs; read and assign them as plain JSON
+    technical_recommendations_hash = db.Column(db.String(64), db.ForeignKey('recommendation_blobs.hash'))
+    marketing_recommendations_hash = db.Column(db.String(64), db.ForeignKey('recommendation_blobs.hash'))
+    security_assessment_hash = db.Column(db.String(64), db.ForeignKey('recommendation_blobs.hash'))
+    technical_recommendations = InternedPayload('technical_recommendations_hash')
+    marketing_recommendations = InternedPayload('marketing_recommendations_hash')
+    security_assessment = InternedPayload('security_assessment_hash')
     ai_confidence_score = db.Column(db.Float, default=0.0)
     
     status = db.Column(db.String(20), default='draft')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Kept in step with migrations/versions; the (user_id, created_at) index
+    # also serves lookups by user_id alone
+    __table_args__ = (
+        db.Index('ix_projects_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_projects_status_created_at', 'status', 'created_at'),
+    )
+    
     # Relationships
     payments = db.relationship('Payment', backref='project', lazy=True)
     marketing_campaigns = db.relationship('MarketingCampaign', backref='project', lazy=True)
@@ -162,11 +190,21 @@ class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), index=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
     action = db.Column(db.String(100), nullable=False)
     resource_type = db.Column(db.String(50))
     resource_id = db.Column(db.String(36))
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.Text)
     details = db.Column(db.JSON)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Partition key on Postgres (migration 0002); archived by month, see services/audit_partitions.py
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Kept in step with migrations/versions: a user's history, one resource's
+    # history, events of one kind and plain time-range scans, all newest first
+    __table_args__ = (
+        db.Index('ix_audit_logs_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_audit_logs_resource_created_at', 'resource_type', 'resource_id', 'created_at'),
+        db.Index('ix_audit_logs_action_created_at', 'action', 'created_at'),
+        db.Index('ix_audit_logs_created_at', 'created_at'),
+    )
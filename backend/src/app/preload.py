@@ -0,0 +1,43 @@
+import gc
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+# Re-initialisers for state that must not be shared across fork (HTTP
+# connection pools, DB connections). Registered at import time by the modules
+# that own that state, run once in each worker after gunicorn forks it.
+_post_fork_hooks: List[Callable[[], None]] = []
+
+
+def register_post_fork(hook: Callable[[], None]) -> Callable[[], None]:
+    """Register a callable to run in every worker right after fork"""
+    _post_fork_hooks.append(hook)
+    return hook
+
+
+def preload_app(app):
+    """
+    Finish start-up work in the gunicorn master before workers fork.
+
+    By the time this runs the blueprints have imported the AI team, so the
+    pricing model is loaded (or trained and stored) exactly once. Freezing the
+    GC afterwards moves those objects out of the collector's generations, so
+    collections in the workers don't write to their headers and copy-on-write
+    keeps the pages shared.
+    """
+    if not app.config.get('PRELOAD_AI_TEAM'):
+        return
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"AI team preloaded; {gc.get_freeze_count()} objects frozen for copy-on-write sharing")
+
+
+def reinit_after_fork():
+    """Rebuild fork-unsafe clients in a freshly forked worker"""
+    for hook in _post_fork_hooks:
+        try:
+            hook()
+        except Exception as e:
+            logger.error(f"Post-fork hook {getattr(hook, '__qualname__', hook)} failed: {e}")
@@ -0,0 +1,51 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import db, AuditLog
+from ..services.listing import ListingError, keyset_page, parse_fields, parse_limit, stream_listing
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+audit_bp = Blueprint('audit', __name__)
+
+AUDIT_FIELDS = ['id', 'action', 'resource_type', 'resource_id', 'ip_address', 'user_agent', 'details', 'created_at']
+
+# details can carry whole WhatsApp messages; only fetched when asked for
+AUDIT_LIST_FIELDS = ['id', 'action', 'resource_type', 'resource_id', 'ip_address', 'created_at']
+
+@audit_bp.route('', methods=['GET'])
+@jwt_required()
+def list_audit_events():
+    """
+    The current user's audit trail, newest first.
+    
+    Query parameters: limit, cursor, fields, action, resource_type,
+    resource_id, and since/until (ISO timestamps). A since bound lets
+    Postgres skip partitions older than it.
+    """
+    try:
+        user_id = get_jwt_identity()
+        fields = parse_fields(request.args.get('fields'), AUDIT_FIELDS, AUDIT_LIST_FIELDS)
+        limit = parse_limit(request.args.get('limit'))
+        
+        filters = [AuditLog.user_id == user_id]
+        for field in ('action', 'resource_type', 'resource_id'):
+            if request.args.get(field):
+                filters.append(getattr(AuditLog, field) == request.args[field])
+        try:
+            if request.args.get('since'):
+                filters.append(AuditLog.created_at >= datetime.fromisoformat(request.args['since']))
+            if request.args.get('until'):
+                filters.append(AuditLog.created_at < datetime.fromisoformat(request.args['until']))
+        except ValueError:
+            return jsonify({'error': 'since and until must be ISO timestamps'}), 400
+        
+        rows = keyset_page(db.session, AuditLog, filters, fields, request.args.get('cursor'), limit)
+        return stream_listing(rows, limit)
+        
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Audit listing error: {e}")
+        return jsonify({'error': 'Failed to list audit events'}), 500
@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from ..models import db, User, AuditLog
+from ..models import db, User
+from ..services.audit import audit_log_writer
+from ..services.identity_cache import identity_cache
+from ..services.passwords import PasswordHasherBusy
+from ..services.rate_limit import rate_limit, rate_limiter, client_ip
 from datetime import datetime
 import re
 
@@ -8,17 +12,21 @@ auth_bp = Blueprint('auth', __name__)
 
 def log_audit_event(user_id, action, resource_type=None, resource_id=None, details=None):
     """Log security events for audit trail"""
-    audit_log = AuditLog(
+    audit_log_writer.log(
         user_id=user_id,
         action=action,
         resource_type=resource_type,
         resource_id=resource_id,
         ip_address=request.remote_addr,
         user_agent=request.headers.get('User-Agent'),
-        details=details or {}
+        details=details
     )
-    db.session.add(audit_log)
-    db.session.commit()
+
+def hashing_busy_response():
+    """429 telling the client to retry once the password hashing pool drains"""
+    response = jsonify({'error': 'Too many requests, please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 429
 
 def validate_email(email):
     """Validate email format"""
@@ -86,11 +94,15 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return hashing_busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Registration failed'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('login_ip', client_ip)
 def login():
     try:
         data = request.get_json()
@@ -98,16 +110,34 @@ def login():
         if not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email and password are required'}), 400
         
+        # Failed attempts are counted in the rate limiter, so a locked account
+        # is turned away before bcrypt. Only a shared (redis) limiter sees every
+        # worker's failures; with per-process buckets the lockout is kept in
+        # the user row, which all workers share and restarts do not clear.
+        failure_key = data['email'].lower()
+        if rate_limiter.exhausted('login_failures', failure_key):
+            return jsonify({'error': 'Account temporarily locked due to multiple failed attempts'}), 423
+        
         user = User.query.filter_by(email=data['email']).first()
         
+        if user and not rate_limiter.shared and user.is_account_locked():
+            return jsonify({'error': 'Account temporarily locked due to multiple failed attempts'}), 423
+        
         if not user or not user.check_password(data['password']):
             # Log failed login attempt
             if user:
-                user.increment_failed_login()
-                db.session.commit()
+                rate_limiter.hit('login_failures', failure_key)
+                if rate_limiter.shared:
+                    failed_attempts = rate_limiter.used('login_failures', failure_key)
+                    if rate_limiter.exhausted('login_failures', failure_key):
+                        identity_cache.invalidate(user.id)
+                else:
+                    user.increment_failed_login()
+                    db.session.commit()
+                    failed_attempts = user.failed_login_attempts
                 log_audit_event(user.id, 'LOGIN_FAILED', 'USER', user.id, {
                     'reason': 'Invalid credentials',
-                    'failed_attempts': user.failed_login_attempts
+                    'failed_attempts': failed_attempts
                 })
             
             return jsonify({'error': 'Invalid credentials'}), 401
@@ -117,8 +147,13 @@ def login():
             return jsonify({'error': 'Account temporarily locked due to multiple failed attempts'}), 423
         
         # Reset failed login attempts
+        rate_limiter.reset('login_failures', failure_key)
         user.reset_login_attempts()
         user.last_login = datetime.utcnow()
+        
+        # Upgrade the stored hash while the plaintext is at hand if the cost policy changed
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
         db.session.commit()
         
         # Log successful login
@@ -133,6 +168,9 @@ def login():
             'user': user.to_dict()
         })
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return hashing_busy_response()
     except Exception as e:
         return jsonify({'error': 'Login failed'}), 500
 
@@ -141,12 +179,13 @@ def login():
 def get_current_user():
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Served from the identity cache; the DB is only read on a miss
+        payload = identity_cache.user_payload(user_id)
         
-        if not user:
+        if payload is None:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({'user': user.to_dict()})
+        return current_app.response_class(f'{{"user": {payload}}}\n', mimetype='application/json')
         
     except Exception as e:
         return jsonify({'error': 'Failed to get user data'}), 500
@@ -179,6 +218,9 @@ def change_password():
         
         return jsonify({'message': 'Password changed successfully'})
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return hashing_busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to change password'}), 500
@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, Project, AuditLog
+from ..models import db, Project
 from ..ai_team.pricing_engine import PricingEngine
 from ..ai_team.tech_recommender import TechRecommender
 from ..ai_team.marketing_agent import MarketingAgent
 from ..ai_team.security_auditor import SecurityAuditor
+from ..ai_team.orchestrator import AnalyzerOrchestrator
+from ..services.audit import audit_log_writer
+from ..services.rate_limit import rate_limit, current_user_id
+import os
 import logging
 
 pricing_bp = Blueprint('pricing', __name__)
@@ -16,6 +20,22 @@ tech_recommender = TechRecommender()
 marketing_agent = MarketingAgent()
 security_auditor = SecurityAuditor()
 
+def categorical_key(data):
+    """Inputs the recommenders depend on; the description does not affect them"""
+    return (data['project_type'], data['complexity'], data['timeline'], data['team_size'])
+
+# Run the AI team concurrently; recommenders are memoized on the categorical inputs
+analyzer_timeout = float(os.environ.get('ANALYZER_TIMEOUT_SECONDS', 5))
+ai_team = AnalyzerOrchestrator(max_workers=int(os.environ.get('ANALYZER_POOL_SIZE', 8)))
+ai_team.register('pricing', pricing_engine.calculate_price, timeout=analyzer_timeout,
+                 fallback=pricing_engine._affordable_fallback_calculation)
+ai_team.register('technical', tech_recommender.analyze, timeout=analyzer_timeout, cache_key=categorical_key)
+ai_team.register('marketing', marketing_agent.analyze, timeout=analyzer_timeout, cache_key=categorical_key)
+ai_team.register('security', security_auditor.analyze, timeout=analyzer_timeout, cache_key=categorical_key)
+
+# Upper bound on projects priced per /analyze-batch request
+MAX_BATCH_SIZE = 5000
+
 @pricing_bp.route('/affordable-examples', methods=['GET'])
 def get_affordable_examples():
     """Get examples of affordable project pricing"""
@@ -56,8 +76,49 @@ def get_affordable_examples():
     
     return jsonify({'affordable_examples': examples})
 
+@pricing_bp.route('/model-info', methods=['GET'])
+@jwt_required()
+def get_model_info():
+    """Version, load time and memory metrics of the active pricing model"""
+    return jsonify({'model': pricing_engine.model_metrics})
+
+@pricing_bp.route('/analyze-batch', methods=['POST'])
+@jwt_required()
+def analyze_project_batch():
+    """Price a batch of projects (e.g. imported agency leads) in one pass"""
+    try:
+        data = request.get_json() or {}
+        projects = data.get('projects')
+        
+        if not isinstance(projects, list) or not projects:
+            return jsonify({'error': 'projects must be a non-empty list'}), 400
+        if len(projects) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'A batch may contain at most {MAX_BATCH_SIZE} projects'}), 400
+        
+        # Validate required fields
+        required_fields = ['description', 'project_type', 'complexity', 'timeline', 'team_size']
+        for index, project in enumerate(projects):
+            if not isinstance(project, dict):
+                return jsonify({'error': f'projects[{index}] must be an object'}), 400
+            for field in required_fields:
+                if not project.get(field):
+                    return jsonify({'error': f'projects[{index}].{field} is required'}), 400
+        
+        pricing_results = pricing_engine.calculate_price_many(projects)
+        
+        return jsonify({
+            'count': len(pricing_results),
+            'pricing': pricing_results,
+            'affordable_tier': True
+        })
+        
+    except Exception as e:
+        logger.error(f"Batch pricing analysis error: {e}")
+        return jsonify({'error': 'Batch analysis failed'}), 500
+
 @pricing_bp.route('/analyze', methods=['POST'])
 @jwt_required()
+@rate_limit('analyze_user', current_user_id)
 def analyze_project():
     """Analyze project with affordable pricing"""
     try:
@@ -71,10 +132,11 @@ def analyze_project():
                 return jsonify({'error': f'{field} is required'}), 400
         
         # Use AI team to analyze project with affordable pricing
-        pricing_result = pricing_engine.calculate_price(data)
-        tech_recommendations = tech_recommender.analyze(data)
-        marketing_recommendations = marketing_agent.analyze(data)
-        security_assessment = security_auditor.analyze(data)
+        analysis = ai_team.run(data)
+        pricing_result = analysis['pricing']
+        tech_recommendations = analysis['technical']
+        marketing_recommendations = analysis['marketing']
+        security_assessment = analysis['security']
         
         # Add affordable pricing message
         pricing_result['affordable_message'] = (
@@ -102,7 +164,7 @@ def analyze_project():
         db.session.commit()
         
         # Log pricing analysis
-        AuditLog(
+        audit_log_writer.log(
             user_id=user_id,
             action='PROJECT_ANALYZED_AFFORDABLE',
             resource_type='PROJECT',
@@ -112,10 +174,10 @@ def analyze_project():
                 'estimated_price': pricing_result['final_price_zar'],
                 'complexity': data['complexity'],
                 'affordable_tier': True
-            }
+            },
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(AuditLog)
-        db.session.commit()
         
         return jsonify({
             'project_id': project.id,
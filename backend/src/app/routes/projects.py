@@ -0,0 +1,78 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..models import db, Project
+from ..services.listing import ListingError, keyset_page, parse_fields, parse_limit, stream_listing
+from ..services.recommendations import recommendation_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+projects_bp = Blueprint('projects', __name__)
+
+PROJECT_FIELDS = [
+    'id', 'title', 'description', 'project_type', 'complexity', 'timeline', 'team_size',
+    'estimated_price_zar', 'technical_recommendations', 'marketing_recommendations',
+    'security_assessment', 'ai_confidence_score', 'status', 'created_at', 'updated_at'
+]
+
+# What a list view shows: no description text and none of the recommendation blobs
+PROJECT_LIST_FIELDS = [
+    'id', 'title', 'project_type', 'complexity', 'timeline', 'team_size',
+    'estimated_price_zar', 'ai_confidence_score', 'status', 'created_at', 'updated_at'
+]
+
+# Stored by hash in recommendation_blobs; listed payloads come from the intern cache
+INTERNED_FIELDS = ['technical_recommendations', 'marketing_recommendations', 'security_assessment']
+
+def resolve_interned(rows, fields):
+    """Swap the selected *_hash columns back for their payloads"""
+    interned = [field for field in fields if field in INTERNED_FIELDS]
+    for row in rows:
+        for field in interned:
+            row[field] = recommendation_store.load(row.pop(field + '_hash'))
+        yield row
+
+@projects_bp.route('', methods=['GET'])
+@jwt_required()
+def list_projects():
+    """
+    The current user's projects, newest first.
+    
+    Query parameters: limit, cursor (next_cursor of the previous page),
+    fields (comma-separated, defaults to PROJECT_LIST_FIELDS) and status.
+    """
+    try:
+        user_id = get_jwt_identity()
+        fields = parse_fields(request.args.get('fields'), PROJECT_FIELDS, PROJECT_LIST_FIELDS)
+        limit = parse_limit(request.args.get('limit'))
+        
+        filters = [Project.user_id == user_id]
+        if request.args.get('status'):
+            filters.append(Project.status == request.args['status'])
+        
+        columns = [field + '_hash' if field in INTERNED_FIELDS else field for field in fields]
+        rows = keyset_page(db.session, Project, filters, columns, request.args.get('cursor'), limit)
+        return stream_listing(resolve_interned(rows, fields), limit)
+        
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Project listing error: {e}")
+        return jsonify({'error': 'Failed to list projects'}), 500
+
+@projects_bp.route('/<project_id>', methods=['GET'])
+@jwt_required()
+def get_project(project_id):
+    """One project with its recommendations"""
+    try:
+        user_id = get_jwt_identity()
+        project = Project.query.filter_by(id=project_id, user_id=user_id).first()
+        
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        
+        return jsonify({'project': project.to_dict()})
+        
+    except Exception as e:
+        logger.error(f"Project lookup error: {e}")
+        return jsonify({'error': 'Failed to get project'}), 500
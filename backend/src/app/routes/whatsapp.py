@@ -1,25 +1,35 @@
-from flask import Blueprint, request, jsonify
-from twilio.rest import Client
+from flask import Blueprint, request, jsonify, has_request_context
 import os
+import time
 import logging
-from ..models import db, User, Project, AuditLog
+from ..models import db, User, Project
 from ..ai_team.chatbot import ChatbotAI
+from ..services.dedup import MessageDeduplicator
+from ..services.audit import audit_log_writer
+from ..services.rate_limit import rate_limiter
+from ..services.http_clients import get_twilio_client, get_async_twilio_client, twilio_upstream
 
 whatsapp_bp = Blueprint('whatsapp', __name__)
 logger = logging.getLogger(__name__)
 
-# Initialize Twilio client
-twilio_client = Client(
-    os.environ.get('TWILIO_ACCOUNT_SID'),
-    os.environ.get('TWILIO_AUTH_TOKEN')
-)
-
 chatbot_ai = ChatbotAI()
 
+# Shared through Redis so a retry landing on another worker is still recognised
+message_deduplicator = MessageDeduplicator(
+    os.environ.get('REDIS_URL'),
+    ttl=int(os.environ.get('WHATSAPP_DEDUP_TTL_SECONDS', 24 * 3600)),
+    prefix='whatsapp:sid'
+)
+
 @whatsapp_bp.route('/webhook', methods=['POST'])
 def whatsapp_webhook():
     """
     Webhook for handling WhatsApp messages via Twilio
+    
+    Acknowledges immediately and leaves the reply to a Celery worker, so a
+    burst of messages doesn't hold gunicorn workers for the LLM and Twilio
+    round-trips. Twilio redelivers on slow or failed responses; MessageSid
+    deduplication makes those retries no-ops.
     """
     try:
         # Get incoming message data
@@ -27,34 +37,91 @@ def whatsapp_webhook():
         from_number = request.values.get('From', '')
         message_sid = request.values.get('MessageSid', '')
         
-        logger.info(f"Received WhatsApp message from {from_number}: {incoming_msg}")
+        if message_sid and not message_deduplicator.first_seen(message_sid):
+            logger.info(f"Ignoring redelivered WhatsApp message {message_sid}")
+            return jsonify({'status': 'duplicate'}), 200
         
-        # Process message with AI chatbot
-        response = chatbot_ai.process_whatsapp_message(incoming_msg, from_number)
+        # Acknowledge with 200 so Twilio doesn't treat the message as failed and redeliver it
+        if rate_limiter.hit('whatsapp_phone', from_number or None):
+            logger.info(f"Rate limited WhatsApp message {message_sid} from {from_number}")
+            return jsonify({'status': 'rate_limited'}), 200
         
-        # Send response back via WhatsApp
-        if response:
-            send_whatsapp_message(from_number, response)
+        logger.info(f"Received WhatsApp message from {from_number}: {incoming_msg}")
         
-        # Log the interaction
-        log_audit_event(
-            user_id=None,
-            action='WHATSAPP_MESSAGE_RECEIVED',
-            resource_type='WHATSAPP',
-            resource_id=message_sid,
-            details={
-                'from_number': from_number,
-                'message': incoming_msg,
-                'response': response
-            }
-        )
+        from ..tasks import process_whatsapp_message
+        try:
+            process_whatsapp_message.delay(
+                message_sid,
+                from_number,
+                incoming_msg,
+                request.remote_addr,
+                request.headers.get('User-Agent'),
+                time.time()
+            )
+        except Exception:
+            # Not queued, so let Twilio's retry through
+            if message_sid:
+                message_deduplicator.forget(message_sid)
+            raise
         
-        return jsonify({'status': 'success'}), 200
+        return jsonify({'status': 'queued'}), 200
         
     except Exception as e:
         logger.error(f"WhatsApp webhook error: {e}")
         return jsonify({'error': 'Webhook processing failed'}), 500
 
+def handle_incoming_message(message_sid, from_number, incoming_msg, ip_address=None, user_agent=None,
+                            received_at=None):
+    """
+    Generate and send the reply to a queued WhatsApp message (runs in the worker)
+    
+    With chatbot streaming on, the first sentence goes out while the rest of the
+    reply is still being generated, and the remainder follows as a second message.
+    """
+    received_at = received_at or time.time()
+    first_sent = {}
+    
+    def send_early(text):
+        send_whatsapp_message(from_number, text)
+        first_sent['text'] = text
+        first_sent['at'] = time.time()
+    
+    # Process message with AI chatbot
+    response = chatbot_ai.process_whatsapp_message(incoming_msg, from_number, send_early=send_early)
+    
+    # Send response back via WhatsApp, minus any part already sent
+    if response:
+        early = first_sent.get('text')
+        if early and response.startswith(early):
+            remainder = response[len(early):].strip()
+            if remainder:
+                send_whatsapp_message(from_number, remainder)
+        else:
+            send_whatsapp_message(from_number, response)
+            first_sent.setdefault('at', time.time())
+    
+    time_to_first_message_ms = round((first_sent['at'] - received_at) * 1000) if 'at' in first_sent else None
+    logger.info(f"WhatsApp reply to {message_sid}: time to first message {time_to_first_message_ms}ms, "
+                f"streamed={'text' in first_sent}")
+    
+    # Log the interaction
+    log_audit_event(
+        user_id=None,
+        action='WHATSAPP_MESSAGE_RECEIVED',
+        resource_type='WHATSAPP',
+        resource_id=message_sid,
+        details={
+            'from_number': from_number,
+            'message': incoming_msg,
+            'response': response,
+            'streamed': 'text' in first_sent,
+            'time_to_first_message_ms': time_to_first_message_ms
+        },
+        ip_address=ip_address,
+        user_agent=user_agent
+    )
+    return response
+
 def send_whatsapp_message(to_number, message):
     """
     Send WhatsApp message using Twilio
@@ -62,7 +129,29 @@ def send_whatsapp_message(to_number, message):
     try:
         from_whatsapp_number = os.environ.get('TWILIO_WHATSAPP_NUMBER')
         
-        message = twilio_client.messages.create(
+        message = twilio_upstream.call(
+            get_twilio_client().messages.create,
+            body=message,
+            from_=f'whatsapp:{from_whatsapp_number}',
+            to=f'whatsapp:{to_number}'
+        )
+        
+        logger.info(f"WhatsApp message sent to {to_number}: {message.sid}")
+        return message.sid
+        
+    except Exception as e:
+        logger.error(f"Failed to send WhatsApp message: {e}")
+        return None
+
+async def send_whatsapp_message_async(to_number, message):
+    """
+    Send WhatsApp message using Twilio from an async request path
+    """
+    try:
+        from_whatsapp_number = os.environ.get('TWILIO_WHATSAPP_NUMBER')
+        
+        message = await twilio_upstream.call_async(
+            get_async_twilio_client().messages.create_async,
             body=message,
             from_=f'whatsapp:{from_whatsapp_number}',
             to=f'whatsapp:{to_number}'
@@ -102,18 +191,21 @@ def send_whatsapp_message_api():
         logger.error(f"WhatsApp API error: {e}")
         return jsonify({'error': 'Message sending failed'}), 500
 
-def log_audit_event(user_id, action, resource_type, resource_id, details):
+def log_audit_event(user_id, action, resource_type, resource_id, details, ip_address=None, user_agent=None):
     """
     Log security events for audit trail
     """
-    audit_log = AuditLog(
+    # Outside a request (Celery worker) the caller passes the original client details
+    if has_request_context():
+        ip_address = ip_address or request.remote_addr
+        user_agent = user_agent or request.headers.get('User-Agent')
+    
+    audit_log_writer.log(
         user_id=user_id,
         action=action,
         resource_type=resource_type,
         resource_id=resource_id,
-        ip_address=request.remote_addr,
-        user_agent=request.headers.get('User-Agent'),
-        details=details
+        details=details,
+        ip_address=ip_address,
+        user_agent=user_agent
     )
-    db.session.add(audit_log)
-    db.session.commit()
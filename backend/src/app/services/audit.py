@@ -0,0 +1,389 @@
+import os
+import glob
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """
+    Buffer audit events and write them in bulk, off the request path.
+
+    Modes (AUDIT_LOG_MODE):
+        thread  events go on a bounded in-process queue; a background thread
+                writes them with one bulk insert and one commit per batch, when
+                AUDIT_LOG_BATCH_SIZE events are waiting or AUDIT_LOG_FLUSH_SECONDS
+                after the oldest one arrived
+        celery  batched the same way, then handed to the audit.write_batch task
+        sync    each event is written and committed immediately (tests, scripts)
+
+    Audit records are not dropped: when the queue is full the event is written
+    synchronously instead. A batch that fails to write is retried
+    AUDIT_LOG_WRITE_RETRIES times with backoff (in celery mode it is then
+    written directly); if that fails too it is appended to a JSONL file in
+    AUDIT_LOG_SPILL_DIR and replayed after the next successful write. A batch
+    the database refuses outright is split until only the refused rows (e.g.
+    events of a deleted user) are left; those are kept in a .rejected spill
+    file for an operator and the rest are written. Pending
+    events are flushed at interpreter exit and from gunicorn's worker_exit
+    hook.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.mode = 'sync'
+        self.batch_size = 200
+        self.flush_interval = 1.0
+        self.maxsize = 10000
+        self.retries = 3
+        self.retry_backoff = 0.5
+        self.spill_dir = 'spill/audit_logs'
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._reset_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('AUDIT_LOG_MODE', 'sync')
+        self.batch_size = app.config.get('AUDIT_LOG_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('AUDIT_LOG_FLUSH_SECONDS', 1.0)
+        self.maxsize = app.config.get('AUDIT_LOG_QUEUE_SIZE', 10000)
+        self.retries = app.config.get('AUDIT_LOG_WRITE_RETRIES', 3)
+        self.retry_backoff = app.config.get('AUDIT_LOG_RETRY_BACKOFF_SECONDS', 0.5)
+        self.spill_dir = app.config.get('AUDIT_LOG_SPILL_DIR', 'spill/audit_logs')
+        atexit.register(self.shutdown)
+
+    def log(self, user_id, action, resource_type=None, resource_id=None, details=None,
+            ip_address=None, user_agent=None):
+        """Record an audit event; returns its id"""
+        row = {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'details': details or {},
+            'created_at': datetime.utcnow()
+        }
+
+        if self.mode == 'sync':
+            self._write([row])
+            return row['id']
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((time.monotonic(), row))
+            self.enqueued += 1
+        except queue.Full:
+            self.overflow_writes += 1
+            logger.warning("Audit log queue full, writing event synchronously")
+            self._write([row])
+        return row['id']
+
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                continue
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                self._flush_batch(batch)
+                batch = []
+        if batch:
+            self._flush_batch(batch)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the background thread and flush what is left"""
+        if self._thread is not None and self._pid == os.getpid():
+            self._stopping.set()
+            try:
+                # Wakes the thread if it is waiting for a batch to fill
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and flush latency of this process"""
+        return {
+            'mode': self.mode,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_size': self.maxsize,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches': self.batches,
+            'failed': self.failed,
+            'retried': self.retried,
+            'spilled': self.spilled,
+            'replayed': self.replayed,
+            'rejected': self.rejected,
+            'overflow_writes': self.overflow_writes,
+            'last_flush_latency_seconds': self.last_flush_latency,
+            'max_flush_latency_seconds': self.max_flush_latency,
+            'last_write_seconds': self.last_write_seconds
+        }
+
+    def write_batch(self, rows: List[Dict[str, Any]]):
+        """Insert rows shipped by the Celery task (created_at as ISO strings)"""
+        self._write(_parse_rows(rows))
+
+    def replay_spilled(self) -> int:
+        """Write batches spilled to AUDIT_LOG_SPILL_DIR; returns the number of events written"""
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, '*.jsonl'))):
+            # Claimed by renaming, so two workers never replay the same file
+            claimed = f'{path}.{os.getpid()}.replaying'
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            with open(claimed, encoding='utf-8') as spill:
+                rows = _parse_rows([json.loads(line) for line in spill if line.strip()])
+            refused, unwritten = self._write_accepted(rows)
+            if rows and len(unwritten) == len(rows):
+                os.rename(claimed, path)
+                break
+            if refused:
+                self._spill(refused, rejected=True)
+            if unwritten:
+                self._spill(unwritten)
+            os.remove(claimed)
+            replayed += len(rows) - len(refused) - len(unwritten)
+            if unwritten:
+                break
+        else:
+            self._spill_pending = False
+        self.replayed += replayed
+        return replayed
+
+    def _ensure_started(self):
+        # Threads and queue locks do not survive fork; each process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.maxsize)
+            self._stopping = threading.Event()
+            self._reset_stats()
+            # Pick up files spilled by a previous worker once writes succeed
+            self._spill_pending = True
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._flush_batch(batch)
+
+    def _next_batch(self) -> List:
+        try:
+            item = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        if item is _STOP:
+            return []
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                break
+            batch.append(item)
+        return batch
+
+    def _flush_batch(self, batch: List):
+        rows = [row for _, row in batch]
+        refused, unwritten = [], []
+        try:
+            self._deliver(rows)
+        except _REJECTED:
+            # One refused row must not take the rest of the batch with it
+            refused, unwritten = self._write_accepted(rows)
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} audit events: {e}")
+            unwritten = rows
+        if refused:
+            self.failed += len(refused)
+            self._spill(refused, rejected=True)
+        if unwritten:
+            self.failed += len(unwritten)
+            self._spill(unwritten)
+            return
+
+        latency = time.monotonic() - batch[0][0]
+        self.last_flush_latency = round(latency, 4)
+        self.max_flush_latency = max(self.max_flush_latency, self.last_flush_latency)
+        if self._spill_pending:
+            self.replay_spilled()
+
+    def _deliver(self, rows: List[Dict[str, Any]]):
+        """Ship or write the rows, retrying with backoff; raises the last error"""
+        attempts = [self._ship if self.mode == 'celery' else self._write] * (self.retries + 1)
+        if self.mode == 'celery':
+            # Broker down: write from this process rather than lose the batch
+            attempts.append(self._write)
+        for attempt, deliver in enumerate(attempts):
+            if attempt:
+                self.retried += 1
+                time.sleep(self.retry_backoff * 2 ** min(attempt - 1, 5))
+            try:
+                return deliver(rows)
+            except _REJECTED:
+                raise
+            except Exception as e:
+                if attempt == len(attempts) - 1:
+                    raise
+                logger.warning(f"Writing {len(rows)} audit events failed (attempt {attempt + 1}/{len(attempts)}): {e}")
+
+    def _write_accepted(self, rows: List[Dict[str, Any]]) -> Tuple[List, List]:
+        """
+        Write rows, halving any chunk the database refuses until only the
+        refused rows are left. Returns (refused, unwritten); unwritten holds the
+        rows not yet attempted when some other error stopped the writes.
+        """
+        refused = []
+        chunks = [rows] if rows else []
+        while chunks:
+            chunk = chunks.pop()
+            try:
+                self._write(chunk)
+            except _REJECTED as e:
+                if len(chunk) == 1:
+                    logger.error(f"Audit event {chunk[0]['id']} was rejected: {e}")
+                    refused.extend(chunk)
+                else:
+                    middle = len(chunk) // 2
+                    chunks += [chunk[middle:], chunk[:middle]]
+            except Exception as e:
+                logger.error(f"Writing audit events failed part way: {e}")
+                return refused, chunk + [row for rest in reversed(chunks) for row in rest]
+        return refused, []
+
+    def _spill(self, rows: List[Dict[str, Any]], rejected: bool = False):
+        path = os.path.join(self.spill_dir, f'audit-{os.getpid()}-{time.time_ns()}.jsonl')
+        if rejected:
+            # Never replayed: the same rows would be refused again
+            path += '.rejected'
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # Written under a temporary name first, so replay never reads half a batch
+            with open(path + '.tmp', 'w', encoding='utf-8') as spill:
+                spill.writelines(json.dumps(row, default=_json_default) + '\n' for row in rows)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.error(f"Lost {len(rows)} audit events: writing and spilling to {self.spill_dir} both failed: {e}")
+            return
+        if rejected:
+            self.rejected += len(rows)
+        else:
+            self.spilled += len(rows)
+            self._spill_pending = True
+        logger.error(f"Spilled {len(rows)} audit events to {path}")
+
+    def _ship(self, rows: List[Dict[str, Any]]):
+        from ..tasks import write_audit_batch
+        write_audit_batch.delay([dict(row, created_at=row['created_at'].isoformat()) for row in rows])
+        self.batches += 1
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        from ..models import db, AuditLog
+
+        started = time.perf_counter()
+        if self.app is not None and not _has_app_context():
+            with self.app.app_context():
+                try:
+                    _bulk_insert(db, AuditLog, rows)
+                finally:
+                    db.session.remove()
+        else:
+            _bulk_insert(db, AuditLog, rows)
+
+        self.last_write_seconds = round(time.perf_counter() - started, 4)
+        self.written += len(rows)
+        self.batches += 1
+
+    def _reset_stats(self):
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.retried = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self._spill_pending = False
+        self.overflow_writes = 0
+        self.last_flush_latency = None
+        self.max_flush_latency = 0.0
+        self.last_write_seconds = None
+
+
+def _bulk_insert(db, model, rows: List[Dict[str, Any]]):
+    try:
+        db.session.execute(insert(model), rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _parse_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # created_at arrives as an ISO string from Celery and spill files
+    for row in rows:
+        if isinstance(row.get('created_at'), str):
+            row['created_at'] = datetime.fromisoformat(row['created_at'])
+    return rows
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _has_app_context() -> bool:
+    from flask import has_app_context
+    return has_app_context()
+
+
+# Queued by shutdown to wake the writer thread
+_STOP = object()
+
+# The database refusing the rows themselves; retrying or replaying cannot help
+_REJECTED = (IntegrityError, DataError)
+
+audit_log_writer = AuditLogWriter()
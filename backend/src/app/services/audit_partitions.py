@@ -0,0 +1,226 @@
+import os
+import re
+import gzip
+import json
+import logging
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Column, MetaData, Table, delete, func, insert, inspect, select, text
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PATTERN = re.compile(r'^audit_logs_p(\d{4})(\d{2})$')
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f'audit_logs_p{month:%Y%m}'
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    match = PARTITION_PATTERN.match(name)
+    return datetime(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+class AuditPartitionManager:
+    """
+    Monthly partitions of audit_logs, archived to files once they expire.
+
+    Postgres: audit_logs is natively partitioned by created_at (migration
+    0002). Partitions are created months_ahead in advance so inserts never
+    land in the default partition, and queries filtered on created_at only
+    scan the months they cover.
+
+    SQLite: audit_logs holds the hot window (the current month and the
+    hot_months - 1 before it). Older months are rolled into audit_logs_pYYYYMM
+    tables, one transaction per month, so the hot table and its indexes stay
+    small.
+
+    Either way, a month older than retention_months is written to
+    archive_dir as gzipped JSONL (or Parquet with pyarrow installed) and then
+    dropped. Dropping a whole partition leaves no dead rows to vacuum or
+    index entries to rebuild.
+    """
+
+    def __init__(self, hot_months: int = 2, retention_months: int = 12, months_ahead: int = 2,
+                 archive_dir: str = 'archive/audit_logs', archive_format: str = 'jsonl',
+                 batch_size: int = 5000):
+        self.hot_months = max(1, hot_months)
+        self.retention_months = max(self.hot_months, retention_months)
+        self.months_ahead = months_ahead
+        self.archive_dir = archive_dir
+        self.archive_format = archive_format
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_env(cls) -> 'AuditPartitionManager':
+        """Manager configured by the AUDIT_LOG_* retention environment variables"""
+        return cls(
+            hot_months=int(os.environ.get('AUDIT_LOG_HOT_MONTHS', 2)),
+            retention_months=int(os.environ.get('AUDIT_LOG_RETENTION_MONTHS', 12)),
+            months_ahead=int(os.environ.get('AUDIT_LOG_PARTITIONS_AHEAD', 2)),
+            archive_dir=os.environ.get('AUDIT_LOG_ARCHIVE_DIR', 'archive/audit_logs'),
+            archive_format=os.environ.get('AUDIT_LOG_ARCHIVE_FORMAT', 'jsonl')
+        )
+
+    def maintain(self, engine, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Create upcoming partitions, roll cold months out and archive expired ones"""
+        current = month_start(now or datetime.utcnow())
+        summary = {'created': [], 'rolled': [], 'archived': []}
+
+        if engine.dialect.name == 'postgresql':
+            summary['created'] = self._create_partitions(engine, current)
+        else:
+            summary['rolled'] = self._roll_cold_months(engine, add_months(current, -(self.hot_months - 1)))
+
+        expired_before = add_months(current, -self.retention_months)
+        for name in self.partitions(engine):
+            if partition_month(name) < expired_before:
+                summary['archived'].append(self._archive(engine, name))
+
+        if engine.dialect.name == 'sqlite' and summary['archived']:
+            # Hand freed pages back a bounded amount at a time (needs auto_vacuum=INCREMENTAL)
+            with engine.begin() as connection:
+                connection.execute(text('PRAGMA incremental_vacuum(2000)'))
+
+        logger.info(f"Audit log maintenance: {summary}")
+        return summary
+
+    def partitions(self, engine) -> List[str]:
+        """Monthly partitions (Postgres) or rolled tables (SQLite), oldest first"""
+        if engine.dialect.name == 'postgresql':
+            with engine.connect() as connection:
+                names = connection.execute(text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "WHERE parent.relname = 'audit_logs'"
+                )).scalars().all()
+        else:
+            names = inspect(engine).get_table_names()
+        return sorted(name for name in names if partition_month(name))
+
+    def _create_partitions(self, engine, current: datetime) -> List[str]:
+        existing = set(self.partitions(engine))
+        created = []
+        with engine.begin() as connection:
+            for offset in range(self.months_ahead + 1):
+                month = add_months(current, offset)
+                name = partition_name(month)
+                if name in existing:
+                    continue
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF audit_logs "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+                ))
+                created.append(name)
+        return created
+
+    def _roll_cold_months(self, engine, hot_start: datetime) -> List[str]:
+        from ..models import AuditLog
+        hot = AuditLog.__table__
+
+        with engine.connect() as connection:
+            oldest = connection.execute(select(func.min(hot.c.created_at)).where(hot.c.created_at < hot_start)).scalar()
+        if oldest is None:
+            return []
+
+        rolled = []
+        month = month_start(oldest)
+        while month < hot_start:
+            end = add_months(month, 1)
+            in_month = (hot.c.created_at >= month) & (hot.c.created_at < end)
+            cold = _cold_table(partition_name(month), hot)
+            with engine.begin() as connection:
+                if connection.execute(select(func.count()).select_from(hot).where(in_month)).scalar():
+                    cold.create(connection, checkfirst=True)
+                    connection.execute(insert(cold).from_select([c.name for c in hot.columns], select(hot).where(in_month)))
+                    connection.execute(delete(hot).where(in_month))
+                    rolled.append(cold.name)
+            month = end
+        return rolled
+
+    def _archive(self, engine, name: str) -> str:
+        from ..models import AuditLog
+        table = _cold_table(name, AuditLog.__table__)
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        # Written under a temporary name first, so a crash never leaves a
+        # partial archive next to a dropped partition
+        path = self._write_archive(engine, table)
+        with engine.begin() as connection:
+            if engine.dialect.name == 'postgresql':
+                connection.execute(text(f'ALTER TABLE audit_logs DETACH PARTITION {name}'))
+            connection.execute(text(f'DROP TABLE {name}'))
+        logger.info(f"Archived audit partition {name} to {path}")
+        return path
+
+    def _write_archive(self, engine, table: Table) -> str:
+        if self.archive_format == 'parquet':
+            try:
+                return self._write_parquet(engine, table)
+            except ImportError:
+                logger.warning("pyarrow is not installed, archiving audit logs as JSONL")
+
+        path = self._archive_path(table.name, 'jsonl.gz')
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as archive:
+            for rows in self._batches(engine, table):
+                archive.writelines(json.dumps(row, default=_json_default) + '\n' for row in rows)
+        os.replace(path + '.tmp', path)
+        return path
+
+    def _write_parquet(self, engine, table: Table) -> str:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self._archive_path(table.name, 'parquet')
+        writer = None
+        try:
+            for rows in self._batches(engine, table):
+                for row in rows:
+                    row['details'] = json.dumps(row['details'], default=_json_default)
+                batch = pa.Table.from_pylist(rows)
+                if writer is None:
+                    writer = pq.ParquetWriter(path + '.tmp', batch.schema, compression='zstd')
+                writer.write_table(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            pq.write_table(pa.table({}), path + '.tmp')
+        os.replace(path + '.tmp', path)
+        return path
+
+    def _archive_path(self, name: str, extension: str) -> str:
+        # Late rows can bring an archived month back; never overwrite its first archive
+        path = os.path.join(self.archive_dir, f'{name}.{extension}')
+        if os.path.exists(path):
+            path = os.path.join(self.archive_dir, f'{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{extension}')
+        return path
+
+    def _batches(self, engine, table: Table):
+        with engine.connect() as connection:
+            result = connection.execution_options(yield_per=self.batch_size).execute(
+                select(table).order_by(table.c.created_at)
+            )
+            for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+
+
+def _cold_table(name: str, hot: Table) -> Table:
+    # Same columns as audit_logs, no constraints or indexes: cold months are only ever archived
+    return Table(name, MetaData(), *[Column(column.name, column.type) for column in hot.columns])
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
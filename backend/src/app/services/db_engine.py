@@ -0,0 +1,208 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Starting points per process type; every value can be overridden with the
+# matching DB_* environment variable. Sized for 4 gthread gunicorn workers
+# (8 request threads plus the audit writer thread each, 10 connections at
+# most) against Postgres' default max_connections of 100.
+ENGINE_PROFILES = {
+    'web': {
+        'pool_size': 5,
+        'max_overflow': 5,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'statement_timeout_ms': 15000
+    },
+    'worker': {
+        'pool_size': 2,
+        'max_overflow': 2,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'statement_timeout_ms': 300000
+    },
+    'test': {
+        'pool_size': 2,
+        'max_overflow': 0,
+        'pool_timeout': 5,
+        'pool_recycle': -1,
+        'pool_pre_ping': False,
+        'statement_timeout_ms': 0
+    }
+}
+
+# Applied to every new SQLite connection. WAL lets readers run while a
+# writer commits; NORMAL sync is durable across application crashes in WAL.
+# auto_vacuum only takes effect on a new database file and lets audit log
+# maintenance reclaim space with bounded incremental_vacuum steps.
+SQLITE_PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+    'mmap_size': 134217728
+}
+
+
+class PoolMetrics:
+    """Checkout wait times and connections in use for this process"""
+
+    def __init__(self, slow_checkout_ms: float = 100):
+        self.slow_checkout_ms = slow_checkout_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.active = 0
+        self.max_active = 0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if seconds * 1000 >= self.slow_checkout_ms:
+                self.slow_checkouts += 1
+                logger.warning(f"Waited {seconds * 1000:.0f}ms for a database connection")
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def checked_out(self):
+        with self._lock:
+            self.checkouts += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def checked_in(self):
+        with self._lock:
+            self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'checkouts': self.checkouts,
+            'active': self.active,
+            'max_active': self.max_active,
+            'timeouts': self.timeouts,
+            'slow_checkouts': self.slow_checkouts,
+            'avg_wait_ms': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else None,
+            'max_wait_ms': round(self.max_wait * 1000, 3)
+        }
+
+
+pool_metrics = PoolMetrics(float(os.environ.get('DB_POOL_SLOW_CHECKOUT_MS', 100)))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a free connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        finally:
+            pool_metrics.record_wait(time.perf_counter() - started)
+
+
+def engine_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """Profile named by DB_ENGINE_PROFILE (default web) with DB_* overrides applied"""
+    name = name or os.environ.get('DB_ENGINE_PROFILE', 'web')
+    profile = dict(ENGINE_PROFILES[name])
+    overrides = {
+        'pool_size': ('DB_POOL_SIZE', int),
+        'max_overflow': ('DB_MAX_OVERFLOW', int),
+        'pool_timeout': ('DB_POOL_TIMEOUT_SECONDS', float),
+        'pool_recycle': ('DB_POOL_RECYCLE_SECONDS', int),
+        'pool_pre_ping': ('DB_POOL_PRE_PING', lambda value: value.lower() == 'true'),
+        'statement_timeout_ms': ('DB_STATEMENT_TIMEOUT_MS', int)
+    }
+    for key, (env_name, cast) in overrides.items():
+        if os.environ.get(env_name):
+            profile[key] = cast(os.environ[env_name])
+    profile['name'] = name
+    return profile
+
+
+def engine_options(database_uri: str, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """SQLALCHEMY_ENGINE_OPTIONS for the database URI and profile"""
+    profile = profile or engine_profile()
+    url = make_url(database_uri)
+
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # One shared in-memory database; SQLAlchemy's default pool keeps it alive
+            return {}
+        return {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': profile['pool_size'],
+            'max_overflow': profile['max_overflow'],
+            'pool_timeout': profile['pool_timeout'],
+            'connect_args': {'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000}
+        }
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': profile['pool_size'],
+        'max_overflow': profile['max_overflow'],
+        'pool_timeout': profile['pool_timeout'],
+        'pool_recycle': profile['pool_recycle'],
+        'pool_pre_ping': profile['pool_pre_ping']
+    }
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT_SECONDS', 10))}
+        if profile['statement_timeout_ms']:
+            connect_args['options'] = f"-c statement_timeout={profile['statement_timeout_ms']}"
+        options['connect_args'] = connect_args
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine):
+    """Track connections in use and tune SQLite connections as they are opened"""
+    event.listen(engine, 'checkout', lambda *args: pool_metrics.checked_out())
+    event.listen(engine, 'checkin', lambda *args: pool_metrics.checked_in())
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Pool occupancy and checkout latency of this process"""
+    stats = pool_metrics.stats()
+    pool = engine.pool
+    stats['pool'] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'pool_size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'idle': pool.checkedin(),
+            'overflow': pool.overflow()
+        })
+    return stats
@@ -0,0 +1,65 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDeduplicator:
+    """
+    Remember recently seen message ids so redelivered webhooks are processed once.
+
+    Uses Redis SET NX with a TTL when a URL is given, so every worker sees the
+    same ids; otherwise a bounded in-process map (single-process/dev only).
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, ttl: int = 24 * 3600,
+                 maxsize: int = 100000, prefix: str = 'dedup'):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.prefix = prefix
+        self._redis = None
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis deduplication unavailable, using in-process map: {e}")
+
+    def first_seen(self, message_id: str) -> bool:
+        """Record the id; True only the first time it is seen within the TTL"""
+        if self._redis is not None:
+            try:
+                return bool(self._redis.set(f'{self.prefix}:{message_id}', 1, nx=True, ex=self.ttl))
+            except Exception as e:
+                # Fail open: a duplicate reply is better than a dropped message
+                logger.warning(f"Deduplication check failed for {message_id}: {e}")
+                return True
+
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._seen.get(message_id)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._seen[message_id] = now + self.ttl
+            self._seen.move_to_end(message_id)
+            while len(self._seen) > self.maxsize:
+                self._seen.popitem(last=False)
+            return True
+
+    def forget(self, message_id: str):
+        """Drop an id, e.g. when processing could not be queued and a retry is wanted"""
+        if self._redis is not None:
+            try:
+                self._redis.delete(f'{self.prefix}:{message_id}')
+            except Exception as e:
+                logger.warning(f"Failed to clear deduplication key {message_id}: {e}")
+            return
+
+        with self._lock:
+            self._seen.pop(message_id, None)
@@ -0,0 +1,288 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream that keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast for reset_timeout seconds. Then a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {'state': self.state, 'failures': self.failures, 'rejected': self.rejected}
+
+
+class Upstream:
+    """
+    Retry and circuit-breaker policy for one outbound dependency.
+
+    Failures for which retryable(exc) is true are retried with full-jitter
+    exponential backoff and count against the circuit; other errors (bad
+    requests, auth) are raised at once and do not. While the circuit is open,
+    calls raise CircuitOpenError without touching the network, so callers drop
+    straight into their existing fallback handling.
+    """
+
+    def __init__(self, name: str, retryable: Callable[[Exception], bool], retries: int = 2,
+                 backoff_base: float = 0.2, backoff_max: float = 2.0, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.retryable = retryable
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(name)
+
+    @classmethod
+    def from_env(cls, name: str, retryable: Callable[[Exception], bool]) -> 'Upstream':
+        """Policy configured by the OUTBOUND_* and CIRCUIT_* environment variables"""
+        return cls(
+            name,
+            retryable,
+            retries=int(os.environ.get('OUTBOUND_RETRIES', 2)),
+            backoff_base=float(os.environ.get('OUTBOUND_BACKOFF_BASE_SECONDS', 0.2)),
+            backoff_max=float(os.environ.get('OUTBOUND_BACKOFF_MAX_SECONDS', 2.0)),
+            breaker=CircuitBreaker(
+                name,
+                failure_threshold=int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5)),
+                reset_timeout=float(os.environ.get('CIRCUIT_RESET_SECONDS', 30))
+            )
+        )
+
+    def call(self, fn: Callable, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._check_circuit()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not self._handle_failure(e, attempt):
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def call_async(self, fn: Callable, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._check_circuit()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                if not self._handle_failure(e, attempt):
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _check_circuit(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def _handle_failure(self, error: Exception, attempt: int) -> bool:
+        """Record the failure; True if the call should be retried"""
+        if not self.retryable(error):
+            # The upstream answered, it just refused this request
+            self.breaker.record_success()
+            return False
+        self.breaker.record_failure()
+        if attempt >= self.retries:
+            return False
+        logger.warning(f"{self.name} call failed ({error}), retry {attempt + 1} of {self.retries}")
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def _openai_retryable(error: Exception) -> bool:
+    import openai
+    return isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
+
+def _twilio_retryable(error: Exception) -> bool:
+    # Only failures where the message was certainly not accepted: retrying
+    # after a read timeout could deliver the same WhatsApp message twice
+    import requests
+    status = getattr(error, 'status', None)
+    return status in (429, 503) or isinstance(error, requests.exceptions.ConnectionError)
+
+
+openai_upstream = Upstream.from_env('openai', _openai_retryable)
+twilio_upstream = Upstream.from_env('twilio', _twilio_retryable)
+
+
+def _timeout() -> float:
+    return float(os.environ.get('OUTBOUND_TIMEOUT_SECONDS', 15))
+
+
+def _connect_timeout() -> float:
+    return float(os.environ.get('OUTBOUND_CONNECT_TIMEOUT_SECONDS', 3))
+
+
+def _pool_size() -> int:
+    return int(os.environ.get('OUTBOUND_POOL_SIZE', 20))
+
+
+def _build_openai():
+    import openai
+    # The client keeps a keep-alive connection pool of its own; sharing one
+    # client per process is what lets requests reuse it. Retries are done by
+    # openai_upstream, with jitter and the circuit breaker.
+    return openai.OpenAI(
+        api_key=os.environ.get('OPENAI_API_KEY'),
+        timeout=openai.Timeout(_timeout(), connect=_connect_timeout()),
+        max_retries=0
+    )
+
+
+def _build_async_openai():
+    import openai
+    return openai.AsyncOpenAI(
+        api_key=os.environ.get('OPENAI_API_KEY'),
+        timeout=openai.Timeout(_timeout(), connect=_connect_timeout()),
+        max_retries=0
+    )
+
+
+def _build_twilio():
+    from twilio.rest import Client
+    from twilio.http.http_client import TwilioHttpClient
+
+    # Twilio only accepts a single number; the adapter adds the connect timeout
+    http_client = TwilioHttpClient(pool_connections=True, timeout=_timeout())
+    http_client.session.mount('https://', _timeout_adapter(_connect_timeout(), pool_connections=1, pool_maxsize=_pool_size()))
+    return Client(os.environ.get('TWILIO_ACCOUNT_SID'), os.environ.get('TWILIO_AUTH_TOKEN'), http_client=http_client)
+
+
+def _timeout_adapter(connect_timeout: float, **kwargs):
+    from requests.adapters import HTTPAdapter
+
+    class ConnectTimeoutAdapter(HTTPAdapter):
+        """Turns a plain read timeout into (connect, read) for every request"""
+
+        def send(self, request, timeout=None, **send_kwargs):
+            if not isinstance(timeout, tuple):
+                timeout = (connect_timeout, timeout)
+            return super().send(request, timeout=timeout, **send_kwargs)
+
+    return ConnectTimeoutAdapter(**kwargs)
+
+
+def _build_async_twilio():
+    from twilio.rest import Client
+    from twilio.http.async_http_client import AsyncTwilioHttpClient
+
+    http_client = AsyncTwilioHttpClient(pool_connections=True, timeout=_timeout())
+    return Client(os.environ.get('TWILIO_ACCOUNT_SID'), os.environ.get('TWILIO_AUTH_TOKEN'), http_client=http_client)
+
+
+_clients: Dict[str, Any] = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def _shared(name: str, factory: Callable[[], Any]):
+    """One client per process: pooled connections must not be shared across fork"""
+    global _clients_pid
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+
+def get_openai_client():
+    """Process-wide OpenAI client, so every call reuses its keep-alive connections"""
+    return _shared('openai', _build_openai)
+
+
+def get_async_openai_client():
+    """AsyncOpenAI counterpart of get_openai_client; use from a single event loop"""
+    return _shared('async_openai', _build_async_openai)
+
+
+def get_twilio_client():
+    """Process-wide Twilio client with a pooled keep-alive HTTP session"""
+    return _shared('twilio', _build_twilio)
+
+
+def get_async_twilio_client():
+    """Twilio client for the *_async API methods; use from a single event loop"""
+    return _shared('async_twilio', _build_async_twilio)
+
+
+def reset_clients():
+    """Drop all shared clients, e.g. after credentials change"""
+    with _clients_lock:
+        _clients.clear()
+
+
+def upstream_stats() -> Dict[str, Any]:
+    """Circuit state of each outbound dependency"""
+    return {upstream.name: upstream.breaker.stats() for upstream in (openai_upstream, twilio_upstream)}
@@ -0,0 +1,185 @@
+import os
+import time
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+# session.info key collecting ids of users changed in the current transaction
+_CHANGED_USERS = 'identity_cache_changed_users'
+
+
+class MemoryIdentityStore:
+    """Serialized users in this process, evicting the least recently used"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, payload: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisIdentityStore:
+    """Serialized users shared by every worker, so an invalidation reaches all of them"""
+
+    def __init__(self, url: str, prefix: str = 'identity:user'):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(f'{self.prefix}:{key}')
+
+    def set(self, key: str, payload: str, ttl: int):
+        self.client.setex(f'{self.prefix}:{key}', ttl, payload)
+
+    def delete(self, key: str):
+        self.client.delete(f'{self.prefix}:{key}')
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(f'{self.prefix}:*'))
+
+
+class UserIdentityCache:
+    """
+    Serialized User.to_dict() payloads keyed by JWT identity (the user id).
+
+    A hit answers an authenticated request without touching the database.
+    Entries expire after ttl seconds and are dropped as soon as a transaction
+    that updated or deleted the user commits (password change, lockout,
+    profile edits). With the memory backend other workers only see the change
+    once their copy expires; use the redis backend to invalidate everywhere.
+    If the store fails the user is read from the database.
+    """
+
+    def __init__(self, store=None, ttl: int = 60, enabled: bool = True):
+        self.store = store or MemoryIdentityStore()
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> 'UserIdentityCache':
+        """Cache configured by the IDENTITY_CACHE_* environment variables"""
+        store = None
+        if os.environ.get('IDENTITY_CACHE_BACKEND', 'memory') == 'redis':
+            try:
+                store = RedisIdentityStore(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+            except Exception as e:
+                logger.warning(f"Redis identity cache unavailable, using in-process cache: {e}")
+        if store is None:
+            store = MemoryIdentityStore(int(os.environ.get('IDENTITY_CACHE_MAX_USERS', 10000)))
+        return cls(
+            store,
+            ttl=int(os.environ.get('IDENTITY_CACHE_TTL_SECONDS', 60)),
+            enabled=os.environ.get('IDENTITY_CACHE_ENABLED', 'true').lower() == 'true'
+        )
+
+    def user_payload(self, user_id: str) -> Optional[str]:
+        """JSON of the user's to_dict(), or None if there is no such user"""
+        if not user_id:
+            return None
+        if self.enabled:
+            try:
+                payload = self.store.get(user_id)
+            except Exception as e:
+                logger.warning(f"Identity cache read failed: {e}")
+                payload = None
+            if payload is not None:
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        from ..models import db, User
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        payload = json.dumps(user.to_dict())
+        if self.enabled:
+            try:
+                self.store.set(user_id, payload, self.ttl)
+            except Exception as e:
+                logger.warning(f"Identity cache write failed: {e}")
+        return payload
+
+    def invalidate(self, user_id: str):
+        try:
+            self.store.delete(user_id)
+            self.invalidations += 1
+        except Exception as e:
+            logger.warning(f"Identity cache invalidation failed for {user_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            size = self.store.size()
+        except Exception:
+            size = None
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'ttl_seconds': self.ttl,
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'invalidations': self.invalidations
+        }
+
+
+identity_cache = UserIdentityCache.from_env()
+
+
+def _mark_user_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+
+
+def _invalidate_committed(session):
+    # After commit, so a concurrent request cannot re-cache the old row
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        identity_cache.invalidate(user_id)
+
+
+def _forget_rolled_back(session):
+    session.info.pop(_CHANGED_USERS, None)
+
+
+def register_invalidation(user_model):
+    """Drop cached users whenever a committed transaction updated or deleted them"""
+    event.listen(user_model, 'after_update', _mark_user_changed)
+    event.listen(user_model, 'after_delete', _mark_user_changed)
+    event.listen(Session, 'after_commit', _invalidate_committed)
+    event.listen(Session, 'after_rollback', _forget_rolled_back)
@@ -0,0 +1,117 @@
+import json
+import base64
+import logging
+import binascii
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from flask import Response, stream_with_context
+from sqlalchemy import select, tuple_
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Rows pulled from the database cursor at a time while streaming a page
+FETCH_SIZE = 100
+
+
+class ListingError(ValueError):
+    """Bad cursor, limit or field list; answered with 400"""
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise ListingError('Invalid cursor')
+
+
+def parse_limit(value: Optional[str]) -> int:
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        return max(1, min(MAX_PAGE_SIZE, int(value)))
+    except ValueError:
+        raise ListingError('limit must be an integer')
+
+
+def parse_fields(value: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> List[str]:
+    """Requested fields in order, always including the id and created_at the cursor is built from"""
+    if not value:
+        fields = list(default)
+    else:
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise ListingError(f"Unknown fields: {', '.join(unknown)}")
+    for required in ('created_at', 'id'):
+        if required not in fields:
+            fields.insert(0, required)
+    return fields
+
+
+def keyset_page(session, model, filters, fields: List[str], cursor: Optional[str], limit: int) -> Iterator[Dict[str, Any]]:
+    """
+    Rows newest first as dicts of the requested columns only.
+
+    Pages continue from the (created_at, id) of the last row of the previous
+    one instead of an OFFSET, so every page is an index range scan on
+    (..., created_at). Unrequested columns are never selected, and rows are
+    fetched FETCH_SIZE at a time rather than all at once.
+    """
+    columns = [getattr(model, field) for field in fields]
+    query = select(*columns).where(*filters)
+    if cursor:
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(*decode_cursor(cursor)))
+    query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+    # Executed here, not lazily, so a bad cursor or query fails before streaming starts
+    result = session.execute(query.execution_options(yield_per=FETCH_SIZE))
+    return (dict(zip(fields, row)) for row in result)
+
+
+def stream_listing(rows: Iterator[Dict[str, Any]], limit: int) -> Response:
+    """
+    Stream {"items": [...], "next_cursor": ...} as rows arrive.
+
+    The 200 has already been sent with the first chunk, so a failure part way
+    (a dropped connection, a statement timeout, a row that will not serialize)
+    still ends in valid JSON: the items sent so far, a cursor to resume after
+    them and an "error" member clients must check.
+    """
+    def generate():
+        yield '{"items": ['
+        last = None
+        try:
+            for count, row in enumerate(rows):
+                if count == limit:
+                    # One row past the page means there is a next page
+                    yield '], "next_cursor": ' + json.dumps(_cursor_after(last)) + '}\n'
+                    return
+                item = json.dumps(row, default=_json_default)
+                yield (',' if last is not None else '') + item
+                last = row
+        except Exception as e:
+            logger.error(f"Listing stream failed part way: {e}")
+            yield '], "next_cursor": ' + json.dumps(_cursor_after(last)) + ', "error": "Listing interrupted"}\n'
+            return
+        yield '], "next_cursor": null}\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def _cursor_after(row: Optional[Dict[str, Any]]) -> Optional[str]:
+    return encode_cursor(row['created_at'], row['id']) if row is not None else None
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
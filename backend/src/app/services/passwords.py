@@ -0,0 +1,137 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already waiting; callers answer 429"""
+
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _verify(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _pool_context():
+    # forkserver where the platform has it (Linux, macOS), spawn elsewhere
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification in a dedicated process pool.
+
+    At most max_pending hashes may be running or queued in a process; a caller
+    that cannot get a slot within queue_timeout gets PasswordHasherBusy instead
+    of tying up its request thread behind a login burst. The limit only bites
+    when a process serves more concurrent requests than max_pending (gthread
+    workers); a sync worker never has more than one hash in flight. With workers=0 bcrypt runs
+    inline (tests, scripts). Hashes are standard $2b$ bcrypt, compatible with
+    those written by Flask-Bcrypt.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 rounds: int = 12, queue_timeout: float = 0.5):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending or max(1, self.workers) * 4
+        self.rounds = rounds
+        self.queue_timeout = queue_timeout
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'PasswordHasher':
+        """Hasher configured by the PASSWORD_* environment variables"""
+        workers = os.environ.get('PASSWORD_HASH_WORKERS')
+        max_pending = os.environ.get('PASSWORD_HASH_MAX_PENDING')
+        return cls(
+            workers=int(workers) if workers else None,
+            max_pending=int(max_pending) if max_pending else None,
+            rounds=int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12)),
+            queue_timeout=float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS', 0.5))
+        )
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def verify(self, password: str, hashed: str) -> bool:
+        if not hashed:
+            return False
+        return self._run(_verify, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether a stored hash was made with a different cost than configured"""
+        try:
+            # $2b$<cost>$<salt+hash>
+            return int(hashed.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        """Stop this process's pool; an exiting worker otherwise waits on its forkserver children"""
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'rounds': self.rounds,
+            'rejected': self.rejected
+        }
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.rejected += 1
+            raise PasswordHasherBusy('Password hashing is saturated')
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            executor = self._get_executor()
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A pool process died (OOM killer, segfault) and the pool now
+                # refuses all work; replace it and try once more
+                logger.warning('Password hashing pool is broken, starting a new one')
+                self._discard_executor(executor)
+                return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use in each process: pool processes are not shared across fork.
+        # Started from a forkserver, never forked from the multi-threaded
+        # gunicorn worker, so a child cannot inherit a lock another request
+        # thread was holding.
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=_pool_context())
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        # Only the first thread to see the broken pool replaces it
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher.from_env()
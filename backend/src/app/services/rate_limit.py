@@ -0,0 +1,200 @@
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+from flask import request, jsonify
+
+logger = logging.getLogger(__name__)
+
+# name -> "<requests>/<seconds>"; each can be overridden with RATE_LIMIT_<NAME>
+DEFAULT_LIMITS = {
+    'login_ip': '20/60',
+    'login_failures': '5/1800',
+    'analyze_user': '30/60',
+    'whatsapp_phone': '20/60'
+}
+
+
+class MemoryBucketStore:
+    """Token buckets in this process; bounded by evicting the least recently used keys"""
+
+    # Each worker counts on its own and a restart forgets everything
+    shared = False
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return allowed, tokens
+
+    def reset(self, key: str):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+# Refill, take and store in one round trip, atomically across workers
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker"""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = 'ratelimit'):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float]:
+        allowed, tokens = self._take(keys=[f'{self.prefix}:{key}'], args=[capacity, rate, time.time(), cost])
+        return bool(allowed), float(tokens)
+
+    def reset(self, key: str):
+        self.client.delete(f'{self.prefix}:{key}')
+
+
+def parse_limit(spec: str) -> Tuple[float, float]:
+    """'20/60' -> (capacity 20, refill 20/60 tokens per second)"""
+    count, seconds = spec.split('/')
+    return float(count), float(count) / float(seconds)
+
+
+class RateLimiter:
+    """
+    Named token-bucket limits keyed by caller (IP, user id, phone number, email).
+
+    A bucket holds up to its limit's request count and refills continuously
+    over its period, so short bursts are allowed but the sustained rate is
+    capped. If the shared store is unreachable, requests are let through.
+    """
+
+    def __init__(self, store=None, limits: Optional[Dict[str, str]] = None, enabled: bool = True):
+        self.store = store or MemoryBucketStore()
+        self.limits = {name: parse_limit(spec) for name, spec in (limits or DEFAULT_LIMITS).items()}
+        self.enabled = enabled
+        self.rejected: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> 'RateLimiter':
+        """Limiter configured by the RATE_LIMIT_* environment variables"""
+        store = None
+        if os.environ.get('RATE_LIMIT_BACKEND', 'memory') == 'redis':
+            try:
+                store = RedisBucketStore(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable, using in-process buckets: {e}")
+        limits = {name: os.environ.get(f'RATE_LIMIT_{name.upper()}', spec) for name, spec in DEFAULT_LIMITS.items()}
+        return cls(store, limits, os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true')
+
+    def hit(self, name: str, key: str, cost: float = 1) -> float:
+        """Spend tokens; 0 if allowed, otherwise seconds until enough have refilled"""
+        if not self.enabled or key is None:
+            return 0.0
+        capacity, rate = self.limits[name]
+        try:
+            allowed, tokens = self.store.take(f'{name}:{key}', capacity, rate, cost)
+        except Exception as e:
+            logger.warning(f"Rate limit check '{name}' failed, allowing request: {e}")
+            return 0.0
+        if allowed:
+            return 0.0
+        self.rejected[name] = self.rejected.get(name, 0) + 1
+        return (cost - tokens) / rate
+
+    @property
+    def shared(self) -> bool:
+        """Whether every worker sees the same buckets (redis), not just its own"""
+        return getattr(self.store, 'shared', False)
+
+    def used(self, name: str, key: str) -> int:
+        """Whole tokens currently spent from a bucket, without spending more"""
+        return math.ceil(self.limits[name][0] - self._tokens(name, key))
+
+    def exhausted(self, name: str, key: str) -> bool:
+        """Whether a bucket has no whole token left"""
+        return self._tokens(name, key) < 1
+
+    def reset(self, name: str, key: str):
+        try:
+            self.store.reset(f'{name}:{key}')
+        except Exception as e:
+            logger.warning(f"Failed to reset rate limit '{name}': {e}")
+
+    def _tokens(self, name: str, key: str) -> float:
+        capacity, rate = self.limits[name]
+        if not self.enabled or key is None:
+            return capacity
+        try:
+            return self.store.take(f'{name}:{key}', capacity, rate, 0)[1]
+        except Exception as e:
+            logger.warning(f"Rate limit check '{name}' failed: {e}")
+            return capacity
+
+
+def too_many_requests(retry_after: float):
+    """429 response with a Retry-After header"""
+    response = jsonify({'error': 'Too many requests, please try again shortly'})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+
+def rate_limit(name: str, key_func: Callable[[], Optional[str]]):
+    """Reject the request with 429 before the view runs when the caller's bucket is empty"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            retry_after = rate_limiter.hit(name, key_func())
+            if retry_after:
+                logger.info(f"Rate limit '{name}' exceeded")
+                return too_many_requests(retry_after)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def client_ip() -> Optional[str]:
+    return request.remote_addr
+
+
+def current_user_id() -> Optional[str]:
+    from flask_jwt_extended import get_jwt_identity
+    return get_jwt_identity()
+
+
+rate_limiter = RateLimiter.from_env()
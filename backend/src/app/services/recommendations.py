@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding payloads inserted by the current transaction
+_PENDING = 'recommendation_blobs_pending'
+# Instance attribute holding (hash, payload) per hash column, assigned but not yet stored
+_UNFLUSHED = '_recommendation_blobs_unflushed'
+
+
+def content_hash(payload: Any) -> str:
+    """sha256 of the payload's canonical JSON; equal payloads always hash the same"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RecommendationStore:
+    """
+    Content-addressed storage for AI recommendation payloads.
+
+    Analyses with the same categorical inputs produce the same technical,
+    marketing and security output, so each distinct payload is stored once in
+    recommendation_blobs under its hash and projects keep only the hash.
+
+    Payloads are immutable once stored, so the per-process intern cache
+    never needs invalidating for reads: every project referencing a hash shares
+    one decoded object (treat it as read-only). Writes never trust it, since the
+    database may have been recreated under a long-lived process: a new
+    reference is always inserted, as a no-op on conflict, when the session
+    flushes.
+    """
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @classmethod
+    def from_env(cls) -> 'RecommendationStore':
+        return cls(int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 2048)))
+
+    def load(self, key: Optional[str]) -> Any:
+        """Payload for a hash, from the intern cache or recommendation_blobs"""
+        if key is None:
+            return None
+        payload = self._cached(key)
+        if payload is not None:
+            self.hits += 1
+            return payload
+
+        from ..models import db, RecommendationBlob
+        self.misses += 1
+        blob = db.session.get(RecommendationBlob, key)
+        if blob is None:
+            logger.error(f"Recommendation blob {key} is missing")
+            return None
+        self._remember(key, blob.payload)
+        return blob.payload
+
+    def clear(self):
+        """Forget cached payloads, e.g. when the database underneath was recreated"""
+        with self._lock:
+            self._payloads.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'cached': len(self._payloads), 'hits': self.hits, 'misses': self.misses, 'writes': self.writes}
+
+    def store_unflushed(self, session, flush_context, instances):
+        """before_flush: insert the blobs of payloads assigned since the last flush"""
+        written = session.info.setdefault(_PENDING, {})
+        for instance in list(session.new) + list(session.dirty):
+            for key, payload in getattr(instance, _UNFLUSHED, {}).values():
+                if key not in written:
+                    self._insert(session, key, payload)
+                    written[key] = payload
+
+    def _insert(self, session, key: str, payload: Any):
+        from ..models import RecommendationBlob
+
+        # Executed ahead of the flush, so the row exists before the project
+        # referencing it is inserted. Another worker may store the same payload
+        # concurrently; the conflict is a no-op.
+        dialect = session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            session.execute(
+                insert(RecommendationBlob).values(hash=key, payload=payload).on_conflict_do_nothing(index_elements=['hash'])
+            )
+        elif session.get(RecommendationBlob, key) is None:
+            # Ordered before the referencing project by the flush itself
+            session.add(RecommendationBlob(hash=key, payload=payload))
+        self.writes += 1
+
+    def committed(self, session):
+        # Only cached once committed: a rolled-back insert must be written again
+        for key, payload in session.info.pop(_PENDING, {}).items():
+            self._remember(key, payload)
+
+    def _cached(self, key: str) -> Any:
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+            return payload
+
+    def _remember(self, key: str, payload: Any):
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+
+
+recommendation_store = RecommendationStore.from_env()
+
+event.listen(Session, 'before_flush', recommendation_store.store_unflushed)
+event.listen(Session, 'after_commit', recommendation_store.committed)
+event.listen(Session, 'after_rollback', lambda session: session.info.pop(_PENDING, None))
+
+
+class InternedPayload:
+    """Model attribute whose JSON value lives in recommendation_blobs, referenced by a hash column"""
+
+    def __init__(self, hash_attribute: str):
+        self.hash_attribute = hash_attribute
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        key = getattr(instance, self.hash_attribute)
+        unflushed = getattr(instance, _UNFLUSHED, {}).get(self.hash_attribute)
+        if unflushed is not None and unflushed[0] == key:
+            return unflushed[1]
+        return recommendation_store.load(key)
+
+    def __set__(self, instance, payload):
+        # No SQL here: the blob is inserted by the before_flush listener
+        key = None if payload is None else content_hash(payload)
+        unflushed = instance.__dict__.setdefault(_UNFLUSHED, {})
+        if key is None:
+            unflushed.pop(self.hash_attribute, None)
+        else:
+            unflushed[self.hash_attribute] = (key, payload)
+        setattr(instance, self.hash_attribute, key)
@@ -0,0 +1,61 @@
+import os
+import logging
+from . import celery
+from .models import db
+
+logger = logging.getLogger(__name__)
+
+# Created lazily so only the Celery worker, not every web worker, pays for it
+_retraining_engine = None
+
+
+@celery.task(name='pricing.retrain_model')
+def retrain_pricing_model():
+    """Retrain the pricing model from real projects and publish it to the model store"""
+    global _retraining_engine
+    from .ai_team.pricing_engine import PricingEngine
+    from .ai_team.retraining import PricingModelRetrainer
+
+    if _retraining_engine is None:
+        _retraining_engine = PricingEngine()
+
+    retrainer = PricingModelRetrainer(
+        _retraining_engine,
+        chunk_size=int(os.environ.get('PRICING_RETRAIN_CHUNK_SIZE', 5000)),
+        min_rows=int(os.environ.get('PRICING_RETRAIN_MIN_ROWS', 200)),
+        max_rows=int(os.environ.get('PRICING_RETRAIN_MAX_ROWS', 50000))
+    )
+    try:
+        return retrainer.retrain(db.session)
+    finally:
+        db.session.remove()
+
+
+@celery.task(name='audit.write_batch')
+def write_audit_batch(rows):
+    """Bulk-insert a batch of audit events queued by a web worker"""
+    from .services.audit import audit_log_writer
+    try:
+        audit_log_writer.write_batch(rows)
+    finally:
+        db.session.remove()
+
+
+@celery.task(name='audit.maintain_partitions')
+def maintain_audit_partitions():
+    """Create upcoming audit log partitions and archive expired ones"""
+    from .services.audit_partitions import AuditPartitionManager
+    try:
+        return AuditPartitionManager.from_env().maintain(db.engine)
+    finally:
+        db.session.remove()
+
+
+@celery.task(name='whatsapp.process_message')
+def process_whatsapp_message(message_sid, from_number, body, ip_address=None, user_agent=None, received_at=None):
+    """Generate, send and audit the reply to an incoming WhatsApp message"""
+    from .routes.whatsapp import handle_incoming_message
+    try:
+        handle_incoming_message(message_sid, from_number, body, ip_address, user_agent, received_at)
+    finally:
+        db.session.remove()
@@ -16,6 +16,26 @@ def app():
         yield app
         db.drop_all()
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limits(monkeypatch):
+    """Give every test empty rate-limit buckets"""
+    from src.app.services.rate_limit import rate_limiter, MemoryBucketStore
+    monkeypatch.setattr(rate_limiter, 'store', MemoryBucketStore())
+
+@pytest.fixture(autouse=True)
+def audit_spill_dir(tmp_path, monkeypatch):
+    """Spill failed audit batches under the test's tmp_path, not the working tree"""
+    from src.app.services.audit import audit_log_writer
+    spill_dir = str(tmp_path / 'audit_spill')
+    # Apps created by the test read the variable; the session app is already configured
+    monkeypatch.setenv('AUDIT_LOG_SPILL_DIR', spill_dir)
+    monkeypatch.setattr(audit_log_writer, 'spill_dir', spill_dir)
+
+@pytest.fixture(autouse=True)
+def sync_audit_log(monkeypatch):
+    """Write audit events inside the request, so none are still queued when a test drops its database"""
+    monkeypatch.setenv('AUDIT_LOG_MODE', 'sync')
+
 @pytest.fixture
 def client(app):
     """Create test client"""
@@ -0,0 +1,106 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Replies with a fixed text, word by word over server-sent events when the
+request asks for stream=True, so streaming code can be tested offline.
+Run it on its own for manual testing and point the app at it:
+
+    python tests/fake_openai.py 8765
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=test ...
+"""
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Great news, simple websites start from R5,000 and we can usually deliver within two weeks. "
+    "E-commerce stores start from R15,000. Send us your requirements for a free AI-powered estimate!"
+)
+
+
+class FakeOpenAIServer:
+    def __init__(self, reply: str = DEFAULT_REPLY, delay: float = 0.01, port: int = 0):
+        self.reply = reply
+        self.delay = delay
+        self.requests = []
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}/v1'
+
+    def start(self) -> 'FakeOpenAIServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                fake.requests.append(body)
+                if body.get('stream'):
+                    self._stream(body)
+                else:
+                    self._complete(body)
+
+            def _complete(self, body):
+                payload = json.dumps({
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': fake.reply},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                words = fake.reply.split(' ')
+                for i, word in enumerate(words):
+                    self._event(body, {'content': word if i == 0 else ' ' + word}, None)
+                    time.sleep(fake.delay)
+                self._event(body, {}, 'stop')
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+
+            def _event(self, body, delta, finish_reason):
+                chunk = {
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+                }
+                self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    server = FakeOpenAIServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Fake OpenAI API at {server.base_url}")
+    server._server.serve_forever()
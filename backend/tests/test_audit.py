@@ -0,0 +1,136 @@
+import gzip
+import json
+import pytest
+from datetime import datetime
+from flask import Flask
+from sqlalchemy import inspect
+from src.app.models import db, AuditLog
+from src.app.services.audit import AuditLogWriter
+from src.app.services.audit_partitions import AuditPartitionManager
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['AUDIT_LOG_SPILL_DIR'] = str(tmp_path / 'audit_spill')
+    app.config['AUDIT_LOG_MODE'] = 'thread'
+    app.config['AUDIT_LOG_BATCH_SIZE'] = 50
+    app.config['AUDIT_LOG_FLUSH_SECONDS'] = 60
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+def test_audit_events_are_batched_and_flushed_on_shutdown(app):
+    writer = AuditLogWriter(app)
+    for i in range(120):
+        writer.log(None, 'WHATSAPP_MESSAGE_RECEIVED', 'WHATSAPP', f'SM-{i}', {'n': i}, '127.0.0.1')
+
+    writer.shutdown()
+
+    assert AuditLog.query.count() == 120
+    assert AuditLog.query.filter_by(resource_id='SM-7').one().details == {'n': 7}
+    stats = writer.stats()
+    assert stats['queue_depth'] == 0
+    assert stats['written'] == 120
+    assert stats['batches'] <= 4
+    assert stats['max_flush_latency_seconds'] is not None
+
+def test_audit_sync_mode_writes_immediately(app):
+    app.config['AUDIT_LOG_MODE'] = 'sync'
+    writer = AuditLogWriter(app)
+
+    event_id = writer.log(None, 'LOGIN_FAILED', 'USER', 'user-1', {'reason': 'Invalid credentials'})
+
+    assert db.session.get(AuditLog, event_id).action == 'LOGIN_FAILED'
+    assert writer.stats()['enqueued'] == 0
+
+def test_cold_months_are_rolled_out_and_expired_ones_archived(app, tmp_path):
+    app.config['AUDIT_LOG_MODE'] = 'sync'
+    writer = AuditLogWriter(app)
+    for month in (1, 3, 5, 6):
+        writer.log(None, 'LOGIN_FAILED', 'USER', f'user-{month}', {'month': month})
+        db.session.query(AuditLog).filter_by(resource_id=f'user-{month}').update({'created_at': datetime(2026, month, 15)})
+    db.session.commit()
+    
+    manager = AuditPartitionManager(hot_months=2, retention_months=3, archive_dir=str(tmp_path))
+    summary = manager.maintain(db.engine, now=datetime(2026, 6, 20))
+    
+    assert summary['rolled'] == ['audit_logs_p202601', 'audit_logs_p202603']
+    assert [row.resource_id for row in AuditLog.query.order_by(AuditLog.created_at)] == ['user-5', 'user-6']
+    assert manager.partitions(db.engine) == ['audit_logs_p202603']
+    assert 'audit_logs_p202601' not in inspect(db.engine).get_table_names()
+    
+    with gzip.open(summary['archived'][0], 'rt') as archive:
+        rows = [json.loads(line) for line in archive]
+    assert [row['details'] for row in rows] == [{'month': 1}]
+    assert rows[0]['created_at'] == '2026-01-15T00:00:00'
+
+def test_failed_audit_batches_are_spilled_and_replayed(app, tmp_path, monkeypatch):
+    from src.app.services import audit
+    app.config['AUDIT_LOG_WRITE_RETRIES'] = 1
+    app.config['AUDIT_LOG_RETRY_BACKOFF_SECONDS'] = 0
+    writer = AuditLogWriter(app)
+    spill_dir = tmp_path / 'audit_spill'
+    
+    bulk_insert = audit._bulk_insert
+    calls = []
+    def flaky_insert(db, model, rows):
+        calls.append(len(rows))
+        # The first batch fails on the first try and on its retry
+        if len(calls) <= 2:
+            raise RuntimeError('database is locked')
+        bulk_insert(db, model, rows)
+    monkeypatch.setattr(audit, '_bulk_insert', flaky_insert)
+    
+    for i in range(50):
+        writer.log(None, 'LOGIN_FAILED', 'USER', f'user-{i}')
+    writer.shutdown()
+    
+    assert AuditLog.query.count() == 0
+    assert len(list(spill_dir.glob('*.jsonl'))) == 1
+    
+    # The next successful batch replays the spilled one
+    writer.log(None, 'LOGIN_FAILED', 'USER', 'user-50')
+    writer.shutdown()
+    
+    assert AuditLog.query.count() == 51
+    assert AuditLog.query.filter_by(resource_id='user-7').one().created_at is not None
+    assert list(spill_dir.iterdir()) == []
+    stats = writer.stats()
+    assert stats['retried'] == 1
+    assert stats['spilled'] == 50
+    assert stats['replayed'] == 50
+
+def test_only_the_refused_audit_rows_are_rejected(app, tmp_path, monkeypatch):
+    from sqlalchemy.exc import IntegrityError
+    from src.app.services import audit
+    writer = AuditLogWriter(app)
+    spill_dir = tmp_path / 'audit_spill'
+    
+    bulk_insert = audit._bulk_insert
+    def refuse_deleted_user(db, model, rows):
+        if any(row['user_id'] == 'deleted-user' for row in rows):
+            raise IntegrityError('INSERT INTO audit_logs', {}, Exception('FOREIGN KEY constraint failed'))
+        bulk_insert(db, model, rows)
+    monkeypatch.setattr(audit, '_bulk_insert', refuse_deleted_user)
+    
+    for i in range(20):
+        writer.log('deleted-user' if i == 13 else None, 'LOGIN_FAILED', 'USER', f'user-{i}')
+    writer.shutdown()
+    
+    assert AuditLog.query.count() == 19
+    rejected = list(spill_dir.glob('*.jsonl.rejected'))
+    assert len(rejected) == 1
+    assert json.loads(rejected[0].read_text())['resource_id'] == 'user-13'
+    assert writer.stats()['retried'] == 0
+    
+    # Replaying a spilled batch rejects the same way
+    writer._spill([dict(row, id=f'replayed-{i}', created_at=datetime(2026, 10, 1))
+                   for i, row in enumerate([{'user_id': None, 'action': 'A'}, {'user_id': 'deleted-user', 'action': 'B'}])])
+    assert writer.replay_spilled() == 1
+    assert db.session.get(AuditLog, 'replayed-0').action == 'A'
+    assert len(list(spill_dir.glob('*.jsonl.rejected'))) == 2
+    assert list(spill_dir.glob('*.jsonl')) == []
@@ -2,6 +2,9 @@ import pytest
 import json
 from src.app import create_app, db
 from src.app.models import User
+from src.app.services.passwords import PasswordHasher, PasswordHasherBusy, password_hasher
+from src.app.services.rate_limit import RateLimiter, MemoryBucketStore
+from src.app.services.identity_cache import identity_cache
 
 @pytest.fixture
 def app():
@@ -135,3 +138,137 @@ def test_password_validation(client):
     }
     response = client.post('/api/auth/register', json=weak_password_data)
     assert response.status_code == 400
+
+def test_password_hasher_backpressure():
+    hasher = PasswordHasher(workers=0, max_pending=1, rounds=4, queue_timeout=0)
+    hashed = hasher.hash('TestPass123')
+    assert hasher.verify('TestPass123', hashed)
+    assert not hasher.needs_rehash(hashed)
+    
+    hasher._slots.acquire()
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.verify('TestPass123', hashed)
+    finally:
+        hasher._slots.release()
+    assert hasher.stats()['rejected'] == 1
+
+def test_password_hasher_replaces_a_broken_pool():
+    import os
+    import signal
+    hasher = PasswordHasher(workers=1, rounds=4)
+    try:
+        hashed = hasher.hash('TestPass123')
+        broken = hasher._executor
+        
+        # Kill the pool process as the OOM killer would
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+        
+        assert hasher.verify('TestPass123', hashed)
+        assert hasher._executor is not broken
+        assert hasher.verify('TestPass123', hashed)
+    finally:
+        hasher.shutdown()
+
+def test_login_returns_429_when_hashing_saturated(client, auth_headers, monkeypatch):
+    def busy(password, hashed):
+        raise PasswordHasherBusy()
+    monkeypatch.setattr(password_hasher, 'verify', busy)
+    
+    response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'TestPass123'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+
+def test_login_rehashes_when_cost_changes(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(password_hasher, 'rounds', 5)
+    
+    response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'TestPass123'})
+    assert response.status_code == 200
+    assert User.query.filter_by(email='test@example.com').first().password_hash.startswith('$2b$05$')
+
+def test_rate_limiter_token_bucket():
+    limiter = RateLimiter(MemoryBucketStore(), {'test': '2/60'})
+    
+    assert limiter.hit('test', '10.0.0.1') == 0
+    assert limiter.hit('test', '10.0.0.1') == 0
+    assert limiter.hit('test', '10.0.0.1') == pytest.approx(30, rel=0.01)
+    assert limiter.hit('test', '10.0.0.2') == 0
+    
+    limiter.reset('test', '10.0.0.1')
+    assert limiter.hit('test', '10.0.0.1') == 0
+
+def test_login_rate_limit_is_per_forwarded_client(client, monkeypatch):
+    from src.app.services.rate_limit import rate_limiter, parse_limit
+    monkeypatch.setitem(rate_limiter.limits, 'login_ip', parse_limit('1/60'))
+    
+    def login(ip):
+        return client.post('/api/auth/login', json={'email': 'nobody@example.com', 'password': 'x'},
+                           headers={'X-Forwarded-For': ip})
+    
+    assert login('198.51.100.1').status_code == 401
+    assert login('198.51.100.1').status_code == 429
+    # Same ingress address, different caller
+    assert login('198.51.100.2').status_code == 401
+
+def test_login_lockout_skips_bcrypt(client, auth_headers, monkeypatch):
+    for _ in range(5):
+        response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'WrongPass123'})
+        assert response.status_code == 401
+    
+    verified = []
+    monkeypatch.setattr(password_hasher, 'verify', lambda password, hashed: verified.append(password) or True)
+    response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'TestPass123'})
+    
+    assert response.status_code == 423
+    assert verified == []
+    # The in-process limiter is not shared, so the lockout is also kept on the user
+    assert User.query.filter_by(email='test@example.com').first().failed_login_attempts == 5
+
+def test_login_lockout_holds_across_workers_with_per_process_limiters(client, auth_headers, monkeypatch):
+    from src.app.routes import auth
+    # Two gunicorn workers, each with its own in-process buckets
+    workers = [RateLimiter(MemoryBucketStore()), RateLimiter(MemoryBucketStore())]
+    
+    def login(worker, password):
+        monkeypatch.setattr(auth, 'rate_limiter', workers[worker])
+        return client.post('/api/auth/login', json={'email': 'test@example.com', 'password': password})
+    
+    for attempt in range(5):
+        assert login(attempt % 2, 'WrongPass123').status_code == 401
+    
+    # Neither worker has seen 5 failures itself, yet both refuse the right password
+    assert login(0, 'TestPass123').status_code == 423
+    assert login(1, 'TestPass123').status_code == 423
+
+def test_login_lockout_uses_a_shared_limiter_alone(client, auth_headers, monkeypatch):
+    from src.app.routes import auth
+    class SharedStore(MemoryBucketStore):
+        shared = True
+    # Two workers reaching the same buckets, as with the redis backend
+    store = SharedStore()
+    workers = [RateLimiter(store), RateLimiter(store)]
+    
+    for attempt in range(5):
+        monkeypatch.setattr(auth, 'rate_limiter', workers[attempt % 2])
+        response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'WrongPass123'})
+        assert response.status_code == 401
+    
+    response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'TestPass123'})
+    assert response.status_code == 423
+    assert User.query.filter_by(email='test@example.com').first().failed_login_attempts == 0
+
+def test_me_is_served_from_identity_cache_until_user_changes(client, auth_headers):
+    client.get('/api/auth/me', headers=auth_headers)
+    hits = identity_cache.hits
+    
+    response = client.get('/api/auth/me', headers=auth_headers)
+    assert identity_cache.hits == hits + 1
+    assert json.loads(response.data)['user']['first_name'] == 'Test'
+    
+    user = User.query.filter_by(email='test@example.com').first()
+    user.first_name = 'Renamed'
+    db.session.commit()
+    
+    response = client.get('/api/auth/me', headers=auth_headers)
+    assert json.loads(response.data)['user']['first_name'] == 'Renamed'
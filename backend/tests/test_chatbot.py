@@ -0,0 +1,161 @@
+import time
+import pytest
+from src.app.ai_team.response_cache import ResponseCache, MemoryCacheBackend, normalize_message
+from src.app.ai_team.context_store import ConversationContext, MemoryContextStore
+from src.app.ai_team.intent_classifier import KeywordIntentClassifier, ModelIntentClassifier, train_intent_model
+from src.app.services.http_clients import CircuitBreaker, CircuitOpenError, Upstream, reset_clients
+
+def test_normalize_message():
+    assert normalize_message('  How much for a WEBSITE?! ') == 'how much for a website'
+
+def test_response_cache_exact_hit():
+    cache = ResponseCache(MemoryCacheBackend(maxsize=10))
+    
+    assert cache.get('pricing_inquiry', 'How much for a website?') is None
+    cache.set('pricing_inquiry', 'How much for a website?', 'From R5,000!')
+    
+    assert cache.get('pricing_inquiry', 'how much for a website') == 'From R5,000!'
+    assert cache.get('project_help', 'how much for a website') is None
+    assert cache.stats() == {'hits': 1, 'near_hits': 0, 'misses': 2, 'hit_rate': 0.3333}
+
+def test_response_cache_near_duplicate():
+    cache = ResponseCache(MemoryCacheBackend(maxsize=10), similarity_threshold=0.85)
+    cache.set('pricing_inquiry', 'how much would a simple website cost me', 'From R5,000!')
+    
+    assert cache.get('pricing_inquiry', 'how much would a simple website cost') == 'From R5,000!'
+    assert cache.get('pricing_inquiry', 'what are your hours') is None
+    assert cache.stats()['near_hits'] == 1
+
+def test_response_cache_ttl_and_size():
+    backend = MemoryCacheBackend(maxsize=2)
+    cache = ResponseCache(backend, ttl=0)
+    cache.set('greeting', 'hi', 'Hello!')
+    assert cache.get('greeting', 'hi') is None
+    
+    cache = ResponseCache(backend, ttl=60)
+    for message in ['one', 'two', 'three']:
+        cache.set('general_inquiry', message, message.upper())
+    assert cache.get('general_inquiry', 'one') is None
+    assert cache.get('general_inquiry', 'three') == 'THREE'
+
+def test_conversation_context_is_bounded():
+    context = ConversationContext(max_history=3)
+    for i in range(10):
+        context.add_turn(f'message {i} ' + 'x' * 1000, 'reply', 'general_inquiry')
+    
+    assert len(context.history) == 3
+    assert context.history[0][0].startswith('message 7')
+    assert all(len(turn[0]) == 500 for turn in context.history)
+    
+    restored = ConversationContext.from_dict(context.to_dict(), max_history=3)
+    assert list(restored.history) == list(context.history)
+    assert not restored.dirty
+
+def test_memory_context_store_lru_and_write_back():
+    store = MemoryContextStore(maxsize=2, ttl=60, max_history=5)
+    context = store.get('+27000000001')
+    context.set_stage('active')
+    context.add_turn('hi', 'Hello!', 'greeting')
+    assert context.dirty
+    store.save('+27000000001', context)
+    assert not context.dirty
+    
+    assert store.get('+27000000001').conversation_stage == 'active'
+    store.get('+27000000002')
+    store.get('+27000000003')
+    
+    stats = store.stats()
+    assert stats['conversations'] == 2
+    assert stats['approx_bytes'] > 0
+    assert store.get('+27000000001').conversation_stage == 'greeting'
+
+def test_keyword_intent_classifier_priority():
+    classifier = KeywordIntentClassifier()
+    
+    assert classifier.classify('Hi, how much for a website?') == 'pricing_inquiry'
+    assert classifier.classify('I want to BUILD an app') == 'project_help'
+    assert classifier.classify('hissue') == 'technical_support'
+    assert classifier.classify('Can you promote my brand on social media') == 'marketing_info'
+    assert classifier.classify('Good morning') == 'greeting'
+    assert classifier.classify('Ok thanks') == 'general_inquiry'
+
+def test_model_intent_classifier_falls_back_to_keywords():
+    messages = ['how much is a website', 'what does an app cost', 'build me a store', 'develop a booking system']
+    pipeline = train_intent_model(messages, ['pricing_inquiry', 'pricing_inquiry', 'project_help', 'project_help'])
+    
+    assert ModelIntentClassifier(pipeline, min_confidence=0.0).classify('how much for a website') == 'pricing_inquiry'
+    assert ModelIntentClassifier(pipeline, min_confidence=1.0).classify('hello there') == 'greeting'
+
+def test_streaming_reply_sends_first_sentence_early(monkeypatch):
+    pytest.importorskip('openai')
+    from fake_openai import FakeOpenAIServer
+    from src.app.ai_team.chatbot import ChatbotAI
+    
+    server = FakeOpenAIServer(delay=0.01).start()
+    monkeypatch.setenv('OPENAI_BASE_URL', server.base_url)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setenv('CHATBOT_STREAMING', 'true')
+    reset_clients()
+    try:
+        chatbot = ChatbotAI()
+        sent = []
+        
+        response = chatbot.process_whatsapp_message('What would a website cost?', '+27720000003', send_early=sent.append)
+    finally:
+        server.stop()
+        reset_clients()
+    
+    assert server.requests[0]['stream'] is True
+    assert sent == ['Great news, simple websites start from R5,000 and we can usually deliver within two weeks.']
+    assert response.startswith(sent[0])
+    assert 'E-commerce stores start from R15,000.' in response
+    assert response.endswith('https://synthai.co.za/pricing')
+
+def test_upstream_retries_then_opens_circuit():
+    calls = []
+    def flaky():
+        calls.append(1)
+        raise ConnectionError('upstream down')
+    
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=60)
+    upstream = Upstream('test', lambda e: isinstance(e, ConnectionError), retries=2, backoff_base=0, breaker=breaker)
+    
+    with pytest.raises(ConnectionError):
+        upstream.call(flaky)
+    assert len(calls) == 3
+    with pytest.raises(CircuitOpenError):
+        upstream.call(flaky)
+    assert len(calls) == 3
+    
+    breaker.opened_at -= 60
+    assert upstream.call(lambda: 'ok') == 'ok'
+    assert breaker.state == 'closed'
+
+def test_open_circuit_uses_fallback_reply(monkeypatch):
+    pytest.importorskip('openai')
+    from src.app.ai_team.chatbot import ChatbotAI
+    from src.app.services.http_clients import openai_upstream
+    
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(openai_upstream.breaker, 'opened_at', time.monotonic())
+    
+    response = ChatbotAI().process_whatsapp_message('What is the price of a website?', '+27720000004')
+    assert 'https://synthai.co.za/pricing' in response
+
+def test_twilio_client_is_built_with_connect_and_read_timeouts(monkeypatch):
+    from src.app.services.http_clients import get_twilio_client
+    monkeypatch.setenv('TWILIO_ACCOUNT_SID', 'AC' + '0' * 32)
+    monkeypatch.setenv('TWILIO_AUTH_TOKEN', 'token')
+    monkeypatch.setenv('OUTBOUND_CONNECT_TIMEOUT_SECONDS', '2')
+    monkeypatch.setenv('OUTBOUND_TIMEOUT_SECONDS', '9')
+    reset_clients()
+    
+    client = get_twilio_client()
+    assert client.http_client.timeout == 9.0
+    
+    sent = []
+    adapter = client.http_client.session.get_adapter('https://api.twilio.com')
+    monkeypatch.setattr('requests.adapters.HTTPAdapter.send', lambda self, request, **kwargs: sent.append(kwargs['timeout']))
+    adapter.send(object(), timeout=client.http_client.timeout)
+    assert sent == [(2.0, 9.0)]
+    reset_clients()
@@ -0,0 +1,45 @@
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, exc, text
+from src.app.models import db
+from src.app.services.db_engine import engine_options, engine_profile, instrument_engine, pool_metrics, pool_stats
+
+def test_postgres_profile_sets_pool_and_statement_timeout():
+    options = engine_options('postgresql://user:secret@db:5432/synthai', engine_profile('web'))
+    
+    assert options['pool_size'] == 5
+    assert options['pool_pre_ping'] is True
+    assert options['pool_recycle'] == 1800
+    assert options['connect_args']['options'] == '-c statement_timeout=15000'
+    assert engine_options('sqlite:///:memory:') == {}
+
+def test_sqlite_file_uses_wal_and_reports_pool_usage(tmp_path):
+    uri = f'sqlite:///{tmp_path}/synthai.db'
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri, engine_profile('test'))
+    db.init_app(app)
+    pool_metrics.reset()
+    
+    with app.app_context():
+        instrument_engine(db.engine)
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert pool_stats(db.engine)['active'] == 1
+        db.session.remove()
+        
+        stats = pool_stats(db.engine)
+        assert stats['active'] == 0
+        assert stats['checkouts'] == 1
+        assert stats['max_wait_ms'] >= 0
+
+def test_pool_timeouts_are_counted(tmp_path):
+    options = dict(engine_options(f'sqlite:///{tmp_path}/synthai.db', engine_profile('test')), max_overflow=0, pool_size=1, pool_timeout=0.05)
+    engine = create_engine(f'sqlite:///{tmp_path}/synthai.db', **options)
+    pool_metrics.reset()
+    
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    
+    assert pool_metrics.stats()['timeouts'] == 1
+    assert pool_metrics.stats()['max_wait_ms'] >= 50
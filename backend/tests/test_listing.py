@@ -0,0 +1,138 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from src.app.models import db, User, Project, AuditLog, RecommendationBlob
+from src.app.routes.projects import projects_bp
+from src.app.routes.audit import audit_bp
+from src.app.services.recommendations import recommendation_store
+from src.app.services.listing import decode_cursor, stream_listing
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key'
+    db.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(projects_bp, url_prefix='/api/projects')
+    app.register_blueprint(audit_bp, url_prefix='/api/audit')
+    
+    with app.app_context():
+        db.create_all()
+        recommendation_store.clear()
+        yield app
+        db.drop_all()
+
+@pytest.fixture
+def user(app):
+    user = User(email='test@example.com', password_hash='x', first_name='Test', last_name='User')
+    db.session.add(user)
+    db.session.commit()
+    
+    started = datetime(2026, 10, 1)
+    for i in range(7):
+        db.session.add(Project(
+            user_id=user.id, title=f'Project {i}', description='Shop', project_type='web',
+            complexity='simple', timeline='1 month', team_size='1', estimated_price_zar=1000 + i,
+            technical_recommendations={'stack': ['flask'] * 100}, created_at=started + timedelta(hours=i)
+        ))
+        db.session.add(AuditLog(user_id=user.id, action='LOGIN_SUCCESSFUL', resource_type='USER',
+                                resource_id=user.id, details={'n': i}, created_at=started + timedelta(hours=i)))
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def headers(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+
+def test_projects_are_paged_by_cursor_without_blobs(client_pages):
+    pages = client_pages('/api/projects?limit=3')
+    
+    titles = [item['title'] for page in pages for item in page['items']]
+    assert titles == [f'Project {i}' for i in range(6, -1, -1)]
+    assert [len(page['items']) for page in pages] == [3, 3, 1]
+    assert pages[-1]['next_cursor'] is None
+    assert 'technical_recommendations' not in pages[0]['items'][0]
+    assert 'description' not in pages[0]['items'][0]
+
+def test_field_selection(app, headers):
+    client = app.test_client()
+    
+    response = client.get('/api/projects?fields=title,technical_recommendations&limit=1', headers=headers)
+    item = json.loads(response.data)['items'][0]
+    assert set(item) == {'id', 'created_at', 'title', 'technical_recommendations'}
+    assert item['technical_recommendations']['stack'][0] == 'flask'
+    
+    assert client.get('/api/projects?fields=password_hash', headers=headers).status_code == 400
+    assert client.get('/api/projects?cursor=not-a-cursor', headers=headers).status_code == 400
+
+def test_audit_listing_filters_and_pages(app, headers):
+    client = app.test_client()
+    response = client.get('/api/audit?since=2026-10-01T03:00:00&limit=2&fields=action,details', headers=headers)
+    page = json.loads(response.data)
+    
+    assert [item['details']['n'] for item in page['items']] == [6, 5]
+    response = client.get(f"/api/audit?since=2026-10-01T03:00:00&limit=2&cursor={page['next_cursor']}", headers=headers)
+    assert [item['id'] for item in json.loads(response.data)['items']] != [item['id'] for item in page['items']]
+    assert 'details' not in json.loads(response.data)['items'][0]
+
+def test_recommendations_are_stored_once_per_payload(app, user):
+    assert RecommendationBlob.query.count() == 1
+    
+    project = Project.query.filter_by(user_id=user.id).first()
+    assert len(project.technical_recommendations_hash) == 64
+    assert project.to_dict()['technical_recommendations'] == {'stack': ['flask'] * 100}
+    assert project.to_dict()['security_assessment'] is None
+
+def test_recommendations_are_stored_again_after_the_database_is_recreated(app, user):
+    # The payload is in the intern cache from the user fixture's commit
+    db.drop_all()
+    db.create_all()
+    user = User(email='again@example.com', password_hash='x', first_name='Test', last_name='User')
+    db.session.add(user)
+    db.session.commit()
+    
+    project = Project(
+        user_id=user.id, title='Again', description='Shop', project_type='web', complexity='simple',
+        timeline='1 month', team_size='1', estimated_price_zar=1000, technical_recommendations={'stack': ['flask'] * 100}
+    )
+    # Nothing is written until the project is flushed
+    assert RecommendationBlob.query.count() == 0
+    assert project.technical_recommendations == {'stack': ['flask'] * 100}
+    
+    db.session.add(project)
+    db.session.commit()
+    assert RecommendationBlob.query.count() == 1
+    assert db.session.get(Project, project.id).to_dict()['technical_recommendations']['stack'][0] == 'flask'
+
+def test_listing_that_fails_mid_stream_still_ends_in_valid_json(app):
+    def rows():
+        yield {'id': 'a', 'created_at': datetime(2026, 10, 2)}
+        yield {'id': 'b', 'created_at': datetime(2026, 10, 1)}
+        raise RuntimeError('canceling statement due to statement timeout')
+    
+    with app.test_request_context():
+        response = stream_listing(rows(), limit=5)
+        page = json.loads(response.get_data())
+    
+    assert response.status_code == 200
+    assert [item['id'] for item in page['items']] == ['a', 'b']
+    assert page['error'] == 'Listing interrupted'
+    assert decode_cursor(page['next_cursor']) == (datetime(2026, 10, 1), 'b')
+
+@pytest.fixture
+def client_pages(app, headers):
+    def walk(url):
+        client = app.test_client()
+        pages = []
+        cursor = None
+        while True:
+            response = client.get(url + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+            assert response.status_code == 200
+            pages.append(json.loads(response.data))
+            cursor = pages[-1]['next_cursor']
+            if not cursor:
+                return pages
+    return walk
@@ -135,3 +135,210 @@ def test_pricing_accuracy():
     assert result['final_price_zar'] > 0
     assert result['confidence_score'] > 0
     assert 'price_breakdown' in result
+
+def test_analyze_batch(client, auth_headers):
+    projects = [
+        {
+            'description': f'Test project {i}',
+            'project_type': 'web',
+            'complexity': complexity,
+            'timeline': 'standard',
+            'team_size': 'small'
+        }
+        for i, complexity in enumerate(['simple', 'medium', 'complex', 'very-complex'])
+    ]
+    
+    response = client.post('/api/pricing/analyze-batch', 
+                          json={'projects': projects}, 
+                          headers=auth_headers)
+    assert response.status_code == 200
+    
+    data = json.loads(response.data)
+    assert data['count'] == 4
+    assert all(result['currency'] == 'ZAR' for result in data['pricing'])
+
+def test_analyze_batch_missing_fields(client, auth_headers):
+    response = client.post('/api/pricing/analyze-batch', 
+                          json={'projects': [{'description': 'Test project'}]}, 
+                          headers=auth_headers)
+    assert response.status_code == 400
+
+def test_calculate_price_many_matches_single():
+    from src.app.ai_team.pricing_engine import PricingEngine
+    pricing_engine = PricingEngine()
+    
+    projects = [
+        {
+            'description': 'Mobile app with API and cloud backend ' * length,
+            'project_type': project_type,
+            'complexity': complexity,
+            'timeline': 'urgent',
+            'team_size': 'medium'
+        }
+        for project_type in ['web', 'mobile', 'ai', 'unknown']
+        for complexity in ['simple', 'medium', 'complex', 'very-complex']
+        for length in [1, 20, 40]
+    ]
+    
+    assert pricing_engine.calculate_price_many(projects) == [
+        pricing_engine.calculate_price(project) for project in projects
+    ]
+
+def test_price_table_matches_multipliers():
+    from src.app.ai_team.pricing_engine import PricingEngine
+    pricing_engine = PricingEngine()
+    
+    for project_type, base_price in pricing_engine.affordable_base_prices.items():
+        for complexity, complexity_mult in pricing_engine.complexity_multipliers.items():
+            for timeline, timeline_mult in pricing_engine.timeline_multipliers.items():
+                for team_size, team_mult in pricing_engine.team_multipliers.items():
+                    project = {
+                        'description': 'x' * 600,
+                        'project_type': project_type,
+                        'complexity': complexity,
+                        'timeline': timeline,
+                        'team_size': team_size
+                    }
+                    price = base_price * complexity_mult * timeline_mult * team_mult
+                    
+                    result = pricing_engine._simple_affordable_calculation(project)
+                    assert result['final_price_zar'] == round(max(price * 1.05, 5000) / 500) * 500
+                    
+                    result = pricing_engine._affordable_fallback_calculation(project)
+                    assert result['final_price_zar'] == round(max(price, 5000) / 500) * 500
+
+def test_model_store_roundtrip(tmp_path):
+    from sklearn.ensemble import RandomForestRegressor
+    from src.app.ai_team.model_store import ModelStore
+    
+    X = [[i, i % 3] for i in range(50)]
+    y = [i * 2.0 for i in range(50)]
+    model = RandomForestRegressor(n_estimators=5, random_state=42).fit(X, y)
+    
+    store = ModelStore(str(tmp_path))
+    version = store.save('pricing', model)
+    
+    # Identical content hashes to the same version
+    assert store.save('pricing', model) == version
+    assert store.current_version('pricing') == version
+    
+    loaded = store.load('pricing')
+    assert list(loaded.predict(X)) == list(model.predict(X))
+    assert store.metrics['pricing']['version'] == version
+    
+    arrays = store.load_forest_arrays('pricing')
+    assert len(arrays['tree_offsets']) == 6
+
+def test_compiled_forest_matches_sklearn():
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from src.app.ai_team.model_store import flatten_forest
+    from src.app.ai_team.compiled_forest import CompiledForest
+    
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 2000, size=(500, 6))
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) * 50
+    model = RandomForestRegressor(n_estimators=20, max_depth=15, random_state=42).fit(X, y)
+    compiled = CompiledForest(flatten_forest(model))
+    
+    X_test = rng.uniform(0, 2000, size=(200, 6))
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+    assert compiled.predict(X_test[0])[0] == model.predict(X_test[:1])[0]
+
+def test_training_matrix_is_deterministic():
+    import numpy as np
+    from src.app.ai_team.pricing_engine import PricingEngine
+    pricing_engine = PricingEngine()
+    
+    X1, y1 = pricing_engine._generate_affordable_training_matrix(5000, seed=7)
+    X2, y2 = pricing_engine._generate_affordable_training_matrix(5000, seed=7)
+    
+    assert X1.shape == (5000, 6)
+    assert np.array_equal(X1, X2) and np.array_equal(y1, y2)
+    assert y1.min() >= 5000
+
+def test_retrain_from_projects_hot_swaps(app, tmp_path, monkeypatch):
+    from src.app.ai_team.pricing_engine import PricingEngine
+    from src.app.ai_team.retraining import PricingModelRetrainer
+    monkeypatch.setenv('MODEL_STORE_DIR', str(tmp_path))
+    
+    user = User(email='retrain@example.com', first_name='Re', last_name='Train')
+    user.set_password('TestPass123')
+    db.session.add(user)
+    db.session.flush()
+    for i in range(250):
+        db.session.add(Project(
+            user_id=user.id,
+            title=f'Project {i}',
+            description='API and cloud backend ' * (i % 20),
+            project_type='web',
+            complexity='complex',
+            timeline='urgent',
+            team_size='medium',
+            estimated_price_zar=60000 + i * 10
+        ))
+    # Rule-priced projects never come from the model, so they are not trained on
+    for i in range(50):
+        db.session.add(Project(
+            user_id=user.id,
+            title=f'Simple {i}',
+            description='Landing page',
+            project_type='web',
+            complexity='simple',
+            timeline='normal',
+            team_size='small',
+            estimated_price_zar=5000
+        ))
+    db.session.commit()
+    
+    pricing_engine = PricingEngine()
+    initial_version = pricing_engine.model_version
+    
+    summary = PricingModelRetrainer(pricing_engine, chunk_size=100).retrain(db.session)
+    assert summary['rows'] == 250
+    assert summary['version'] != initial_version
+    
+    assert pricing_engine.refresh_model()
+    assert pricing_engine.model_version == summary['version']
+
+def test_retrain_sample_is_bounded():
+    import numpy as np
+    from src.app.ai_team.retraining import PricingModelRetrainer
+    
+    retrainer = PricingModelRetrainer(engine=None, max_rows=100, seed=0)
+    chunks = ((np.full((40, 6), i, dtype=float), np.arange(i * 40, i * 40 + 40, dtype=float)) for i in range(25))
+    X, y, seen = retrainer.sample(chunks)
+    assert seen == 1000
+    assert X.shape == (100, 6) and y.shape == (100,)
+    assert len(set(y)) == 100
+    # Rows from late chunks make it in, not just the first max_rows
+    assert y.max() >= 500
+    assert np.array_equal(X[:, 0], y // 40)
+
+def test_analyzer_orchestrator_caches_and_times_out():
+    import time
+    from src.app.ai_team.orchestrator import AnalyzerOrchestrator
+    
+    calls = []
+    def recommend(data):
+        calls.append(data['project_type'])
+        return {'stack': [data['project_type']]}
+    
+    def slow(data):
+        time.sleep(0.5)
+        return 'late'
+    
+    orchestrator = AnalyzerOrchestrator(max_workers=4)
+    orchestrator.register('technical', recommend, cache_key=lambda data: data['project_type'])
+    orchestrator.register('slow', slow, timeout=0.05, fallback=lambda data: 'fallback')
+    
+    first = orchestrator.run({'project_type': 'web'})
+    second = orchestrator.run({'project_type': 'web'})
+    
+    assert first == second == {'technical': {'stack': ['web']}, 'slow': 'fallback'}
+    assert calls == ['web']
+    assert orchestrator.stats()['technical']['hits'] == 1
+    
+    # Cached results are copies, so callers can't corrupt the cache
+    second['technical']['stack'].append('mutated')
+    assert orchestrator.run({'project_type': 'web'})['technical'] == {'stack': ['web']}
@@ -0,0 +1,96 @@
+import os
+import pytest
+from datetime import datetime, timedelta
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, select, text
+from src.app.models import db, Project, AuditLog
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SINCE = datetime(2026, 1, 1)
+
+# The access patterns the indexes are built for, with the index each must use
+QUERIES = {
+    'ix_projects_user_id_created_at': select(Project.id).where(Project.user_id == 'user-1').order_by(Project.created_at.desc()),
+    'ix_projects_status_created_at': select(Project.id).where(Project.status == 'draft').order_by(Project.created_at.desc()),
+    'ix_audit_logs_resource_created_at': select(AuditLog.id).where(
+        AuditLog.resource_type == 'USER', AuditLog.resource_id == 'user-1'
+    ).order_by(AuditLog.created_at.desc()),
+    'ix_audit_logs_user_id_created_at': select(AuditLog.id).where(AuditLog.user_id == 'user-1', AuditLog.created_at >= SINCE),
+    'ix_audit_logs_action_created_at': select(AuditLog.id).where(AuditLog.action == 'LOGIN_FAILED', AuditLog.created_at >= SINCE),
+    'ix_audit_logs_created_at': select(AuditLog.id).where(AuditLog.created_at.between(SINCE, SINCE + timedelta(days=1))),
+}
+
+def migrate(engine):
+    """Build the pre-migration schema, then run alembic upgrade head on it"""
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for table in ('projects', 'audit_logs'):
+            for index in inspect(connection).get_indexes(table):
+                connection.execute(text(f'DROP INDEX {index["name"]}'))
+        connection.execute(text('CREATE INDEX ix_projects_user_id ON projects (user_id)'))
+        connection.execute(text('CREATE INDEX ix_audit_logs_user_id ON audit_logs (user_id)'))
+    
+    config = Config(os.path.join(BACKEND_DIR, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(BACKEND_DIR, 'migrations'))
+    with engine.connect() as connection:
+        config.attributes['connection'] = connection
+        command.upgrade(config, 'head')
+        connection.commit()
+
+def plan(connection, query):
+    sql = str(query.compile(connection, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        return ' '.join(row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+    # Tiny test tables would otherwise always be scanned sequentially
+    connection.execute(text('SET enable_seqscan = off'))
+    return ' '.join(row[0] for row in connection.execute(text(f'EXPLAIN {sql}')))
+
+def check_plans(engine):
+    migrate(engine)
+    
+    indexes = {index['name'] for table in ('projects', 'audit_logs') for index in inspect(engine).get_indexes(table)}
+    assert set(QUERIES) <= indexes
+    assert not indexes & {'ix_projects_user_id', 'ix_audit_logs_user_id'}
+    
+    with engine.connect() as connection:
+        for index, query in QUERIES.items():
+            assert index in plan(connection, query), index
+
+def test_queries_use_indexes_on_sqlite(tmp_path):
+    check_plans(create_engine(f'sqlite:///{tmp_path}/synthai.db'))
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'), reason='TEST_POSTGRES_URL not set')
+def test_queries_use_indexes_on_postgres():
+    check_plans(create_engine(os.environ['TEST_POSTGRES_URL']))
+
+def test_recommendations_are_backfilled_with_foreign_keys_enforced(tmp_path):
+    from sqlalchemy import event
+    engine = create_engine(f'sqlite:///{tmp_path}/synthai.db')
+    event.listen(engine, 'connect', lambda connection, record: connection.execute('PRAGMA foreign_keys=ON'))
+    config = Config(os.path.join(BACKEND_DIR, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(BACKEND_DIR, 'migrations'))
+    
+    migrate(engine)
+    # Back to the JSON columns of 0002, holding the payloads of existing projects
+    with engine.connect() as connection:
+        config.attributes['connection'] = connection
+        command.downgrade(config, '0002')
+        connection.execute(text("INSERT INTO users (id, email, password_hash, first_name, last_name) VALUES ('u1', 'a@b.c', 'x', 'A', 'B')"))
+        for i in range(3):
+            connection.execute(text(
+                "INSERT INTO projects (id, user_id, title, description, project_type, complexity, timeline, team_size, "
+                "estimated_price_zar, technical_recommendations, security_assessment) "
+                f"VALUES ('p{i}', 'u1', 'Shop', 'Shop', 'web', 'simple', 'normal', 'small', 1000, '{{\"stack\": [\"flask\"]}}', NULL)"
+            ))
+        connection.commit()
+        
+        command.upgrade(config, 'head')
+        connection.commit()
+        
+        assert connection.execute(text('SELECT count(*) FROM recommendation_blobs')).scalar() == 1
+        hashes = connection.execute(text('SELECT technical_recommendations_hash, security_assessment_hash FROM projects')).all()
+        assert len({technical for technical, _ in hashes}) == 1 and all(security is None for _, security in hashes)
+        assert connection.execute(text('PRAGMA foreign_key_check')).all() == []
+    assert {fk['referred_table'] for fk in inspect(engine).get_foreign_keys('projects')} == {'users', 'recommendation_blobs'}
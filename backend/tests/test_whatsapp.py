@@ -0,0 +1,48 @@
+import pytest
+from src.app import create_app, db
+from src.app.models import AuditLog
+
+@pytest.fixture
+def app(monkeypatch):
+    # Process queued tasks in-process instead of through the broker
+    monkeypatch.setenv('CELERY_TASK_ALWAYS_EAGER', 'True')
+    # Write audit events immediately so tests can query them
+    monkeypatch.setenv('AUDIT_LOG_MODE', 'sync')
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def sent_messages(monkeypatch):
+    from src.app.routes import whatsapp
+    sent = []
+    monkeypatch.setattr(whatsapp, 'send_whatsapp_message', lambda to, body: sent.append((to, body)) or 'SM-out')
+    monkeypatch.setattr(whatsapp.chatbot_ai, 'process_whatsapp_message', lambda message, number, send_early=None: f'Echo: {message}')
+    return sent
+
+def test_webhook_queues_and_replies(client, sent_messages):
+    response = client.post('/api/whatsapp/webhook', data={
+        'Body': 'Hello',
+        'From': '+27720000001',
+        'MessageSid': 'SM-test-1'
+    })
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'queued'
+    assert sent_messages == [('+27720000001', 'Echo: Hello')]
+    assert AuditLog.query.filter_by(resource_id='SM-test-1').count() == 1
+
+def test_webhook_ignores_twilio_retries(client, sent_messages):
+    data = {'Body': 'Hi again', 'From': '+27720000002', 'MessageSid': 'SM-test-2'}
+    
+    assert client.post('/api/whatsapp/webhook', data=data).get_json()['status'] == 'queued'
+    assert client.post('/api/whatsapp/webhook', data=data).get_json()['status'] == 'duplicate'
+    assert len(sent_messages) == 1
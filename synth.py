@@ -1,18 +1,37 @@
 import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.ensemble import RandomForestRegressor
 import re
+import copy
 import json
 from datetime import datetime
+from functools import lru_cache
 
 class ProjectPricingAI:
     """
     AI System for project pricing analysis
     """
     
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+    # Ordinal codes for categorical inputs; numeric inputs are used as given
+    COMPLEXITY_CODES = {'simple': 1, 'medium': 2, 'complex': 3, 'very-complex': 4}
+    TEAM_SIZE_CODES = {'solo': 1, 'small': 2, 'medium': 3, 'large': 4}
+    TIMELINE_CODES = {'flexible': 1, 'standard': 2, 'urgent': 3, 'asap': 4}
+    
+    def __init__(self, text_features='tfidf', n_hash_features=2 ** 12):
+        """
+        text_features='tfidf' learns a 1000-term vocabulary; 'hashing' uses a
+        stateless HashingVectorizer so no vocabulary is ever held in memory and
+        historical data can be consumed chunk by chunk.
+        """
+        self.text_features = text_features
+        if text_features == 'hashing':
+            self.vectorizer = HashingVectorizer(
+                n_features=n_hash_features, stop_words='english', alternate_sign=False
+            )
+        else:
+            self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
         self.price_model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.is_trained = False
         
@@ -28,24 +47,76 @@ class ProjectPricingAI:
             'security_auditor': SecurityAuditor(),
             'marketing_agent': MarketingAgent()
         }
+        
+        # Analyzers that ignore the description are pure functions of the
+        # categorical inputs, so memoize them across calls in a bounded LRU
+        self._memoized_analyzers = {
+            role: lru_cache(maxsize=1024)(
+                lambda *categorical, analyzer=analyzer: analyzer.analyze('', *categorical)
+            )
+            for role, analyzer in self.analyzers.items()
+            if not getattr(analyzer, 'uses_description', True)
+        }
     
     def train(self, historical_data):
         """
         Train the AI model on historical project data
         """
+        return self.train_chunks([historical_data])
+    
+    def train_chunks(self, chunks):
+        """
+        Train on historical data supplied as an iterable of lists of projects.
+        
+        Text features stay sparse end to end and are stacked with the numeric
+        columns via scipy.sparse, which the forest accepts directly. With the
+        hashing vectorizer each chunk is vectorized as it arrives and only its
+        sparse block is kept; TF-IDF needs the whole corpus for its vocabulary,
+        so descriptions are collected first and vectorized once.
+        """
         try:
-            # Prepare features
-            texts = [item['description'] for item in historical_data]
-            X_text = self.vectorizer.fit_transform(texts).toarray()
+            text_blocks, texts, numeric_blocks, targets = [], [], [], []
+            skipped, first_error = 0, None
+            
+            for chunk in chunks:
+                descriptions, numeric, prices = [], [], []
+                for item in chunk:
+                    # A malformed history row is dropped on its own, not the whole run
+                    try:
+                        description, row = self._encode_row(item)
+                        price = self._finite(item['final_price'], 'final_price')
+                    except (KeyError, TypeError, ValueError) as e:
+                        skipped += 1
+                        first_error = first_error or e
+                        continue
+                    descriptions.append(description)
+                    numeric.append(row)
+                    prices.append(price)
+                
+                if not descriptions:
+                    continue
+                
+                if self.text_features == 'hashing':
+                    text_blocks.append(self.vectorizer.transform(descriptions))
+                else:
+                    texts.extend(descriptions)
+                
+                numeric_blocks.append(np.array(numeric, dtype=float))
+                targets.append(np.array(prices, dtype=float))
+            
+            if skipped:
+                print(f"Training skipped {skipped} malformed rows, first: {first_error!r}")
             
-            # Numerical features
-            X_num = np.array([
-                [item['complexity'], item['team_size'], item['timeline']]
-                for item in historical_data
-            ])
+            if not targets:
+                return False
             
-            X = np.hstack([X_text, X_num])
-            y = np.array([item['final_price'] for item in historical_data])
+            if self.text_features == 'hashing':
+                X_text = sparse.vstack(text_blocks, format='csr')
+            else:
+                X_text = self.vectorizer.fit_transform(texts)
+            
+            X = sparse.hstack([X_text, sparse.csr_matrix(np.vstack(numeric_blocks))], format='csr')
+            y = np.concatenate(targets)
             
             # Train model
             self.price_model.fit(X, y)
@@ -55,48 +126,131 @@ class ProjectPricingAI:
             print(f"Training error: {e}")
             return False
     
+    def _encode_row(self, item):
+        """
+        Description and complexity, team size and timeline columns for one
+        project; raises KeyError, TypeError or ValueError if it is malformed
+        """
+        description = item['description']
+        if not isinstance(description, str):
+            raise TypeError(f"description must be a string, not {type(description).__name__}")
+        return description, [
+            self._finite(self.COMPLEXITY_CODES.get(item['complexity'], item['complexity']), 'complexity'),
+            self._finite(self.TEAM_SIZE_CODES.get(item['team_size'], item['team_size']), 'team_size'),
+            self._finite(self.TIMELINE_CODES.get(item['timeline'], item['timeline']), 'timeline')
+        ]
+    
+    @staticmethod
+    def _finite(value, name):
+        number = float(value)
+        if not np.isfinite(number):
+            raise ValueError(f"{name} must be finite, got {value!r}")
+        return number
+    
     def analyze_project(self, project_description, project_type, complexity, timeline, team_size):
         """
         Main method to analyze project and return pricing and recommendations
         """
+        return self.analyze_projects([{
+            'description': project_description,
+            'project_type': project_type,
+            'complexity': complexity,
+            'timeline': timeline,
+            'team_size': team_size
+        }])[0]
+    
+    def analyze_projects(self, projects):
+        """
+        Analyze a batch of projects (dicts with description, project_type,
+        complexity, timeline and team_size) in one vectorizer and one forest call
+        """
         if not self.is_trained:
-            return self._fallback_analysis(project_description, project_type, complexity, timeline, team_size)
+            return [self._fallback_analysis(*self._analysis_args(project)) for project in projects]
         
-        try:
-            # Vectorize description
-            desc_vector = self.vectorizer.transform([project_description]).toarray()
-            
-            # Create feature array
-            features = np.hstack([
-                desc_vector,
-                np.array([[complexity, team_size, timeline]])
-            ])
-            
-            # Get base prediction
-            base_price = self.price_model.predict(features)[0]
-            
-            # Apply South Africa market adjustment
-            zar_price = base_price * self.zar_exchange_rate * self.sa_market_multiplier
-            
-            # Get recommendations from AI team
-            analysis = {
-                'base_price_usd': round(base_price, 2),
-                'final_price_zar': round(zar_price, 2),
-                'analysis_date': datetime.now().isoformat(),
-                'ai_team_recommendations': {}
-            }
-            
-            # Get recommendations from each AI team member
-            for role, analyzer in self.analyzers.items():
-                analysis['ai_team_recommendations'][role] = analyzer.analyze(
-                    project_description, project_type, complexity, timeline, team_size
-                )
-            
-            return analysis
-            
-        except Exception as e:
-            print(f"Analysis error: {e}")
-            return self._fallback_analysis(project_description, project_type, complexity, timeline, team_size)
+        # Encode row by row so a malformed project falls back on its own
+        results = [None] * len(projects)
+        indices, descriptions, numeric = [], [], []
+        for index, project in enumerate(projects):
+            try:
+                description, row = self._encode_row(project)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Analysis error for project {index}: {e!r}")
+                continue
+            indices.append(index)
+            descriptions.append(description)
+            numeric.append(row)
+        
+        if indices:
+            try:
+                # Vectorize all descriptions at once, keeping them sparse
+                X_text = self.vectorizer.transform(descriptions)
+                X = sparse.hstack([X_text, sparse.csr_matrix(np.array(numeric, dtype=float))], format='csr')
+                
+                # Get base predictions
+                base_prices = self.price_model.predict(X)
+                
+                # Apply South Africa market adjustment
+                zar_prices = base_prices * self.zar_exchange_rate * self.sa_market_multiplier
+                
+                recommendations = self._run_analyzers([projects[index] for index in indices])
+                analysis_date = datetime.now().isoformat()
+                
+                for index, base_price, zar_price, team_recommendations in zip(indices, base_prices, zar_prices, recommendations):
+                    if team_recommendations is not None:
+                        results[index] = {
+                            'base_price_usd': round(float(base_price), 2),
+                            'final_price_zar': round(float(zar_price), 2),
+                            'analysis_date': analysis_date,
+                            'ai_team_recommendations': team_recommendations
+                        }
+                
+            except Exception as e:
+                print(f"Analysis error: {e}")
+        
+        return [
+            result if result is not None else self._fallback_analysis(*self._analysis_args(project))
+            for result, project in zip(results, projects)
+        ]
+    
+    def _run_analyzers(self, projects):
+        """
+        Get recommendations from each AI team member for every project.
+        
+        Work is done analyzer by analyzer across the batch. Analyzers that ignore
+        the description run once per distinct (type, complexity, timeline, team)
+        combination, memoized across calls; each project gets its own copy of
+        the cached result, so editing one never changes another. A project
+        that any analyzer fails on gets None, for the caller to fall back on.
+        """
+        recommendations = [{} for _ in projects]
+        
+        for role, analyzer in self.analyzers.items():
+            memoized = self._memoized_analyzers.get(role)
+            for index, project in enumerate(projects):
+                team_recommendations = recommendations[index]
+                if team_recommendations is None:
+                    continue
+                args = self._analysis_args(project)
+                try:
+                    if memoized is not None:
+                        team_recommendations[role] = copy.deepcopy(memoized(*args[1:]))
+                    else:
+                        team_recommendations[role] = analyzer.analyze(*args)
+                except Exception as e:
+                    print(f"{role} failed for project {index}: {e!r}")
+                    recommendations[index] = None
+        
+        return recommendations
+    
+    @staticmethod
+    def _analysis_args(project):
+        return (
+            project['description'],
+            project['project_type'],
+            project['complexity'],
+            project['timeline'],
+            project['team_size']
+        )
     
     def _fallback_analysis(self, project_description, project_type, complexity, timeline, team_size):
         """Fallback analysis when model isn't trained"""
@@ -146,6 +300,8 @@ class ProjectAnalyzer:
 class TechRecommender:
     """AI for recommending technologies"""
     
+    uses_description = False
+    
     def analyze(self, description, project_type, complexity, timeline, team_size):
         recommendations = {
             'web': ['React.js', 'Node.js', 'MongoDB', 'AWS'],
@@ -166,6 +322,8 @@ class TechRecommender:
 class PricingEngine:
     """AI for calculating fair pricing"""
     
+    uses_description = False
+    
     def analyze(self, description, project_type, complexity, timeline, team_size):
         base_rates = {
             'web': 850, 'mobile': 1100, 'ai': 1500, 
@@ -186,6 +344,8 @@ class PricingEngine:
 class SecurityAuditor:
     """AI for security recommendations"""
     
+    uses_description = False
+    
     def analyze(self, description, project_type, complexity, timeline, team_size):
         security_level = 'Standard' if complexity in ['simple', 'medium'] else 'Advanced' if complexity == 'complex' else 'Military'
         
@@ -200,6 +360,8 @@ class SecurityAuditor:
 class MarketingAgent:
     """AI for marketing strategy"""
     
+    uses_description = False
+    
     def analyze(self, description, project_type, complexity, timeline, team_size):
         platforms = {
             'web': ['Google Ads', 'Facebook', 'LinkedIn', 'Twitter'],
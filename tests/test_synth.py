@@ -0,0 +1,54 @@
+from synth import ProjectPricingAI
+
+
+def _project(description='Web app with API and database', complexity='medium', team_size='small', timeline='standard'):
+    return {
+        'description': description,
+        'project_type': 'web',
+        'complexity': complexity,
+        'team_size': team_size,
+        'timeline': timeline
+    }
+
+
+def _history():
+    return [
+        {**_project(f'Project {i} with API and cloud hosting', complexity, team_size, timeline), 'final_price': price}
+        for i, (complexity, team_size, timeline, price) in enumerate([
+            ('simple', 'solo', 'flexible', 3000),
+            ('medium', 'small', 'standard', 6000),
+            ('complex', 'medium', 'urgent', 12000),
+            ('very-complex', 'large', 'asap', 25000),
+        ] * 3)
+    ]
+
+
+def test_bad_history_rows_are_skipped_not_fatal():
+    ai = ProjectPricingAI()
+    history = _history() + [
+        {**_project(complexity='enormous'), 'final_price': 5000},
+        {**_project(team_size=None), 'final_price': 5000},
+        {**_project(), 'final_price': 'n/a'},
+        {**_project(description=None), 'final_price': 5000},
+    ]
+
+    assert ai.train(history) is True
+    assert ai.is_trained
+
+
+def test_only_bad_projects_fall_back_in_a_mixed_batch():
+    ai = ProjectPricingAI()
+    assert ai.train(_history())
+
+    results = ai.analyze_projects([
+        _project(),
+        _project(complexity='huge'),     # not a code or a number
+        _project(timeline='nan'),        # parses, but is not finite
+        _project(complexity=3),          # encodes, but the analyzers need a name
+        _project(complexity='complex', team_size='large', timeline='asap'),
+    ])
+
+    fallback = [result['ai_team_recommendations'] == {'note': 'Using fallback pricing algorithm'} for result in results]
+    assert fallback == [False, True, True, True, False]
+    assert set(results[0]['ai_team_recommendations']) == set(ai.analyzers)
+    assert results[4]['final_price_zar'] > results[0]['final_price_zar']